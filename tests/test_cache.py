@@ -0,0 +1,89 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from trading_backtest import data
+from trading_backtest.cache import IndicatorCache, fingerprint
+
+PERIODS = dict(sma=[5, 20], rsi=[14], atr=[14], vol=[20], imp=[10], hmax=[20], bb=[20])
+
+
+def _price_df(n: int = 300, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2021-01-01", periods=n, freq="15min"),
+            "open": close,
+            "high": close * 1.002,
+            "low": close * 0.998,
+            "close": close,
+        }
+    )
+
+
+def test_warm_cache_matches_cold_computation(tmp_path, monkeypatch):
+    cache = IndicatorCache(tmp_path)
+    expected = _price_df()
+    data.add_indicator_cache(expected, **PERIODS)
+
+    cold = _price_df()
+    data.add_indicator_cache(cold, **PERIODS, cache=cache)
+    pdt.assert_frame_equal(cold, expected)
+    assert len(list(tmp_path.glob("*.npy"))) == 10
+
+    evaluate = data.IndicatorPlan.evaluate
+
+    def no_specs(plan, frame, **kwargs):
+        assert not plan.specs, "indicator recomputed"
+        return evaluate(plan, frame, **kwargs)
+
+    monkeypatch.setattr(data.IndicatorPlan, "evaluate", no_specs)
+    warm = _price_df()
+    data.add_indicator_cache(warm, **PERIODS, cache=cache)
+    pdt.assert_frame_equal(warm, expected)
+
+
+def test_with_indicators_keeps_cache_hits_mapped(tmp_path):
+    cache = IndicatorCache(tmp_path)
+    expected = _price_df()
+    data.add_indicator_cache(expected, **PERIODS)
+    data.with_indicators(_price_df(), **PERIODS, cache=cache)
+
+    df = _price_df()
+    warm = data.with_indicators(df, **PERIODS, cache=cache)
+    pdt.assert_frame_equal(warm, expected)
+    assert list(df.columns) == ["timestamp", "open", "high", "low", "close"]
+    assert np.shares_memory(warm["close"].to_numpy(), df["close"].to_numpy())
+    # Viste in sola lettura sui file della cache, non copie consolidate
+    for col in warm.columns[len(df.columns) :]:
+        assert not warm[col].to_numpy().flags.writeable, col
+    # Colonne già presenti: nessun nuovo frame
+    assert data.with_indicators(warm, sma=[5, 20], cache=cache) is warm
+
+
+def test_key_depends_on_content_and_version(tmp_path, monkeypatch):
+    df = _price_df()
+    other = _price_df(seed=1)
+    assert fingerprint(df) == fingerprint(df.copy())
+    assert fingerprint(df) != fingerprint(other)
+
+    cache = IndicatorCache(tmp_path)
+    data.add_indicator_cache(df, sma=[5], cache=cache)
+    monkeypatch.setattr(data, "INDICATOR_VERSION", data.INDICATOR_VERSION + 1)
+    data.add_indicator_cache(_price_df(), sma=[5], cache=cache)
+    assert len(list(tmp_path.glob("*.npy"))) == 2
+
+
+def test_lru_eviction_keeps_recent_columns(tmp_path):
+    values = np.zeros(1000)
+    cache = IndicatorCache(tmp_path, max_bytes=2 * (values.nbytes + 128))
+    cache.store("k", {"a": values, "b": values})
+    for age, name in enumerate("ab"):
+        os.utime(tmp_path / f"k_{name}.npy", (1000 + age, 1000 + age))
+    assert cache.load("k", ["a"]) is not None  # "a" diventa il più recente
+    cache.store("k", {"c": values})
+    assert cache.load("k", ["b"]) is None
+    assert cache.load("k", ["a", "c"]) is not None
@@ -1,5 +1,8 @@
+import numpy as np
+import pandas as pd
 import pytest
 
+from trading_backtest import data
 from trading_backtest.data import load_price_data, DataFormatError
 
 
@@ -14,3 +17,60 @@ def test_load_price_data_bad_format(tmp_path):
     bad.write_text('a,b\n1,"2')
     with pytest.raises(DataFormatError):
         load_price_data(bad)
+
+
+def test_load_price_data_float32(tmp_path):
+    csv = tmp_path / "prices.csv"
+    csv.write_text(
+        "Open time,Open,High,Low,Close,Volume\n"
+        "2021-01-01 00:15,2,3,1,2.5,10\n"
+        "2021-01-01 00:00,1,2,0.5,1.5,20\n"
+    )
+    df = load_price_data(csv, dtype="float32")
+    assert df["close"].tolist() == [1.5, 2.5]
+    for col in ("open", "high", "low", "close", "volume"):
+        assert df[col].dtype == "float32"
+
+
+@pytest.mark.parametrize("chunksize", [7, 1 << 20])
+def test_chunked_ingestion_matches_reference(tmp_path, chunksize):
+    rng = np.random.default_rng(0)
+    n = 100
+    ts = pd.date_range("2021-01-01", periods=n, freq="15min")
+    close = rng.random(n) + 1
+    raw = pd.DataFrame(
+        {
+            "Open time": ts.strftime("%Y-%m-%d %H:%M:%S"),
+            "Open": close,
+            "High": close,
+            "Low": close,
+            "Close": close.astype(object),
+            "Volume": np.arange(n),
+            "Ignore": "unused",
+        }
+    )
+    raw.loc[[5, 50], "Close"] = "bad"
+    raw.loc[20, "Open time"] = "not a date"
+    raw = raw.iloc[np.r_[0:60, 80:100, 60:80]]  # non ordinato
+    csv = tmp_path / "prices.csv"
+    raw.to_csv(csv, index=False)
+
+    df = data._read_price_csv(csv, chunksize=chunksize)
+    assert list(df.columns) == ["timestamp", "open", "high", "low", "close", "volume"]
+    keep = np.setdiff1d(np.arange(n), [5, 20, 50])
+    np.testing.assert_array_equal(df["timestamp"], ts[keep])
+    np.testing.assert_allclose(df["close"], close[keep], rtol=1e-15)
+    assert df["volume"].dtype == np.float64
+
+    df32 = data._read_price_csv(csv, chunksize=chunksize, dtype=np.float32)
+    assert df32["close"].dtype == np.float32
+    np.testing.assert_allclose(df32["close"], close[keep], rtol=1e-7)
+
+
+def test_integer_timestamps_keep_pandas_semantics(tmp_path):
+    csv = tmp_path / "prices.csv"
+    csv.write_text(
+        "Open time,Open,High,Low,Close,Volume\n1000,1,2,0.5,1.5,1\n0,1,2,0.5,1,1\n"
+    )
+    df = load_price_data(csv)
+    assert list(df["timestamp"]) == list(pd.to_datetime([0, 1000]))
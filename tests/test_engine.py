@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from trading_backtest import engine
+from trading_backtest.ledger import ExitReason, TradeLedger
+from trading_backtest.data import add_indicator_cache
+from trading_backtest.strategy import get_strategy
+from trading_backtest.config import (
+    SMAConfig,
+    RSIConfig,
+    BreakoutConfig,
+    BollingerConfig,
+    MomentumConfig,
+    VolExpansionConfig,
+    MACDConfig,
+    StochasticConfig,
+    RandomForestConfig,
+)
+
+
+def _random_walk_df(n: int = 600, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    spread = np.abs(rng.normal(0, 0.005, n)) * close
+    df = pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2021-01-01", periods=n, freq="15min"),
+            "open": close,
+            "high": close + spread,
+            "low": close - spread,
+            "close": close,
+        }
+    )
+    add_indicator_cache(
+        df,
+        sma=[5, 20, 50],
+        rsi=[14],
+        atr=[14],
+        vol=[20],
+        imp=[10],
+        hmax=[20],
+        bb=[20],
+    )
+    return df
+
+
+CONFIGS = [
+    (
+        "sma",
+        SMAConfig(
+            sma_fast=5,
+            sma_slow=20,
+            sma_trend=50,
+            sl_pct=1,
+            tp_pct=2,
+            position_size=0.5,
+            trailing_stop_pct=0.5,
+        ),
+    ),
+    ("rsi", RSIConfig(period=14, oversold=40, sl_pct=1, tp_pct=2)),
+    (
+        "breakout",
+        BreakoutConfig(lookback=20, atr_period=14, atr_mult=0.1, sl_pct=1, tp_pct=2),
+    ),
+    ("bollinger", BollingerConfig(period=20, nstd=1.0, sl_pct=1, tp_pct=2)),
+    ("momentum", MomentumConfig(window=10, threshold=0.005, sl_pct=1, tp_pct=2)),
+    (
+        "vol_expansion",
+        VolExpansionConfig(vol_window=20, vol_threshold=0.005, sl_pct=1, tp_pct=2),
+    ),
+    ("macd", MACDConfig(fast=12, slow=26, signal=9, sl_pct=1, tp_pct=2)),
+    (
+        "stochastic",
+        StochasticConfig(k_period=14, d_period=3, oversold=20, sl_pct=1, tp_pct=2),
+    ),
+    (
+        "random_forest",
+        RandomForestConfig(n_estimators=10, max_depth=3, sl_pct=1, tp_pct=2),
+    ),
+]
+
+
+def _assert_ledgers_equal(got: TradeLedger, expected: TradeLedger) -> None:
+    for field in ("entry_idx", "exit_idx", "entry_price", "exit_price", "reason"):
+        np.testing.assert_array_equal(getattr(got, field), getattr(expected, field))
+
+
+@pytest.mark.parametrize("engine_name", ["array", "event"])
+@pytest.mark.parametrize("name, cfg", CONFIGS)
+def test_engines_match_loop(name, cfg, engine_name):
+    df = _random_walk_df()
+    strategy_cls, _ = get_strategy(name)
+    loop = strategy_cls(cfg).generate_trades(df, engine="loop")
+    arr = strategy_cls(cfg).generate_trades(df, engine=engine_name)
+    assert not loop.empty
+    pdt.assert_frame_equal(arr, loop, check_dtype=False)
+
+
+def test_event_engine_matches_kernel_on_random_masks():
+    df = _random_walk_df(2000)
+    rng = np.random.default_rng(3)
+    for density in (0.002, 0.05, 0.5):
+        entries = rng.random(len(df)) < density
+        exits = rng.random(len(df)) < density / 2
+        args = (df["high"], df["low"], df["close"], entries, exits, 0.5, 1.0)
+        expected = engine.simulate_trades(*args)
+        got = engine.simulate_trades_event(*args)
+        _assert_ledgers_equal(got, expected)
+
+
+@pytest.mark.parametrize("name, cfg", CONFIGS)
+def test_compute_signals_leaves_frame_untouched(name, cfg):
+    df = _random_walk_df()
+    before = df.copy()
+    strategy_cls, _ = get_strategy(name)
+    entries, exits = strategy_cls(cfg).compute_signals(df)
+    assert entries.dtype == bool and exits.dtype == bool
+    assert len(entries) == len(exits) == len(df)
+    pdt.assert_frame_equal(df, before)
+
+
+def test_python_kernel_matches_compiled(monkeypatch):
+    df = _random_walk_df()
+    rng = np.random.default_rng(1)
+    entries = rng.random(len(df)) < 0.1
+    exits = rng.random(len(df)) < 0.05
+    args = (df["high"], df["low"], df["close"], entries, exits, 1.0, 2.0, 0.5)
+    expected = engine.simulate_trades(*args)
+    expected_metrics = engine.simulate_metrics(*args, commission=0.1)
+    monkeypatch.setattr(engine, "_simulate_jit", None)
+    _assert_ledgers_equal(engine.simulate_trades(*args), expected)
+    assert engine.simulate_metrics(*args, commission=0.1) == expected_metrics
+
+
+def test_unknown_engine_raises():
+    strategy_cls, _ = get_strategy("rsi")
+    strat = strategy_cls(RSIConfig(period=14, oversold=30, sl_pct=1, tp_pct=2))
+    with pytest.raises(ValueError):
+        strat.generate_trades(_random_walk_df(50), engine="nope")
+
+
+def _batch_inputs(n_cfg: int = 12):
+    df = _random_walk_df()
+    rng = np.random.default_rng(2)
+    entries = rng.random((n_cfg, len(df))) < 0.05
+    exits = rng.random((n_cfg, len(df))) < 0.02
+    sl = rng.integers(1, 3, n_cfg).astype(float)
+    tp = sl + rng.integers(1, 3, n_cfg)
+    trail = np.where(rng.random(n_cfg) < 0.5, 0.0, 0.5)
+    return df, entries, exits, sl, tp, trail
+
+
+def _assert_batch_matches_single(res, df, entries, exits, sl, tp, trail):
+    assert len(res) == len(sl)
+    for n in range(len(sl)):
+        expected = engine.simulate_trades(
+            df["high"],
+            df["low"],
+            df["close"],
+            entries[n],
+            exits[n],
+            sl[n],
+            tp[n],
+            trail[n],
+        )
+        _assert_ledgers_equal(res.trades(n), expected)
+
+
+def test_simulate_batch_matches_single_runs():
+    df, entries, exits, sl, tp, trail = _batch_inputs()
+    arrays = engine.PriceArrays.from_frame(df)
+    res = engine.simulate_batch(arrays, entries, exits, sl, tp, trail)
+    _assert_batch_matches_single(res, df, entries, exits, sl, tp, trail)
+
+
+def test_simulate_batch_numpy_fallback(monkeypatch):
+    monkeypatch.setattr(engine, "_simulate_batch_jit", None)
+    df, entries, exits, sl, tp, trail = _batch_inputs()
+    arrays = engine.PriceArrays.from_frame(df)
+    res = engine.simulate_batch(arrays, entries, exits, sl, tp, trail)
+    _assert_batch_matches_single(res, df, entries, exits, sl, tp, trail)
+
+
+def test_ledger_reasons_and_frame():
+    high = np.array([10.0, 10.0, 12.0, 10.0, 10.0, 10.0, 10.0])
+    low = np.array([10.0, 10.0, 10.0, 10.0, 8.0, 10.0, 10.0])
+    close = np.full(7, 10.0)
+    entries = np.array([1, 0, 0, 1, 0, 1, 0], dtype=bool)
+    exits = np.zeros(7, dtype=bool)
+    ledger = engine.simulate_trades(high, low, close, entries, exits, 5, 10, qty=0.5)
+    assert list(ledger.reason) == [ExitReason.TP, ExitReason.SL, ExitReason.END]
+    frame = ledger.to_frame(pd.Series(list("abcdefg")), with_reason=True)
+    assert frame["entry_time"].tolist() == ["a", "d", "f"]
+    assert frame["exit_time"].tolist() == ["c", "e", "g"]
+    assert frame["qty"].tolist() == [0.5] * 3
+    assert frame["reason"].tolist() == ["TP", "SL", "END"]
+
+
+@pytest.mark.parametrize("engine_name", ["array", "event"])
+@pytest.mark.parametrize("name, cfg", CONFIGS[:-1])
+def test_metrics_match_performance_analyzer(name, cfg, engine_name):
+    from trading_backtest.performance import PerformanceAnalyzer
+
+    df = _random_walk_df()
+    strategy_cls, _ = get_strategy(name)
+    strat = strategy_cls(cfg)
+    pa = PerformanceAnalyzer(strat.generate_trades(df), commission=0.1, slippage=0.05)
+    m = strat.simulate_metrics(df, commission=0.1, slippage=0.05, engine=engine_name)
+    assert m.trade_count() == pa.trade_count()
+    assert m.total_return() == pytest.approx(pa.total_return())
+    assert m.avg_trade() == pytest.approx(pa.avg_trade())
+    assert m.sharpe_ratio() == pytest.approx(pa.sharpe_ratio())
+    assert m.max_drawdown() == pytest.approx(pa.max_drawdown())
+    assert m.win_rate() == pytest.approx(pa.win_rate())
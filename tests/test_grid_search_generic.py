@@ -3,6 +3,7 @@ import sys
 import subprocess
 from pathlib import Path
 import pandas as pd
+import pytest
 from trading_backtest.optimize import grid_search
 from tests.test_optuna_param_spaces import _dummy_df
 
@@ -61,3 +62,76 @@ def test_cli_grid_search_rsi_output(tmp_path):
     assert res.returncode == 0
     assert "KeyError" not in res.stderr
     assert (tmp_path / "results_live.csv").is_file()
+
+
+def test_grid_search_matches_evaluate_strategy():
+    from trading_backtest.optimize import evaluate_strategy
+    from trading_backtest.strategy import get_strategy
+
+    from tests.test_engine import _random_walk_df
+
+    df = _random_walk_df()
+    combos = [
+        {
+            "sma_fast": 5,
+            "sma_slow": slow,
+            "sma_trend": None,
+            "sl_pct": sl,
+            "tp_pct": 3,
+            "position_size": 1,
+            "trailing_stop_pct": trail,
+        }
+        for slow in (20, 50)
+        for sl in (1, 2)
+        for trail in (0.5, 5.0)
+    ]
+    result = grid_search(df, combos, "sma", batch_size=3)
+    assert result["total_return"].ne(0).all()
+    strategy_cls, config_cls = get_strategy("sma")
+    for i, params in enumerate(combos):
+        cfg = config_cls(**params)
+        expected = evaluate_strategy(df, lambda: strategy_cls(cfg))
+        assert result.loc[i, "total_return"] == pytest.approx(expected)
+
+
+def test_parallel_grid_search_matches_serial(tmp_path):
+    from trading_backtest.results import ResultStore
+
+    from tests.test_engine import _random_walk_df
+
+    df = _random_walk_df()
+    combos = [
+        {"period": 14, "oversold": oversold, "sl_pct": sl, "tp_pct": tp}
+        for oversold in (25, 30, 35, 40)
+        for sl in (1, 2, 5)
+        for tp in (6, 10)
+    ]
+    serial = grid_search(df, combos, "rsi", batch_size=5)
+    parallel = grid_search(df, combos, "rsi", batch_size=5, workers=2, chunksize=7)
+    pd.testing.assert_frame_equal(parallel, serial)
+
+    store = ResultStore(tmp_path / "results.db")
+    grid_search(df, combos[:10], "rsi", results=store)
+    stored = grid_search(df, combos, "rsi", results=store, workers=2)
+    pd.testing.assert_frame_equal(stored, serial)
+    assert len(store.top(limit=100)) == len(combos)
+
+
+def test_grid_search_skips_trades_without_return():
+    from trading_backtest.optimize import evaluate_strategy
+    from trading_backtest.strategy import get_strategy
+
+    from tests.test_engine import _random_walk_df
+
+    df = _random_walk_df()
+    df.loc[200:260, "close"] = float("nan")
+    combos = [
+        {"period": 14, "oversold": oversold, "sl_pct": 2, "tp_pct": 6}
+        for oversold in (30, 40, 50)
+    ]
+    result = grid_search(df, combos, "rsi")
+    strategy_cls, config_cls = get_strategy("rsi")
+    for i, params in enumerate(combos):
+        cfg = config_cls(**params)
+        expected = evaluate_strategy(df, lambda: strategy_cls(cfg))
+        assert result.loc[i, "total_return"] == pytest.approx(expected)
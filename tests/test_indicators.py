@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trading_backtest import indicators
+from trading_backtest.indicators import PrefixSums, ema_spans, rolling_mean, rolling_std
+
+WINDOWS = [1, 2, 5, 20, 50]
+
+
+def _series_with_gaps(n: int = 3000, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    x = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    x[rng.random(n) < 0.02] = np.nan
+    x[:3] = np.nan
+    return x
+
+
+@pytest.mark.parametrize("shift", [0, 1])
+def test_rolling_mean_matches_pandas(shift):
+    x = _series_with_gaps()
+    got = rolling_mean(x, WINDOWS, shift=shift)
+    for w in WINDOWS:
+        expected = pd.Series(x).rolling(w).mean().shift(shift).to_numpy()
+        np.testing.assert_allclose(got[w], expected, rtol=1e-12, equal_nan=True)
+
+
+def test_rolling_mean_min_periods():
+    x = _series_with_gaps()
+    got = rolling_mean(x, [14], min_periods=1)
+    expected = pd.Series(x).rolling(14, min_periods=1).mean().to_numpy()
+    np.testing.assert_allclose(got[14], expected, rtol=1e-12, equal_nan=True)
+
+
+def test_rolling_std_matches_pandas():
+    x = _series_with_gaps()
+    got = rolling_std(x, WINDOWS, shift=1)
+    for w in WINDOWS:
+        expected = pd.Series(x).rolling(w).std().shift(1).to_numpy()
+        np.testing.assert_allclose(
+            got[w], expected, rtol=1e-9, atol=1e-8, equal_nan=True
+        )
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_windows_spanning_block_boundaries(monkeypatch, compiled):
+    if not compiled:
+        monkeypatch.setattr(indicators, "_window_stat_jit", None)
+    x = _series_with_gaps(100, seed=1)
+    ps = PrefixSums(x, block=8)
+    for w in (1, 3, 8):
+        rolling = pd.Series(x).rolling(w)
+        np.testing.assert_allclose(
+            ps.mean(w), rolling.mean(), rtol=1e-12, equal_nan=True
+        )
+        np.testing.assert_allclose(
+            ps.std(w), rolling.std(), rtol=1e-9, atol=1e-12, equal_nan=True
+        )
+    with pytest.raises(ValueError):
+        ps.mean(9)
+
+
+def test_no_drift_on_long_large_magnitude_series():
+    n = 1_000_000
+    rng = np.random.default_rng(2)
+    x = 1e5 + np.cumsum(rng.normal(0, 1.0, n))
+    tail = slice(n - 1000, n)
+    mean = rolling_mean(x, [20])[20][tail]
+    std = rolling_std(x, [20])[20][tail]
+    windows = np.lib.stride_tricks.sliding_window_view(x, 20)[tail.start - 19 :]
+    np.testing.assert_allclose(mean, windows.mean(axis=1), rtol=1e-13)
+    np.testing.assert_allclose(std, windows.std(axis=1, ddof=1), rtol=1e-8)
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def test_ema_spans_match_pandas(monkeypatch, compiled):
+    if not compiled:
+        monkeypatch.setattr(indicators, "_ema_jit", None)
+    x = _series_with_gaps()
+    got = ema_spans(x, [5, 12, 26, 50], shift=1)
+    for span in (5, 12, 26, 50):
+        expected = pd.Series(x).ewm(span=span, adjust=False).mean().shift(1)
+        np.testing.assert_allclose(got[span], expected, rtol=1e-12, equal_nan=True)
@@ -0,0 +1,60 @@
+import pandas.testing as pdt
+import pytest
+
+from trading_backtest.lazy import LazyIndicatorFrame
+from trading_backtest.optimize import evaluate_strategy
+from trading_backtest.strategy import get_strategy
+
+from .test_engine import CONFIGS, _random_walk_df
+
+
+@pytest.mark.parametrize("name, cfg", CONFIGS[:-1])
+def test_lazy_frame_matches_eager_cache(name, cfg):
+    eager = _random_walk_df()
+    lazy = LazyIndicatorFrame(eager[["timestamp", "open", "high", "low", "close"]])
+    strategy_cls, _ = get_strategy(name)
+    expected = evaluate_strategy(eager, lambda: strategy_cls(cfg), with_sharpe=True)
+    got = evaluate_strategy(lazy, lambda: strategy_cls(cfg), with_sharpe=True)
+    assert got == pytest.approx(expected)
+
+
+def test_columns_computed_on_first_access_only():
+    eager = _random_walk_df()
+    lazy = LazyIndicatorFrame(eager[["timestamp", "open", "high", "low", "close"]])
+    assert "sma_20" in lazy and "nope" not in lazy
+    assert "sma_20" not in lazy.columns
+    pdt.assert_series_equal(lazy["sma_20"], eager["sma_20"])
+    assert list(lazy.columns[5:]) == ["sma_20"]
+    lazy["bbs_20"]
+    assert {"bbm_20", "bbs_20"} <= set(lazy.columns)
+    with pytest.raises(KeyError):
+        lazy["nope"]
+
+
+def test_memory_cap_evicts_least_recently_used():
+    base = _random_walk_df()[["timestamp", "open", "high", "low", "close"]]
+    lazy = LazyIndicatorFrame(base, max_bytes=2 * base["close"].nbytes)
+    lazy["sma_5"], lazy["sma_10"]
+    lazy["sma_5"]  # torna il più recente
+    lazy["sma_20"]
+    assert list(lazy.columns[5:]) == ["sma_5", "sma_20"]
+
+
+def test_prefetch_hint_and_copy():
+    base = _random_walk_df()[["timestamp", "open", "high", "low", "close"]]
+    lazy = LazyIndicatorFrame(base)
+    lazy.prefetch({"sma": [5, 20], "rsi": [14]})
+    frame = lazy.copy()
+    assert list(frame.columns) == list(base.columns) + ["sma_5", "sma_20", "rsi_14"]
+
+
+def test_random_forest_features_do_not_depend_on_computed_columns():
+    name, cfg = CONFIGS[-1]
+    strategy_cls, _ = get_strategy(name)
+    base = _random_walk_df()[["timestamp", "open", "high", "low", "close"]]
+    make = lambda: strategy_cls(cfg)  # noqa: E731
+    fresh = evaluate_strategy(LazyIndicatorFrame(base), make)
+
+    lazy = LazyIndicatorFrame(base, max_bytes=base["close"].nbytes)
+    lazy["sma_5"], lazy["rsi_14"], lazy["atr_14"]
+    assert evaluate_strategy(lazy, make) == pytest.approx(fresh)
@@ -1,10 +1,16 @@
+import dataclasses
+
 import optuna
 import pandas as pd
 import numpy as np
 import pytest
 
+from trading_backtest import optimize
 from trading_backtest.optimize import (
+    canonical_params,
+    make_objective,
     optimize_with_optuna,
+    suggest,
     prune_sma,
     prune_rsi,
     prune_breakout,
@@ -25,6 +31,7 @@ from trading_backtest.optimize import (
     RandomForestParamSpace,
     check_sl_tp,
 )
+from trading_backtest.results import config_key
 from trading_backtest.strategy import get_strategy
 from trading_backtest.config import (
     SMAConfig,
@@ -165,3 +172,61 @@ def test_prune_bollinger_parameters():
     params["nstd"] = -1
     with pytest.raises(optuna.TrialPruned):
         prune_bollinger(params, None)
+
+
+def test_repeated_configurations_are_backtested_once(monkeypatch):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    calls = []
+    evaluate = optimize.evaluate_strategy
+
+    def counting(df, make_strategy, **kwargs):
+        calls.append(make_strategy().config)
+        return evaluate(df, make_strategy, **kwargs)
+
+    monkeypatch.setattr(optimize, "evaluate_strategy", counting)
+    space = {
+        "period": ("int", 14, 14),
+        "oversold": ("cat", [30]),
+        "sl_pct": ("int", 1, 1),
+        "tp_pct": ("int", 2, 3),
+    }
+    strategy_cls, _ = get_strategy("rsi")
+    objective = make_objective(_dummy_df(), strategy_cls, RSIConfig, space, prune_rsi)
+    study = optuna.create_study(direction="maximize")
+    study.optimize(objective, n_trials=10)
+    assert len(calls) == len(objective.scores) == 2
+    assert (objective.hits, objective.misses) == (8, 2)
+
+    resumed = make_objective(_dummy_df(), strategy_cls, RSIConfig, space, prune_rsi)
+    resumed.remember(study.trials)
+    params = {"period": 14, "oversold": 30, "sl_pct": 1, "tp_pct": 3}
+    assert resumed(optuna.trial.FixedTrial(params)) == pytest.approx(
+        objective.scores[canonical_params(params)]
+    )
+    assert resumed.hits == 1 and len(calls) == 2
+
+
+def test_stepped_floats_share_a_key():
+    trial = optuna.trial.FixedTrial({"nstd": 2.3})
+    value = suggest(trial, ("float", 1.5, 3.0, 0.1), name="nstd")
+    assert canonical_params({"nstd": value}) == canonical_params({"nstd": 0.1 * 23})
+    assert canonical_params({"a": 1, "b": None}) == canonical_params(
+        {"b": None, "a": 1}
+    )
+
+
+@pytest.mark.parametrize("name", sorted(optimize.PARAM_SPACES))
+def test_unstepped_floats_have_a_key_resolution(name):
+    # Senza passo i float campionati non si ripetono: la memo li arrotonda
+    space = optimize.PARAM_SPACES[name]
+    for field in dataclasses.fields(space):
+        kind, *args = getattr(space, field.name)
+        if kind == "float" and len(args) == 2:
+            assert field.name in optimize.PARAM_RESOLUTION, f"{name}.{field.name}"
+
+
+def test_continuous_floats_share_a_key_at_their_resolution():
+    params = {"sma_fast": 10, "position_size": 0.1234, "trailing_stop_pct": 2.04}
+    nearby = {"sma_fast": 10, "position_size": 0.12, "trailing_stop_pct": 2.0}
+    assert canonical_params(params) == canonical_params(nearby)
+    assert config_key(params) != config_key(nearby)
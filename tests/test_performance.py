@@ -25,3 +25,30 @@ def test_max_drawdown_and_win_rate():
     dd = equity.div(equity.cummax()).sub(1) * 100
     assert pa.max_drawdown() == dd.min()
     assert pa.win_rate() == (3 / 5) * 100
+
+
+def test_analyzer_accepts_trade_ledger():
+    from trading_backtest.ledger import TradeLedger
+
+    ledger = TradeLedger.from_arrays(
+        [0, 2, 4], [1, 3, 5], [100.0, 100.0, 100.0], [110.0, 95.0, 115.0], [2, 1, 3]
+    )
+    frame = ledger.to_frame()
+    for pa in (PerformanceAnalyzer(ledger), PerformanceAnalyzer(frame)):
+        assert pa.trade_count() == 3
+        assert pa.total_return() == pytest.approx(20.0)
+        assert pa.win_rate() == pytest.approx(200 / 3)
+
+
+def test_trades_frame_with_net_pct():
+    from trading_backtest.ledger import TradeLedger
+
+    ledger = TradeLedger.from_arrays(
+        [0, 2], [1, 3], [100.0, 100.0], [110.0, 95.0], [2, 1]
+    )
+    trades = pd.DataFrame({"pct_change": [10.0, -5.0]})
+    for source in (ledger, trades):
+        pa = PerformanceAnalyzer(source, commission=0.1)
+        assert pa.trades["net_pct"].tolist() == pytest.approx([9.9, -5.1])
+    assert "net_pct" not in trades
+    assert PerformanceAnalyzer(pd.DataFrame()).trades.empty
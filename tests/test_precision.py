@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from trading_backtest import data
+from trading_backtest.cache import IndicatorCache
+from trading_backtest.data import add_indicator_cache
+from trading_backtest.optimize import evaluate_strategy
+from trading_backtest.strategy import get_strategy
+
+from .test_engine import CONFIGS, _random_walk_df
+
+PERIODS = dict(
+    sma=[5, 20, 50], rsi=[14], atr=[14], vol=[20], imp=[10], hmax=[20], bb=[20]
+)
+
+
+def _float32_df():
+    df = _random_walk_df()[["timestamp", "open", "high", "low", "close"]]
+    df = df.astype({c: np.float32 for c in ("open", "high", "low", "close")})
+    add_indicator_cache(df, **PERIODS)
+    return df
+
+
+def test_indicator_columns_follow_price_dtype():
+    df = _float32_df()
+    expected = _random_walk_df()
+    for col in df.columns[5:]:
+        assert df[col].dtype == np.float32, col
+        np.testing.assert_allclose(
+            df[col], expected[col], rtol=1e-5, atol=1e-4, equal_nan=True
+        )
+
+
+@pytest.mark.parametrize("engine_name", ["loop", "array", "event"])
+@pytest.mark.parametrize("name, cfg", CONFIGS[:-1])
+def test_float32_scores_close_to_float64(name, cfg, engine_name):
+    strategy_cls, _ = get_strategy(name)
+    make = lambda: strategy_cls(cfg)  # noqa: E731
+    expected = evaluate_strategy(
+        _random_walk_df(), make, with_sharpe=True, engine=engine_name
+    )
+    got = evaluate_strategy(_float32_df(), make, with_sharpe=True, engine=engine_name)
+    assert got == pytest.approx(expected, rel=1e-3, abs=1e-3)
+
+
+def test_cache_keeps_float32_columns_apart(tmp_path):
+    cache = IndicatorCache(tmp_path)
+    df = _float32_df()[["timestamp", "open", "high", "low", "close"]].copy()
+    data.add_indicator_cache(df, sma=[5], cache=cache)
+    (path,) = tmp_path.glob("*.npy")
+    assert path.name.endswith("-f32_sma_5.npy")
+    assert np.load(path).dtype == np.float32
+
+    warm = df[["timestamp", "open", "high", "low", "close"]].copy()
+    data.add_indicator_cache(warm, sma=[5], cache=cache)
+    assert warm["sma_5"].dtype == np.float32
+    np.testing.assert_array_equal(warm["sma_5"], df["sma_5"])
@@ -33,3 +33,26 @@ def test_random_forest_generate_trades_runs():
     strat = RandomForestStrategy(cfg)
     trades = strat.generate_trades(df)
     assert isinstance(trades, pd.DataFrame)
+
+
+def test_prepare_indicators_leaves_input_untouched():
+    df = _dummy_df()[["timestamp", "open", "high", "low", "close"]]
+    cfg = RandomForestConfig(sl_pct=1, tp_pct=2, n_estimators=10)
+    out = RandomForestStrategy(cfg).prepare_indicators(df)
+    assert "rf_prob" in out
+    assert list(df.columns) == ["timestamp", "open", "high", "low", "close"]
+
+
+def test_features_follow_the_frame_columns():
+    strat = RandomForestStrategy(RandomForestConfig(sl_pct=1, tp_pct=2))
+    df = _dummy_df()
+    assert list(strat._features(df).columns) == [
+        "sma_5",
+        "sma_10",
+        "rsi_14",
+        "atr_14",
+        "vol_20",
+        "impulse_5",
+    ]
+    base = df[["timestamp", "open", "high", "low", "close"]]
+    assert list(strat._features(base).columns) == ["ret_1"]
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+from trading_backtest.config import BreakoutConfig, StochasticConfig
+from trading_backtest.rangeindex import SparseTable, range_index
+from trading_backtest.strategy import BreakoutStrategy, StochasticStrategy
+
+from .test_engine import _random_walk_df
+
+
+def test_query_matches_pandas_rolling():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=300)
+    values[[5, 40]] = np.nan
+    table = SparseTable(values, "max")
+    for w in (1, 3, 16, 50):
+        hi = np.arange(w, len(values) + 1)
+        got = table.query(hi - w, hi)
+        expected = pd.Series(values).rolling(w, min_periods=1).max().to_numpy()[w - 1 :]
+        np.testing.assert_allclose(got, expected)
+
+
+def test_first_crossing_matches_scan():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=257)
+    low = SparseTable(values, "min")
+    high = SparseTable(values, "max")
+    for start in (0, 1, 100, 256, 257):
+        for thr in (-2.5, -1.0, 0.0, 1.0, 2.5):
+            below = np.flatnonzero(values[start:] <= thr)
+            above = np.flatnonzero(values[start:] >= thr)
+            exp_lo = start + below[0] if len(below) else len(values)
+            exp_hi = start + above[0] if len(above) else len(values)
+            assert low.first_crossing(start, thr) == exp_lo
+            assert high.first_crossing(start, thr) == exp_hi
+
+
+def test_range_index_is_cached_per_buffer():
+    values = np.arange(10, dtype=float)
+    assert range_index(values, "min") is range_index(values[:], "min")
+    assert range_index(values, "min") is not range_index(values.copy(), "min")
+
+
+def test_rolling_matches_pandas_for_any_window():
+    rng = np.random.default_rng(2)
+    values = rng.normal(size=400)
+    values[[3, 100, 101]] = np.nan
+    for op in ("min", "max"):
+        table = SparseTable(values, op)
+        short = SparseTable(values, op, max_width=64)
+        for w in (1, 2, 7, 20, 64, 400, 500):
+            roll = pd.Series(values).rolling(w)
+            expected = getattr(roll, op)().shift(1).to_numpy()
+            np.testing.assert_array_equal(table.rolling(w, shift=1), expected)
+            if w <= 64:
+                np.testing.assert_array_equal(short.rolling(w, shift=1), expected)
+        expected = getattr(pd.Series(values).rolling(20, min_periods=5), op)()
+        np.testing.assert_array_equal(table.rolling(20, min_periods=5), expected)
+
+
+def test_breakout_and_stochastic_use_range_index():
+    df = _random_walk_df()
+    cols = {c: df[c].to_numpy() for c in ("close", "high", "low", "atr_14")}
+    cfg = BreakoutConfig(lookback=35, atr_period=14, atr_mult=0.1, sl_pct=1, tp_pct=2)
+    h = df["close"].shift(1).rolling(35).max().to_numpy()
+    cols["hmax_35"] = h
+    with_col = BreakoutStrategy(cfg).signal_arrays(cols)
+    del cols["hmax_35"]
+    without = BreakoutStrategy(cfg).signal_arrays(cols)
+    for a, b in zip(with_col, without):
+        np.testing.assert_array_equal(a, b)
+
+    cfg = StochasticConfig(k_period=14, d_period=3, oversold=20, sl_pct=1, tp_pct=2)
+    frame = StochasticStrategy(cfg).prepare_indicators(df.copy())
+    low_n = df["low"].rolling(14).min().shift(1)
+    high_n = df["high"].rolling(14).max().shift(1)
+    expected = (df["close"] - low_n) / (high_n - low_n) * 100
+    np.testing.assert_allclose(frame["k"], expected, rtol=1e-12)
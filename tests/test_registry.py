@@ -0,0 +1,105 @@
+import numpy as np
+import pandas.testing as pdt
+import pytest
+
+from trading_backtest.data import add_indicator_cache
+from trading_backtest.optimize import evaluate_strategy, gather_all_indicator_periods
+from trading_backtest.registry import (
+    IndicatorPlan,
+    IndicatorSpec,
+    periods_from_specs,
+    specs_from_periods,
+)
+from trading_backtest.strategy import (
+    BreakoutStrategy,
+    SMACrossoverStrategy,
+    get_strategy,
+)
+
+from .test_engine import CONFIGS, _random_walk_df
+
+
+def test_spec_columns_round_trip():
+    for spec in specs_from_periods({"sma": [5], "imp": [10], "bb": [20], "atr": [3]}):
+        for col in spec.columns:
+            assert IndicatorSpec.from_column(col) == spec
+    assert IndicatorSpec.from_column("tr") == IndicatorSpec("atr", 1)
+    assert IndicatorSpec.from_column("close") is None
+    assert IndicatorSpec.from_column("sma_x") is None
+    with pytest.raises(ValueError):
+        IndicatorSpec("wma", 5)
+
+
+def test_plan_shares_intermediates_and_aliases_bbm():
+    plan = IndicatorPlan(specs_from_periods({"sma": [20], "bb": [20], "atr": [5, 14]}))
+    assert plan.nodes == ["close", "close_sums", "tr", "tr_sums"]
+    assert plan.aliases == {"bbm_20": "sma_20"}
+    assert plan.columns == ["sma_20", "tr", "atr_5", "atr_14", "bbm_20", "bbs_20"]
+
+    cols = plan.evaluate(_random_walk_df())
+    assert list(cols) == plan.columns
+    assert np.shares_memory(cols["sma_20"].to_numpy(), cols["bbm_20"].to_numpy())
+
+
+def test_threaded_evaluation_matches_serial():
+    df = _random_walk_df(2000)[["timestamp", "open", "high", "low", "close"]]
+    periods = {k: [5, 14, 20, 50] for k in ("sma", "rsi", "atr", "vol", "imp", "hmax")}
+    plan = IndicatorPlan(specs_from_periods({**periods, "bb": [20, 30]}))
+    assert plan.levels == [
+        ["close", "delta", "tr", "pct_sums"],
+        ["close_sums", "gain_sums", "loss_sums", "tr_sums", "close_max"],
+    ]
+    serial = plan.evaluate(df)
+    threaded = plan.evaluate(df, workers=4)
+    assert list(threaded) == list(serial)
+    for name, col in serial.items():
+        pdt.assert_series_equal(threaded[name], col)
+    assert np.shares_memory(
+        threaded["sma_20"].to_numpy(), threaded["bbm_20"].to_numpy()
+    )
+
+
+def test_strategies_declare_indicator_specs():
+    specs = SMACrossoverStrategy.indicator_specs(
+        {"sma_fast": [5, 10], "sma_slow": [10, 50], "sma_trend": [None]}
+    )
+    assert periods_from_specs(specs) == {"sma": [5, 10, 50]}
+    specs = BreakoutStrategy.indicator_specs({"lookback": [20], "atr_period": [14]})
+    assert periods_from_specs(specs) == {"atr": [14], "hmax": [20]}
+
+
+def test_gather_all_identifies_strategy_from_config_fields():
+    combos = [
+        {"period": 14, "oversold": 30, "sl_pct": 1, "tp_pct": 2},
+        {"period": 20, "nstd": 2.0, "sl_pct": 1, "tp_pct": 2},
+        {"k_period": 14, "d_period": 3, "oversold": 20},
+    ]
+    assert gather_all_indicator_periods(combos) == {
+        "rsi": [14],
+        "bb": [20],
+        "stoch": [14],
+    }
+    assert gather_all_indicator_periods({"period": 9}, strategy_name="rsi") == {
+        "rsi": [9]
+    }
+
+
+def test_cached_macd_and_stochastic_match_on_the_fly():
+    base = _random_walk_df()
+    cached = base.copy()
+    add_indicator_cache(cached, ema=[12, 26], stoch=[14])
+    assert IndicatorPlan(specs_from_periods({"ema": [12, 26]})).nodes == [
+        "close",
+        "close_emas",
+    ]
+    expected = cached["close"].ewm(span=12, adjust=False).mean().shift(1)
+    pdt.assert_series_equal(cached["ema_12"], expected, check_names=False)
+    for name in ("macd", "stochastic"):
+        cfg = dict(CONFIGS)[name]
+        strategy_cls, _ = get_strategy(name)
+        assert set(strategy_cls(cfg).input_columns()) <= set(cached)
+        make = lambda: strategy_cls(cfg)  # noqa: E731
+        for engine in ("loop", "array"):
+            got = evaluate_strategy(cached, make, with_sharpe=True, engine=engine)
+            ref = evaluate_strategy(base, make, with_sharpe=True, engine=engine)
+            assert got == pytest.approx(ref)
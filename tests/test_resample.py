@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from trading_backtest import data
+from trading_backtest.data import load_price_data
+from trading_backtest.resample import (
+    base_step,
+    parse_timeframe,
+    pyramid,
+    resample_ohlcv,
+)
+from trading_backtest.store import read_meta, store_path
+
+from .test_store import OHLCV, _write_csv
+
+
+def _bars(n: int = 2000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    ts = pd.date_range("2021-01-01 00:15", periods=n, freq="15min")
+    df = pd.DataFrame(
+        {
+            "timestamp": ts,
+            "open": close * (1 + rng.normal(0, 1e-3, n)),
+            "high": close * 1.002,
+            "low": close * 0.998,
+            "close": close,
+            "volume": rng.random(n),
+        }
+    )
+    # un buco nei dati: gli intervalli vuoti non producono barre
+    return df.drop(index=range(300, 420)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("timeframe", ["1h", "4h", "1d"])
+def test_resample_matches_pandas(timeframe):
+    df = _bars()
+    agg = {"open": "first", "high": "max", "low": "min", "close": "last"}
+    expected = (
+        df.resample(parse_timeframe(timeframe), on="timestamp")
+        .agg({**agg, "volume": "sum"})
+        .dropna(subset=["close"])
+        .reset_index()
+    )
+    expected["timestamp"] = expected["timestamp"].astype("datetime64[ns]")
+    pdt.assert_frame_equal(resample_ohlcv(df, timeframe), expected)
+
+
+def test_pyramid_builds_each_level_from_a_finer_one():
+    step = base_step(_bars()["timestamp"].to_numpy())
+    assert step == pd.Timedelta("15min")
+    assert pyramid(step, "4h") == ["30m", "1h", "2h", "4h"]
+    assert pyramid(step, "1d") == ["30m", "1h", "2h", "4h", "12h", "1d"]
+    assert pyramid(step, "15m") == []
+    with pytest.raises(ValueError):
+        pyramid(step, "10m")
+    with pytest.raises(ValueError):
+        parse_timeframe("4x")
+
+    df = _bars()
+    chained = df
+    for level in pyramid(step, "1d"):
+        chained = resample_ohlcv(chained, level)
+    pdt.assert_frame_equal(chained, resample_ohlcv(df, "1d"))
+
+
+def test_timeframe_levels_are_cached(tmp_path, monkeypatch):
+    csv = _write_csv(tmp_path / "prices.csv", n=400)
+    base = load_price_data(csv, use_store=False)[OHLCV]
+    got = load_price_data(csv, timeframe="1h")
+    pdt.assert_frame_equal(got, resample_ohlcv(base, "1h"))
+    assert read_meta(store_path(csv, "1h"))["timeframe"] == "1h"
+    assert store_path(csv, "1h") == tmp_path / "prices.1h.store"
+
+    def no_source(*args, **kwargs):
+        raise AssertionError("source bars loaded")
+
+    with monkeypatch.context() as m:
+        m.setattr(data, "_read_price_csv", no_source)
+        pdt.assert_frame_equal(load_price_data(csv, timeframe="1h"), got)
+        # 2h è costruito dal livello 1h già in cache
+        expected = resample_ohlcv(base, "2h")
+        pdt.assert_frame_equal(load_price_data(csv, timeframe="2h"), expected)
+        ranged = load_price_data(csv, timeframe="2h", start="2021-01-02", warmup=2)
+        assert ranged.attrs["warmup"] == 2
+        assert ranged["timestamp"].iloc[2] == pd.Timestamp("2021-01-02")
+
+    # CSV più recente: i livelli vengono ricostruiti
+    later = os.stat(store_path(csv, "1h") / "meta.json").st_mtime_ns + 10**9
+    _write_csv(csv, n=400, seed=1)
+    os.utime(csv, ns=(later, later))
+    fresh = load_price_data(csv, use_store=False)[OHLCV]
+    pdt.assert_frame_equal(
+        load_price_data(csv, timeframe="1h"), resample_ohlcv(fresh, "1h")
+    )
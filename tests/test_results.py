@@ -0,0 +1,191 @@
+import dataclasses
+import gc
+import pickle
+
+import numpy as np
+import pandas.testing as pdt
+import pytest
+
+from trading_backtest import optimize
+from trading_backtest.__main__ import main
+from trading_backtest.config import RSIConfig
+from trading_backtest.optimize import evaluate_strategy, grid_search
+from trading_backtest.results import ResultStore, config_key
+from trading_backtest.strategy import RSIStrategy, get_strategy
+
+from .test_engine import CONFIGS, _random_walk_df
+
+GRID = [
+    {"period": 14, "oversold": oversold, "sl_pct": sl, "tp_pct": 10}
+    for oversold in (25, 30, 35)
+    for sl in (2, 5)
+]
+
+
+def _no_simulation(*args, **kwargs):
+    raise AssertionError("backtest ricalcolato")
+
+
+@pytest.mark.parametrize("name,cfg", CONFIGS[:-1])
+def test_evaluate_strategy_reuses_stored_results(tmp_path, monkeypatch, name, cfg):
+    df = _random_walk_df()
+    store = ResultStore(tmp_path / "results.db")
+    strategy_cls, _ = get_strategy(name)
+    make = lambda: strategy_cls(cfg)  # noqa: E731
+    expected = evaluate_strategy(df, make, with_sharpe=True)
+    assert evaluate_strategy(df, make, with_sharpe=True, results=store) == (
+        pytest.approx(expected, nan_ok=True)
+    )
+
+    monkeypatch.setattr(optimize, "_analyze", _no_simulation)
+    assert evaluate_strategy(df, make, with_sharpe=True, results=store) == (
+        pytest.approx(expected, nan_ok=True)
+    )
+    score = evaluate_strategy(df, make, results=store)
+    monkeypatch.undo()
+    assert score == pytest.approx(evaluate_strategy(df, make))
+
+
+def test_results_are_keyed_by_data_costs_and_engine(tmp_path, monkeypatch):
+    df = _random_walk_df()
+    store = ResultStore(tmp_path / "results.db")
+    make = lambda: RSIStrategy(RSIConfig(14, 30, 2, 10))  # noqa: E731
+    evaluate_strategy(df, make, results=store)
+    monkeypatch.setattr(optimize, "_analyze", _no_simulation)
+    with pytest.raises(AssertionError):
+        evaluate_strategy(_random_walk_df(seed=1), make, results=store)
+    with pytest.raises(AssertionError):
+        evaluate_strategy(df, make, engine="event", results=store)
+    monkeypatch.setattr(optimize, "COMMISSION", 0.2)
+    with pytest.raises(AssertionError):
+        evaluate_strategy(df, make, results=store)
+
+    # Float che differiscono solo per rumore numerico: stessa configurazione
+    cfg = RSIConfig(14, 30, 0.1 + 0.2, 10)
+    assert config_key(cfg) == config_key(dataclasses.replace(cfg, sl_pct=0.3))
+
+
+def test_data_key_is_not_reused_by_other_prices(tmp_path):
+    store = ResultStore(tmp_path / "results.db")
+    df = _random_walk_df()
+    key = store.data_key(df)
+    assert store.data_key(df.copy()) == key
+    assert store.data_key(df.assign(close=df["close"] + 1)) != key
+    # Prezzi liberati: nessuna impronta resta legata al loro id o indirizzo
+    del df
+    gc.collect()
+    assert store.data_key(_random_walk_df(seed=1)) != key
+
+
+def test_key_includes_the_columns_the_strategy_reads(tmp_path):
+    df = _random_walk_df()
+    store = ResultStore(tmp_path / "results.db")
+    extra = df.assign(sma_7=df["close"])
+    rf_cls, rf_cfg = get_strategy("random_forest")[0], CONFIGS[-1][1]
+    # Su un DataFrame il modello usa tutti gli indicatori presenti
+    rf = rf_cls(rf_cfg)
+    assert store.key(df, rf, "array", 0.1, 0.05) != store.key(
+        extra, rf, "array", 0.1, 0.05
+    )
+
+    # Contano contenuto e dtype delle colonne lette, non solo il nome
+    rsi = RSIStrategy(RSIConfig(14, 30, 2, 10))
+    key = store.key(df, rsi, "array", 0.1, 0.05)
+    assert key == store.key(extra, rsi, "array", 0.1, 0.05)
+    shifted = df.assign(rsi_14=df["rsi_14"] + 1)
+    assert key != store.key(shifted, rsi, "array", 0.1, 0.05)
+    narrow = df.astype({"rsi_14": "float32"})
+    assert key != store.key(narrow, rsi, "array", 0.1, 0.05)
+
+    # Strategie sull'intero frame: contano tutte le colonne
+    class WholeFrameRSI(RSIStrategy):
+        def input_columns(self):
+            return None
+
+    whole = WholeFrameRSI(RSIConfig(14, 30, 2, 10))
+    assert store.key(df, whole, "array", 0.1, 0.05) != store.key(
+        extra, whole, "array", 0.1, 0.05
+    )
+
+
+def test_grid_search_simulates_only_missing_combos(tmp_path, monkeypatch):
+    df = _random_walk_df()
+    store = ResultStore(tmp_path / "results.db")
+    expected = grid_search(df, GRID, "rsi")
+    partial = grid_search(df, GRID[:3], "rsi", results=store)
+    pdt.assert_frame_equal(partial, expected[expected.index < 3])
+
+    calls = []
+    simulate = optimize.simulate_batch
+
+    def counting(arrays, entries, *args):
+        calls.append(len(entries))
+        return simulate(arrays, entries, *args)
+
+    monkeypatch.setattr(optimize, "simulate_batch", counting)
+    pdt.assert_frame_equal(grid_search(df, GRID, "rsi", results=store), expected)
+    assert calls == [len(GRID) - 3]
+
+    monkeypatch.setattr(optimize, "simulate_batch", _no_simulation)
+    pdt.assert_frame_equal(grid_search(df, GRID, "rsi", results=store), expected)
+    # Stessi risultati dalla valutazione singola
+    for params in GRID:
+        make = lambda: RSIStrategy(RSIConfig(**params))  # noqa: E731
+        assert evaluate_strategy(df, make, results=store) == pytest.approx(
+            expected.loc[GRID.index(params), "total_return"]
+        )
+
+
+def test_trade_ledgers_and_top_results(tmp_path, capsys):
+    df = _random_walk_df()
+    db = tmp_path / "results.db"
+    store = ResultStore(db, trades=True)
+    ranked = grid_search(df, GRID, "rsi", results=store)
+
+    strat = RSIStrategy(RSIConfig(**GRID[0]))
+    key = store.key(df, strat, "array", 0.1, 0.05)
+    ledger = store.ledger(key)
+    expected = strat.simulate(df)
+    for field in dataclasses.fields(expected):
+        np.testing.assert_array_equal(
+            getattr(ledger, field.name), getattr(expected, field.name)
+        )
+
+    top = pickle.loads(pickle.dumps(store)).top("RSIStrategy", limit=3)
+    assert len(top) == 3
+    assert top["total_return"].is_monotonic_decreasing
+    assert top["total_return"].tolist() == pytest.approx(
+        ranked["total_return"].head(3).tolist()
+    )
+    assert set(GRID[0]) <= set(top.columns)
+    assert store.top("RSIStrategy", data="0" * 12).empty
+    with pytest.raises(ValueError):
+        store.top(by="score")
+
+    main(argv=["results", "--db", str(db), "--strategy", "rsi", "--top", "2"])
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert len(lines) == 3 and "RSIStrategy" in lines[1]
+
+
+def test_grid_ledgers_keep_the_position_size(tmp_path):
+    df = _random_walk_df()
+    store = ResultStore(tmp_path / "results.db", trades=True)
+    params = {
+        "sma_fast": 5,
+        "sma_slow": 20,
+        "sma_trend": None,
+        "sl_pct": 2,
+        "tp_pct": 3,
+        "position_size": 0.05,
+        "trailing_stop_pct": 1.0,
+    }
+    grid_search(df, [params], "sma", results=store)
+    strategy_cls, config_cls = get_strategy("sma")
+    strat = strategy_cls(config_cls(**params))
+    ledger = store.ledger(store.key(df, strat, "array", 0.1, 0.05))
+    expected = strat.simulate(df)
+    assert len(ledger) and np.all(ledger.qty == 0.05)
+    for field in dataclasses.fields(expected):
+        np.testing.assert_array_equal(
+            getattr(ledger, field.name), getattr(expected, field.name)
+        )
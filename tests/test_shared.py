@@ -0,0 +1,62 @@
+import numpy as np
+import optuna
+import pandas.testing as pdt
+import pytest
+
+from trading_backtest import shared
+from trading_backtest.data import add_indicator_cache
+from trading_backtest.lazy import LazyIndicatorFrame
+from trading_backtest.optimize import (
+    PARAM_SPACES,
+    evaluate_strategy,
+    gather_indicator_periods,
+    optimize_with_optuna,
+    prune_rsi,
+)
+from trading_backtest.shared import SharedFrame, attach
+from trading_backtest.strategy import get_strategy
+
+from .test_engine import _random_walk_df
+
+
+def test_shared_frame_attaches_without_copying():
+    df = _random_walk_df()
+    with SharedFrame(df) as frame:
+        try:
+            got = attach(frame.handle)
+            pdt.assert_frame_equal(got, df)
+            assert attach(frame.handle) is got
+            values = got["close"].to_numpy()
+            assert not values.flags.writeable
+            assert values.ctypes.data % 64 == 0
+        finally:
+            shm, _ = shared._ATTACHED.pop(frame.handle.name)
+            del got, values
+            shm.close()
+    with pytest.raises(TypeError):
+        SharedFrame(df.assign(label="x"))
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_parallel_trials_share_one_study(lazy):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    strategy_cls, config_cls = get_strategy("rsi")
+    df = _random_walk_df(800)
+    if lazy:
+        df = LazyIndicatorFrame(df[["timestamp", "open", "high", "low", "close"]])
+    else:
+        add_indicator_cache(df, **gather_indicator_periods("rsi"))
+    trial = optimize_with_optuna(
+        df,
+        strategy_cls,
+        config_cls,
+        PARAM_SPACES["rsi"],
+        prune_logic=prune_rsi,
+        n_trials=9,
+        workers=2,
+    )
+    assert trial.value == pytest.approx(
+        evaluate_strategy(df, lambda: strategy_cls(config_cls(**trial.params)))
+    )
+    assert 0 <= trial.number < 9
+    assert np.isfinite(trial.value)
@@ -0,0 +1,171 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from trading_backtest import data
+from trading_backtest.__main__ import main
+from trading_backtest.cache import fingerprint
+from trading_backtest.data import convert_price_data, load_price_data
+from trading_backtest.engine import PriceArrays
+from trading_backtest.lazy import LazyIndicatorFrame
+from trading_backtest.store import read_meta, read_store, store_path
+
+OHLCV = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def _write_csv(path, n: int = 200, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    ts = pd.date_range("2021-01-01", periods=n, freq="15min")
+    frame = pd.DataFrame(
+        {
+            "Open time": ts.strftime("%Y-%m-%d %H:%M:%S"),
+            "Open": close,
+            "High": close * 1.001,
+            "Low": close * 0.999,
+            "Close": close,
+            "Volume": rng.random(n),
+            "Ignore": 0,
+        }
+    )
+    # righe fuori ordine e una riga non valida, come nei CSV reali
+    frame = pd.concat([frame.iloc[::-1], frame.iloc[:1].assign(Close="x")])
+    frame.to_csv(path, index=False)
+    return path
+
+
+def test_convert_round_trips_csv(tmp_path):
+    csv = _write_csv(tmp_path / "prices.csv")
+    path = convert_price_data(csv)
+    assert path == store_path(csv) == tmp_path / "prices.store"
+    assert read_meta(path)["rows"] == 200
+    expected = load_price_data(csv, use_store=False)[OHLCV]
+    pdt.assert_frame_equal(read_store(path), expected)
+
+
+def test_load_prefers_fresh_store(tmp_path, monkeypatch):
+    csv = _write_csv(tmp_path / "prices.csv")
+    main(argv=["convert", str(csv)])
+    expected = load_price_data(csv, use_store=False)[OHLCV]
+
+    def no_csv(*args, **kwargs):
+        raise AssertionError("CSV parsed")
+
+    with monkeypatch.context() as m:
+        m.setattr(data.pd, "read_csv", no_csv)
+        pdt.assert_frame_equal(load_price_data(csv), expected)
+        assert load_price_data(csv, dtype="float32")["close"].dtype == np.float32
+
+    # CSV modificato dopo la conversione: l'archivio non è più valido
+    meta_mtime = (store_path(csv) / "meta.json").stat().st_mtime_ns
+    os.utime(csv, ns=(meta_mtime + 10**9, meta_mtime + 10**9))
+    monkeypatch.setattr(data, "read_store", no_csv)
+    pdt.assert_frame_equal(load_price_data(csv), expected)
+
+
+def test_convert_to_explicit_directory(tmp_path):
+    csv = _write_csv(tmp_path / "prices.csv")
+    out = tmp_path / "elsewhere"
+    main(argv=["convert", str(csv), "--out", str(out)])
+    assert read_meta(out) is not None
+    assert not store_path(csv).exists()
+    with pytest.raises(FileNotFoundError):
+        read_store(tmp_path / "missing")
+
+
+def test_mmap_columns_flow_through_pipeline_without_copies(tmp_path):
+    csv = _write_csv(tmp_path / "prices.csv", n=400)
+    df = load_price_data(csv, mmap=True)  # converte al primo uso
+    assert read_meta(store_path(csv)) is not None
+    close = df["close"].to_numpy()
+    assert not close.flags.writeable
+    on_disk = np.load(store_path(csv) / "close.npy", mmap_mode="r")
+    np.testing.assert_array_equal(close, on_disk)
+
+    assert np.shares_memory(PriceArrays.from_frame(df).close, close)
+    assert fingerprint(df) == fingerprint(load_price_data(csv, use_store=False))
+
+    eager = load_price_data(csv, use_store=False)[OHLCV]
+    periods = dict(sma=[5, 20], rsi=[14], bb=[20])
+    data.add_indicator_cache(df, **periods)
+    data.add_indicator_cache(eager, **periods)
+    assert np.shares_memory(df["close"].to_numpy(), close)
+    pdt.assert_frame_equal(df, eager)
+
+
+def _write_sorted_csv(path, n: int = 3000):
+    _write_csv(path, n=n)
+    frame = pd.read_csv(path).iloc[:-1].iloc[::-1]
+    frame.iloc[n // 6, frame.columns.get_loc("Close")] = "x"  # riga non valida
+    frame.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("source", ["csv", "store", "mmap"])
+def test_range_and_columns_pushdown(tmp_path, source, monkeypatch):
+    csv = _write_sorted_csv(tmp_path / "prices.csv")
+    full = load_price_data(csv, use_store=False)
+    if source != "csv":
+        convert_price_data(csv)
+    start, end = full["timestamp"][1000], full["timestamp"][2000]
+
+    if source == "csv":
+        # Solo l'intervallo richiesto viene passato al parser
+        read_csv = pd.read_csv
+
+        def counting(buf, **kwargs):
+            assert buf.getvalue().count(b"\n") < 1200
+            return read_csv(buf, **kwargs)
+
+        monkeypatch.setattr(data.pd, "read_csv", counting)
+    df = load_price_data(
+        csv,
+        start=str(start),
+        end=end,
+        columns=["close", "high"],
+        warmup=100,
+        mmap=source == "mmap",
+    )
+    assert df.attrs["warmup"] == 100
+    assert list(df.columns[-3:]) == ["timestamp", "high", "close"]
+    expected = full.iloc[900:2000].reset_index(drop=True)
+    pdt.assert_frame_equal(
+        df[["timestamp", "high", "close"]], expected[df.columns[-3:]]
+    )
+
+    trimmed = data.trim_warmup(df)
+    assert trimmed["timestamp"].iloc[0] == start
+    assert len(trimmed) == 1000 and trimmed.attrs["warmup"] == 0
+    assert trimmed.index.equals(pd.RangeIndex(1000)) and df.attrs["warmup"] == 100
+    # Vista sulle colonne caricate, anche in memory-map: nessuna copia
+    assert np.shares_memory(trimmed["close"].to_numpy(), df["close"].to_numpy())
+
+
+def test_range_near_file_edges(tmp_path):
+    csv = _write_sorted_csv(tmp_path / "prices.csv", n=300)
+    full = load_price_data(csv, use_store=False)
+    df = load_price_data(csv, start=full["timestamp"][10], warmup=50)
+    assert df.attrs["warmup"] == 10 and len(df) == len(full)
+    df = load_price_data(csv, end="2000-01-01")
+    assert df.empty
+    # CSV non ordinato: si legge tutto e si filtra
+    unsorted = _write_csv(tmp_path / "unsorted.csv", n=300)
+    df = load_price_data(unsorted, start=full["timestamp"][100], warmup=5)
+    pdt.assert_frame_equal(
+        df[OHLCV], full.iloc[95:][OHLCV].reset_index(drop=True), check_dtype=False
+    )
+
+
+def test_lazy_frame_hides_warmup_bars(tmp_path):
+    csv = _write_sorted_csv(tmp_path / "prices.csv", n=600)
+    full = load_price_data(csv, use_store=False)
+    df = load_price_data(csv, start=full["timestamp"][200], warmup=60)
+    lazy = LazyIndicatorFrame(df)
+    data.add_indicator_cache(full, sma=[50])
+    assert len(lazy) == len(full) - 200
+    np.testing.assert_allclose(lazy["sma_50"], full["sma_50"][200:], rtol=1e-12)
+    np.testing.assert_array_equal(lazy["close"], full["close"][200:])
+    assert lazy.copy()["timestamp"].iloc[0] == full["timestamp"][200]
@@ -0,0 +1,227 @@
+import dataclasses
+import subprocess
+import sys
+import time
+
+import optuna
+import pytest
+
+from trading_backtest.__main__ import main
+from trading_backtest.data import add_indicator_cache
+from trading_backtest.optimize import (
+    PARAM_SPACES,
+    evaluate_strategy,
+    gather_indicator_periods,
+    open_storage,
+    optimize_with_optuna,
+    prune_rsi,
+)
+from trading_backtest.results import ResultStore
+from trading_backtest.strategy import get_strategy
+from trading_backtest.study import (
+    create_shared_study,
+    load_study_prices,
+    persistent_study_name,
+    run_worker,
+    space_version,
+    study_key,
+    wait_for_study,
+    warm_start,
+)
+
+from .test_engine import _random_walk_df
+from .test_store import _write_csv
+
+
+@pytest.fixture(params=["journal", "sqlite"])
+def storage(request, tmp_path):
+    if request.param == "journal":
+        return f"journal:{tmp_path / 'studies.log'}"
+    return f"sqlite:///{tmp_path / 'studies.db'}"
+
+
+def test_workers_share_the_trial_budget(tmp_path, storage):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    csv = _write_csv(tmp_path / "prices.csv", n=400)
+    main(
+        argv=[
+            "coordinator",
+            "--study",
+            "rsi-test",
+            "--storage",
+            storage,
+            "--strategy",
+            "rsi",
+            "--trials",
+            "6",
+            "--data",
+            str(csv),
+        ]
+    )
+    study = run_worker("rsi-test", storage)
+    assert len(study.trials) == 6
+    # Studio completo: un altro worker non aggiunge trial
+    assert len(run_worker("rsi-test", storage).trials) == 6
+
+    best = wait_for_study(study, poll=0)
+    strategy_cls, config_cls = get_strategy("rsi")
+    df = load_study_prices(csv, "rsi")
+    add_indicator_cache(df, **gather_indicator_periods("rsi"))
+    assert best.value == pytest.approx(
+        evaluate_strategy(df, lambda: strategy_cls(config_cls(**best.params)))
+    )
+
+
+def test_worker_rejects_other_data_or_strategy(tmp_path, storage):
+    csv = _write_csv(tmp_path / "prices.csv", n=400)
+    create_shared_study("s", storage, "rsi", 4, data_file=csv)
+    with pytest.raises(ValueError):
+        create_shared_study("s", storage, "macd", 4, data_file=csv)
+    other = _write_csv(tmp_path / "other.csv", n=400, seed=1)
+    with pytest.raises(ValueError):
+        run_worker("s", storage, data_file=other)
+    assert not optuna.load_study(study_name="s", storage=open_storage(storage)).trials
+
+
+def test_worker_stores_results(tmp_path):
+    csv = _write_csv(tmp_path / "prices.csv", n=400)
+    storage = f"journal:{tmp_path / 'studies.log'}"
+    create_shared_study("s", storage, "rsi", 4, data_file=csv)
+    results = ResultStore(tmp_path / "results.db")
+    study = run_worker("s", storage, results=results)
+    top = results.top("RSIStrategy")
+    assert not top.empty
+    assert top["total_return"].max() == pytest.approx(study.best_value)
+
+
+def test_worker_command_runs_in_another_process(tmp_path):
+    csv = _write_csv(tmp_path / "prices.csv", n=400)
+    storage = f"journal:{tmp_path / 'studies.log'}"
+    create_shared_study("cli", storage, "rsi", 3, data_file=csv)
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "trading_backtest",
+            "worker",
+            "--study",
+            "cli",
+            "--storage",
+            storage,
+        ],
+        check=True,
+        cwd=tmp_path,
+        env={"PYTHONPATH": str(sys.path[0]), "PATH": ""},
+    )
+    study = optuna.load_study(study_name="cli", storage=open_storage(storage))
+    assert len(study.trials) == 3
+
+
+def test_optimize_with_optuna_appends_to_a_stored_study(tmp_path):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    storage = f"sqlite:///{tmp_path / 'studies.db'}"
+    strategy_cls, config_cls = get_strategy("rsi")
+    df = _random_walk_df(400)
+    add_indicator_cache(df, **gather_indicator_periods("rsi"))
+    for _ in range(2):
+        optimize_with_optuna(
+            df,
+            strategy_cls,
+            config_cls,
+            PARAM_SPACES["rsi"],
+            prune_logic=prune_rsi,
+            n_trials=3,
+            storage=storage,
+            study_name="rsi",
+        )
+    study = optuna.load_study(study_name="rsi", storage=open_storage(storage))
+    assert len(study.trials) == 6
+
+
+def test_resume_runs_only_the_missing_trials(tmp_path, monkeypatch):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    csv = _write_csv(tmp_path / "prices.csv", n=400)
+    storage = f"journal:{tmp_path / 'studies.log'}"
+    monkeypatch.setattr("trading_backtest.__main__.DATA_FILE", csv)
+    monkeypatch.chdir(tmp_path)
+    argv = ["--strategy", "rsi", "--resume", "--storage", storage, "--trials"]
+    main(argv=[*argv, "3"])
+    (name,) = optuna.get_all_study_names(open_storage(storage))
+    key = study_key("rsi", load_study_prices(csv, "rsi"), PARAM_SPACES["rsi"])
+    assert name.startswith(f"{key}-")
+    main(argv=[*argv, "5"])
+    main(argv=[*argv, "5"])
+    assert optuna.get_all_study_names(open_storage(storage)) == [name]
+    study = optuna.load_study(study_name=name, storage=open_storage(storage))
+    assert len(study.trials) == 5
+
+    assert persistent_study_name(storage, key, resume=True) == name
+    assert persistent_study_name(storage, key) != name
+    narrower = dataclasses.replace(PARAM_SPACES["rsi"], period=("int", 7, 14, 1))
+    assert space_version(narrower) != space_version(PARAM_SPACES["rsi"])
+
+
+def test_warm_start_enqueues_best_configs_of_previous_study(tmp_path):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    storage = f"sqlite:///{tmp_path / 'studies.db'}"
+    space = PARAM_SPACES["rsi"]
+    old = _random_walk_df(400, seed=1)
+    new = _random_walk_df(400, seed=2)
+    strategy_cls, config_cls = get_strategy("rsi")
+    names = []
+    for df, created in ((old, "20260101000000000000"), (new, "20260201000000000000")):
+        add_indicator_cache(df, **gather_indicator_periods("rsi"))
+        names.append(f"{study_key('rsi', df, space)}-{created}")
+    optimize_with_optuna(
+        old,
+        strategy_cls,
+        config_cls,
+        space,
+        prune_logic=prune_rsi,
+        n_trials=8,
+        storage=storage,
+        study_name=names[0],
+    )
+    previous = optuna.load_study(study_name=names[0], storage=open_storage(storage))
+    completed = [t for t in previous.trials if t.value is not None]
+    top = sorted(completed, key=lambda t: t.value, reverse=True)[:2]
+
+    assert warm_start(names[1], storage, space, top_k=2) == len(top)
+    assert warm_start(names[1], storage, space, source=names[0], top_k=2) == len(top)
+    optimize_with_optuna(
+        new,
+        strategy_cls,
+        config_cls,
+        space,
+        prune_logic=prune_rsi,
+        n_trials=3,
+        storage=storage,
+        study_name=names[1],
+    )
+    study = optuna.load_study(study_name=names[1], storage=open_storage(storage))
+    assert [t.params for t in study.trials[: len(top)]] == [t.params for t in top]
+    assert len(study.trials) == 3
+
+
+def test_trials_of_killed_workers_are_run_again(tmp_path, storage, monkeypatch):
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+    monkeypatch.setattr("trading_backtest.optimize.STUDY_HEARTBEAT", 1)
+    csv = _write_csv(tmp_path / "prices.csv", n=400)
+    create_shared_study("s", storage, "rsi", 3, data_file=csv)
+    # Trial iniziato da un worker terminato prima di finirlo
+    study = optuna.load_study(study_name="s", storage=open_storage(storage))
+    stale = study.ask()
+    if storage.startswith("journal:"):
+        run_worker("s", storage)
+        with pytest.raises(TimeoutError):
+            wait_for_study(study, poll=0, timeout=0)
+        return
+
+    study._storage.record_heartbeat(stale._trial_id)
+    # Oltre il grace period (2 heartbeat), timestamp del database al secondo
+    time.sleep(3.5)
+    study = run_worker("s", storage)
+    states = [t.state for t in study.trials]
+    assert states[0] == optuna.trial.TrialState.FAIL
+    assert len(states) == 4 and optuna.trial.TrialState.RUNNING not in states
+    assert wait_for_study(study, poll=0, timeout=0).state.is_finished()
@@ -1,12 +1,18 @@
 from __future__ import annotations
 import os
+import sys
 import argparse
+from pathlib import Path
 import pandas as pd
 
 from .config import (
     RESULTS_FILE,
     SUMMARY_FILE,
     DATA_FILE,
+    INDICATOR_CACHE_DIR,
+    INDICATOR_CACHE_MB,
+    RESULTS_DB,
+    STUDY_STORAGE,
     log,
     SMAConfig,
     RSIConfig,
@@ -16,7 +22,14 @@ from .config import (
     VolExpansionConfig,
     RandomForestConfig,
 )
-from .data import load_price_data, add_indicator_cache
+from .cache import IndicatorCache
+from .data import (
+    load_price_data,
+    convert_price_data,
+    trim_warmup,
+    with_indicators,
+)
+from .lazy import LazyIndicatorFrame
 from .utils.io_utils import save_csv
 from .optimize import (
     optimize_with_optuna,
@@ -31,10 +44,20 @@ from .optimize import (
     prune_random_forest,
     refined_grid,
     grid_search,
-    ensure_indicator_cache,
+    gather_all_indicator_periods,
 )
 from .performance import PerformanceAnalyzer
 from .benchmark import benchmark_strategies
+from .results import METRICS, ResultStore
+from .study import (
+    create_shared_study,
+    persistent_study_name,
+    run_worker,
+    study_key,
+    study_summary,
+    wait_for_study,
+    warm_start,
+)
 
 from .strategy.sma import SMACrossoverStrategy
 from .strategy.rsi import RSIStrategy
@@ -90,7 +113,173 @@ STRATEGY_REGISTRY = {
 }
 
 
-def main(with_ml: bool = False) -> None:
+def convert_main(argv: list[str]) -> None:
+    """``convert``: write the columnar price store for a CSV file."""
+    parser = argparse.ArgumentParser(
+        prog="trading_backtest convert",
+        description="Convert the price CSV into the columnar binary store",
+    )
+    parser.add_argument(
+        "data_file",
+        nargs="?",
+        type=Path,
+        default=DATA_FILE,
+        help="CSV to convert (default: DATA_FILE)",
+    )
+    parser.add_argument(
+        "--out",
+        type=Path,
+        help="Store directory (default: next to the CSV with suffix .store)",
+    )
+    args = parser.parse_args(argv)
+    convert_price_data(args.data_file, args.out)
+
+
+def coordinator_main(argv: list[str]) -> None:
+    """``coordinator``: create a shared study for ``worker`` processes."""
+    parser = argparse.ArgumentParser(
+        prog="trading_backtest coordinator",
+        description="Create an Optuna study on shared storage for remote workers",
+    )
+    parser.add_argument("--study", required=True, help="Study name")
+    parser.add_argument(
+        "--storage",
+        default=STUDY_STORAGE,
+        help="Database URL (sqlite:///studies.db) or journal file "
+        "(journal:/shared/studies.log) reachable by every worker (env STUDY_STORAGE)",
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=list(PARAM_SPACES),
+        default=os.getenv("STRATEGY", "sma"),
+        help="Strategy to optimize (env STRATEGY)",
+    )
+    parser.add_argument(
+        "--trials",
+        type=int,
+        default=int(os.getenv("TRIALS", 50)),
+        help="Total Optuna trials across all workers (env TRIALS)",
+    )
+    parser.add_argument(
+        "--data", type=Path, default=DATA_FILE, help="Price CSV (default: DATA_FILE)"
+    )
+    parser.add_argument("--start", default=os.getenv("START"), help="(env START)")
+    parser.add_argument("--end", default=os.getenv("END"), help="(env END)")
+    parser.add_argument(
+        "--timeframe", default=os.getenv("TIMEFRAME"), help="(env TIMEFRAME)"
+    )
+    parser.add_argument(
+        "--float32",
+        action="store_true",
+        default=os.getenv("FLOAT32", "0") == "1",
+        help="(env FLOAT32=1)",
+    )
+    parser.add_argument(
+        "--wait",
+        action="store_true",
+        help="Wait until the workers have run every trial and log the best one",
+    )
+    parser.add_argument(
+        "--wait-timeout",
+        type=float,
+        help="Give up waiting after this many seconds (trials of killed "
+        "workers stay running on journal storages)",
+    )
+    args = parser.parse_args(argv)
+    study = create_shared_study(
+        args.study,
+        args.storage,
+        args.strategy,
+        args.trials,
+        data_file=args.data,
+        start=args.start,
+        end=args.end,
+        timeframe=args.timeframe,
+        float32=args.float32,
+    )
+    log.info("Stato studio: %s", study_summary(study))
+    if args.wait:
+        wait_for_study(study, timeout=args.wait_timeout)
+
+
+def worker_main(argv: list[str]) -> None:
+    """``worker``: run trials of a study created by ``coordinator``."""
+    parser = argparse.ArgumentParser(
+        prog="trading_backtest worker",
+        description="Pull trials from a shared Optuna study until it is complete",
+    )
+    parser.add_argument("--study", required=True, help="Study name")
+    parser.add_argument(
+        "--storage",
+        default=STUDY_STORAGE,
+        help="Storage URL given to the coordinator (env STUDY_STORAGE)",
+    )
+    parser.add_argument(
+        "--data",
+        type=Path,
+        help="Local price CSV (default: the path recorded by the coordinator)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=INDICATOR_CACHE_DIR,
+        help="Persistent indicator cache directory (env INDICATOR_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "--results-db",
+        default=RESULTS_DB,
+        help="SQLite database of backtest results shared with the other "
+        "runs (env RESULTS_DB)",
+    )
+    args = parser.parse_args(argv)
+    cache = (
+        IndicatorCache(args.cache_dir, max_bytes=INDICATOR_CACHE_MB << 20)
+        if args.cache_dir
+        else None
+    )
+    results = ResultStore(args.results_db) if args.results_db else None
+    study = run_worker(
+        args.study, args.storage, data_file=args.data, cache=cache, results=results
+    )
+    log.info("Stato studio: %s", study_summary(study))
+
+
+def results_main(argv: list[str]) -> None:
+    """``results``: list the best stored backtest results."""
+    parser = argparse.ArgumentParser(
+        prog="trading_backtest results",
+        description="Show the best configurations in the results database",
+    )
+    parser.add_argument(
+        "--db",
+        default=RESULTS_DB,
+        required=RESULTS_DB is None,
+        help="Results database (env RESULTS_DB)",
+    )
+    parser.add_argument("--strategy", choices=list(STRATEGY_REGISTRY))
+    parser.add_argument("--data", help="Data fingerprint (or its prefix)")
+    parser.add_argument("--by", choices=METRICS, default="total_return")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+    strategy = STRATEGY_REGISTRY[args.strategy][0].__name__ if args.strategy else None
+    top = ResultStore(args.db).top(strategy, args.data, by=args.by, limit=args.top)
+    print(top.to_string(index=False) if len(top) else "Nessun risultato")
+
+
+# Sottocomandi: ``python -m trading_backtest <comando> ...``
+COMMANDS = {
+    "convert": convert_main,
+    "results": results_main,
+    "coordinator": coordinator_main,
+    "worker": worker_main,
+}
+
+
+def main(with_ml: bool = False, argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        COMMANDS[argv[0]](argv[1:])
+        return
+
     parser = argparse.ArgumentParser(description="Run trading backtest")
     parser.add_argument(
         "--strategy",
@@ -109,7 +298,89 @@ def main(with_ml: bool = False) -> None:
         default=os.getenv("BENCHMARK", "0") == "1",
         help="Run benchmark for all strategies (env BENCHMARK=1)",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--cache-dir",
+        default=INDICATOR_CACHE_DIR,
+        help="Directory for the persistent indicator cache (env INDICATOR_CACHE_DIR)",
+    )
+    parser.add_argument(
+        "--prefetch",
+        action="store_true",
+        default=os.getenv("PREFETCH", "0") == "1",
+        help="With --benchmark, compute every window of every parameter space "
+        "up front instead of on first use (env PREFETCH=1)",
+    )
+    parser.add_argument(
+        "--float32",
+        action="store_true",
+        default=os.getenv("FLOAT32", "0") == "1",
+        help="Store prices and indicator columns as float32 to halve memory "
+        "and cache size (env FLOAT32=1)",
+    )
+    parser.add_argument(
+        "--mmap",
+        action="store_true",
+        default=os.getenv("MMAP", "0") == "1",
+        help="Memory-map the OHLCV columns from the columnar store, converting "
+        "the CSV first if needed (env MMAP=1)",
+    )
+    parser.add_argument(
+        "--start",
+        default=os.getenv("START"),
+        help="First bar to backtest, e.g. 2024-01-01 (env START)",
+    )
+    parser.add_argument(
+        "--end",
+        default=os.getenv("END"),
+        help="Bars before this timestamp are backtested (env END)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("WORKERS", 1)),
+        help="Processes running Optuna trials and grid combos in parallel (env WORKERS)",
+    )
+    parser.add_argument(
+        "--results-db",
+        default=RESULTS_DB,
+        help="SQLite database of backtest results: configurations already "
+        "evaluated on the same data are not simulated again (env RESULTS_DB)",
+    )
+    parser.add_argument(
+        "--storage",
+        default=STUDY_STORAGE,
+        help="Where --resume and --warm-start keep the Optuna studies: journal "
+        "file (journal:PATH) or database URL (env STUDY_STORAGE)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=os.getenv("RESUME", "0") == "1",
+        help="Continue the latest stored study of this strategy, data and "
+        "parameter space up to --trials trials (env RESUME=1)",
+    )
+    parser.add_argument(
+        "--warm-start",
+        nargs="?",
+        const="latest",
+        default=os.getenv("WARM_START"),
+        metavar="STUDY",
+        help="Enqueue the best configurations of STUDY (default: the latest "
+        "study of this strategy on other data) as the first trials (env WARM_START)",
+    )
+    parser.add_argument(
+        "--warm-start-top",
+        type=int,
+        default=int(os.getenv("WARM_START_TOP", 10)),
+        help="Configurations enqueued by --warm-start (env WARM_START_TOP)",
+    )
+    parser.add_argument(
+        "--timeframe",
+        default=os.getenv("TIMEFRAME"),
+        help="Backtest on bars resampled to this timeframe, e.g. 1h, 4h, 1d; "
+        "the resampled bars are cached next to the data file (env TIMEFRAME)",
+    )
+    args = parser.parse_args(argv)
 
     n_trials = args.trials
     strategy_name = args.strategy or os.getenv("STRATEGY", "sma")
@@ -120,40 +391,71 @@ def main(with_ml: bool = False) -> None:
     strategy_cls, config_cls, param_space, prune_func = STRATEGY_REGISTRY[strategy_name]
 
     # 1) Dati + indicatori -------------------------------------------------
-    df = load_price_data(DATA_FILE)
     if args.benchmark:
-        merged: dict[str, set[int]] = {
-            "sma": set(),
-            "rsi": set(),
-            "atr": set(),
-            "vol": set(),
-            "imp": set(),
-            "hmax": set(),
-            "bb": set(),
-        }
+        merged: dict[str, set[int]] = {}
         for name in STRATEGY_REGISTRY:
             if name not in PARAM_SPACES:
                 continue
-            periods = gather_indicator_periods(name)
-            for k, vals in periods.items():
-                merged[k].update(vals)
-        periods = {k: sorted(v) for k, v in merged.items() if v}
+            for k, vals in gather_indicator_periods(name).items():
+                merged.setdefault(k, set()).update(vals)
+        periods = {k: sorted(v) for k, v in merged.items()}
     else:
         periods = gather_indicator_periods(strategy_name)
-
-    add_indicator_cache(
-        df,
-        sma=periods.get("sma", []),
-        rsi=periods.get("rsi", []),
-        atr=periods.get("atr", []),
-        vol=periods.get("vol", []),
-        imp=periods.get("imp", []),
-        hmax=periods.get("hmax", []),
-        bb=periods.get("bb", []),
+    # Barre prima di --start per avere indicatori validi dalla prima barra
+    warmup = max((w for ws in periods.values() for w in ws), default=0) + 1
+    df = load_price_data(
+        DATA_FILE,
+        dtype="float32" if args.float32 else "float64",
+        mmap=args.mmap,
+        start=args.start,
+        end=args.end,
+        warmup=warmup if args.start else 0,
+        timeframe=args.timeframe,
+    )
+    cache = (
+        IndicatorCache(args.cache_dir, max_bytes=INDICATOR_CACHE_MB << 20)
+        if args.cache_dir
+        else None
     )
+    results = ResultStore(args.results_db) if args.results_db else None
+    if args.benchmark:
+        # Colonne calcolate alla prima richiesta; il prefetch è solo un hint
+        df = LazyIndicatorFrame(df, cache=cache)
+        if args.prefetch:
+            df.prefetch(periods)
+    else:
+        # Nuovo frame: le colonne mappate dalla cache restano condivise
+        full = with_indicators(
+            df,
+            sma=periods.get("sma", []),
+            rsi=periods.get("rsi", []),
+            atr=periods.get("atr", []),
+            vol=periods.get("vol", []),
+            imp=periods.get("imp", []),
+            hmax=periods.get("hmax", []),
+            bb=periods.get("bb", []),
+            ema=periods.get("ema", []),
+            stoch=periods.get("stoch", []),
+            cache=cache,
+        )
+        df = trim_warmup(full)
 
     # 2) Ottimizzazione singola o benchmark -------------------------------
     if not args.benchmark:
+        storage = study_name = None
+        if args.resume or args.warm_start:
+            # Studio su disco: nome da strategia, dati e spazio dei parametri
+            storage = args.storage
+            key = study_key(strategy_name, df, param_space)
+            study_name = persistent_study_name(storage, key, resume=args.resume)
+            if args.warm_start:
+                warm_start(
+                    study_name,
+                    storage,
+                    param_space,
+                    source=None if args.warm_start == "latest" else args.warm_start,
+                    top_k=args.warm_start_top,
+                )
         best_trial = optimize_with_optuna(
             df,
             strategy_cls,
@@ -161,17 +463,37 @@ def main(with_ml: bool = False) -> None:
             param_space,
             prune_logic=prune_func,
             n_trials=n_trials,
+            workers=args.workers,
+            storage=storage,
+            study_name=study_name,
+            resume=args.resume,
+            results=results,
         )
 
         grid = refined_grid(strategy_name, best_trial.params)
-        ensure_indicator_cache(df, grid)
-        grid_df = grid_search(df, grid, strategy_name)
+        full = with_indicators(
+            full,
+            **gather_all_indicator_periods(grid, strategy_name=strategy_name),
+            cache=cache,
+        )
+        df = trim_warmup(full)
+        # Il frame con le barre di warm-up non serve più
+        del full
+        grid_df = grid_search(
+            df, grid, strategy_name, results=results, workers=args.workers
+        )
         save_csv(grid_df, RESULTS_FILE)
         log.info("Grid %s salvato in %s", strategy_name.upper(), RESULTS_FILE)
 
     # 3) Benchmark completo: classiche + ML -------------------------------
     if args.benchmark:
-        summary = benchmark_strategies(df, n_trials=n_trials, with_ml=with_ml)
+        summary = benchmark_strategies(
+            df,
+            n_trials=n_trials,
+            with_ml=with_ml,
+            workers=args.workers,
+            results=results,
+        )
         log.info("Riepilogo strategie salvato in %s", SUMMARY_FILE)
         log.info("=== PERFORMANCE ===\n%s", summary.to_string(index=False))
 
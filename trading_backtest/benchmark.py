@@ -33,11 +33,16 @@ from .optimize import (
     prune_vol_expansion,
 )
 from .performance import PerformanceAnalyzer
+from .results import ResultStore
 from .optimize import evaluate_strategy
 
 
 def benchmark_strategies(
-    df: pd.DataFrame, n_trials: int = 300, with_ml: bool = True
+    df: pd.DataFrame,
+    n_trials: int = 300,
+    with_ml: bool = True,
+    workers: int = 1,
+    results: ResultStore | None = None,
 ) -> pd.DataFrame:
     """Optimize each classical strategy then evaluate on ``df``.
 
@@ -51,6 +56,10 @@ def benchmark_strategies(
         count.
     with_ml : bool, default True
         Whether to include the machine learning strategy in the benchmark.
+    workers : int, default 1
+        Processes running the Optuna trials of each strategy.
+    results : ResultStore, optional
+        Store of backtest results consulted before simulating.
 
     Returns
     -------
@@ -91,17 +100,26 @@ def benchmark_strategies(
         ),
     ]
 
-    results = []
+    rows = []
     for name, cls, cfg_cls, space, prune in configs:
         trial = optimize_with_optuna(
-            df, cls, cfg_cls, space, prune_logic=prune, n_trials=n_trials
+            df,
+            cls,
+            cfg_cls,
+            space,
+            prune_logic=prune,
+            n_trials=n_trials,
+            workers=workers,
+            results=results,
         )
         try:
             cfg = cfg_cls(**trial.params)
-            ret = evaluate_strategy(df, lambda cfg=cfg: cls(cfg), with_sharpe=True)
+            ret = evaluate_strategy(
+                df, lambda cfg=cfg: cls(cfg), with_sharpe=True, results=results
+            )
         except ValueError:
             ret = 0.0
-        results.append({"strategy": name, "score": ret})
+        rows.append({"strategy": name, "score": ret})
 
     # Machine learning strategy is not optimized here
     if with_ml:
@@ -109,13 +127,15 @@ def benchmark_strategies(
             n_estimators=50, max_depth=None, sl_pct=5, tp_pct=10
         )
         rf = RandomForestStrategy(rf_cfg)
-        results.append(
+        rows.append(
             {
                 "strategy": "RandomForest",
-                "score": evaluate_strategy(df, lambda: rf, with_sharpe=True),
+                "score": evaluate_strategy(
+                    df, lambda: rf, with_sharpe=True, results=results
+                ),
             }
         )
 
-    summary = pd.DataFrame(results).sort_values("score", ascending=False)
+    summary = pd.DataFrame(rows).sort_values("score", ascending=False)
     save_csv(summary, SUMMARY_FILE)
     return summary
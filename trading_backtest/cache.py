@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Cache persistente su disco delle colonne indicatore.
+
+Ogni colonna è salvata come file ``.npy`` e riaperta in memory-map, così più
+processi che lavorano sullo stesso dataset condividono le pagine del sistema
+operativo.  La chiave combina un hash del contenuto OHLCV, il nome della
+colonna (che include la finestra) e la versione del codice degli indicatori.
+La dimensione della directory è limitata con eviction LRU basata sul tempo di
+ultima modifica dei file.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .config import log
+
+_FINGERPRINT_COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+
+
+def fingerprint(df: pd.DataFrame) -> str:
+    """Return a content hash of the OHLCV columns of ``df``."""
+
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(len(df)).encode())
+    for col in _FINGERPRINT_COLUMNS:
+        if col not in df:
+            continue
+        values = df[col].to_numpy()
+        if values.dtype.kind == "M":
+            values = values.astype("datetime64[ns]").view(np.int64)
+        h.update(col.encode())
+        # Nessuna copia per colonne float64 contigue (anche memory-map)
+        h.update(np.ascontiguousarray(values, dtype=np.float64))
+    return h.hexdigest()
+
+
+class IndicatorCache:
+    """Directory of memory-mapped indicator columns with a size bound.
+
+    ``max_bytes`` caps the total size of the ``.npy`` files; when a store
+    exceeds it the least recently used files are removed.  Writes go through
+    a temporary file and an atomic rename, so concurrent processes never
+    read a partial column.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 1 << 30) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str, name: str) -> Path:
+        return self.directory / f"{key}_{name}.npy"
+
+    def load(self, key: str, names: Iterable[str]) -> dict[str, np.ndarray] | None:
+        """Return the memory-mapped columns ``names`` or ``None`` on any miss."""
+
+        out = {}
+        for name in names:
+            path = self._path(key, name)
+            try:
+                out[name] = np.load(path, mmap_mode="r")
+                os.utime(path)  # aggiorna l'ordine LRU
+            except (FileNotFoundError, ValueError, OSError):
+                return None
+        return out
+
+    def store(self, key: str, columns: Mapping[str, np.ndarray]) -> None:
+        """Write ``columns`` under ``key`` and evict old files if needed.
+
+        float32 columns are stored as float32, anything else as float64.
+        """
+
+        for name, values in columns.items():
+            path = self._path(key, name)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            values = np.asarray(values)
+            dtype = np.float32 if values.dtype == np.float32 else np.float64
+            with open(tmp, "wb") as fh:
+                np.save(fh, values.astype(dtype, copy=False))
+            os.replace(tmp, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used files until under ``max_bytes``."""
+
+        entries = []
+        for path in self.directory.glob("*.npy"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:  # rimosso da un altro processo
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            log.debug("Cache indicatori: rimosso %s", path.name)
+
+
+__all__ = ["IndicatorCache", "fingerprint"]
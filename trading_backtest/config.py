@@ -8,6 +8,20 @@ from typing import Optional
 DATA_FILE = Path(os.environ.get("DATA_FILE", "data/btc_15m_sample.csv"))
 RESULTS_FILE = Path("results_live.csv")
 SUMMARY_FILE = Path("summary_live.csv")
+# Cache persistente degli indicatori (disattivata se non impostata)
+INDICATOR_CACHE_DIR = os.environ.get("INDICATOR_CACHE_DIR")
+INDICATOR_CACHE_MB = int(os.environ.get("INDICATOR_CACHE_MB", 1024))
+# Memoria massima delle colonne calcolate su richiesta (LazyIndicatorFrame)
+INDICATOR_MEMORY_MB = int(os.environ.get("INDICATOR_MEMORY_MB", 512))
+# Thread usati per calcolare gli indicatori (1 = calcolo seriale)
+INDICATOR_WORKERS = int(os.environ.get("INDICATOR_WORKERS", os.cpu_count() or 1))
+# Archivio SQLite dei risultati dei backtest (disattivato se non impostato)
+RESULTS_DB = os.environ.get("RESULTS_DB")
+# Storage degli studi Optuna persistenti (file journal o URL di database)
+STUDY_STORAGE = os.environ.get("STUDY_STORAGE", "journal:optuna_studies.log")
+# Secondi tra due heartbeat dei trial su storage database: un trial senza
+# heartbeat da due intervalli (worker terminato) viene marcato FAIL
+STUDY_HEARTBEAT = int(os.environ.get("STUDY_HEARTBEAT", 60))
 
 level_name = os.getenv("LOG_LEVEL", "INFO").upper()
 level = getattr(logging, level_name, logging.INFO)
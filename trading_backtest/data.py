@@ -1,54 +1,358 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+import io
+import os
 from pathlib import Path
+from typing import Callable, Iterable
 import numpy as np
 import pandas as pd
-from .config import DATA_FILE, log
-from .utils.io_utils import load_csv
+from pandas.tseries.api import guess_datetime_format
+from .config import DATA_FILE, INDICATOR_WORKERS, log
+from .utils.io_utils import csv_byte_range, load_csv
+from .registry import (
+    IndicatorPlan,
+    column_dtype,
+    periods_from_specs,
+    specs_from_periods,
+)
+from .cache import IndicatorCache, fingerprint
+from .resample import LADDER, base_step, parse_timeframe, pyramid, resample_ohlcv
+from .store import (
+    COLUMNS,
+    is_fresh,
+    read_store,
+    row_range,
+    store_path,
+    write_store,
+)
+
+# Da incrementare quando cambia il calcolo di una colonna: invalida la cache
+# persistente degli indicatori
+INDICATOR_VERSION = 2
 
 
 class DataFormatError(Exception):
     """Raised when CSV content does not match expected format."""
 
 
-def load_price_data(data_file: Path = DATA_FILE) -> pd.DataFrame:
+def load_price_data(
+    data_file: Path = DATA_FILE,
+    dtype: str | np.dtype = np.float64,
+    use_store: bool = True,
+    mmap: bool = False,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    columns: list[str] | None = None,
+    warmup: int = 0,
+    timeframe: str | None = None,
+) -> pd.DataFrame:
     """Load OHLCV data from ``data_file``.
 
     Logs and re-raises ``FileNotFoundError`` if the file is missing and
-    ``DataFormatError`` if columns are not parseable.
+    ``DataFormatError`` if columns are not parseable.  ``dtype="float32"``
+    stores the OHLCV columns in single precision; indicator columns computed
+    on the frame then follow the same dtype.
+
+    When ``use_store`` is true and the columnar store written by
+    :func:`convert_price_data` is newer than ``data_file``, the store is read
+    instead of the CSV.  With ``mmap=True`` the OHLCV columns are read-only
+    memory maps of the store (converted first if missing or stale), which the
+    indicator cache and the engines read without copying; a ``float32``
+    ``dtype`` then needs an in-memory copy.
+
+    ``start``/``end`` keep the bars with ``start <= timestamp < end`` and
+    ``columns`` the listed OHLCV columns (``timestamp`` is always loaded);
+    only those rows and columns are read.  ``warmup`` more bars before
+    ``start`` are included so that indicators are valid from ``start``; their
+    number is stored in ``df.attrs["warmup"]`` (see :func:`trim_warmup`).
+
+    ``timeframe`` (``"1h"``, ``"4h"``, ``"1d"``, …) returns bars resampled
+    from ``data_file``; the levels are built by :func:`timeframe_store` and
+    cached on disk, so later runs read only the resampled store.
     """
 
+    store = store_path(data_file)
+    if timeframe is not None:
+        store = timeframe_store(data_file, timeframe)
+    elif mmap and not is_fresh(store, data_file):
+        convert_price_data(data_file)
+    if timeframe is not None or mmap or (use_store and is_fresh(store, data_file)):
+        log.info("Lettura archivio prezzi %s", store)
+        lo, hi = row_range(store, start, end)
+        first = max(lo - warmup, 0)
+        df = read_store(
+            store, columns=_store_columns(columns), mmap=mmap, rows=(first, hi)
+        )
+        df.attrs["warmup"] = lo - first
+    else:
+        df = _read_price_csv(data_file, start, end, columns, warmup, dtype)
+    cast = {c: dtype for c in COLUMNS[1:] if c in df and df[c].dtype != dtype}
+    if cast:
+        df = df.astype(cast)
+    return df
+
+
+def _store_columns(columns: list[str] | None) -> list[str] | None:
+    if columns is None:
+        return None
+    return ["timestamp", *(c for c in COLUMNS[1:] if c in columns)]
+
+
+# Righe lette per chunk dal CSV
+CSV_CHUNK_ROWS = 1 << 18
+
+# Colonne del CSV Binance -> colonne del DataFrame
+_CSV_COLUMNS = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+}
+
+
+def _parse_time(field: bytes) -> pd.Timestamp | None:
+    # Stessa interpretazione di pd.to_datetime sulla colonna letta da read_csv
+    field = field.strip().strip(b'"')
+    try:
+        value = (
+            pd.Timestamp(int(field))
+            if field.isdigit()
+            else pd.Timestamp(field.decode())
+        )
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return None if pd.isna(value) else value
+
+
+def _read_price_csv(
+    data_file: Path,
+    start: str | pd.Timestamp | None = None,
+    end: str | pd.Timestamp | None = None,
+    columns: list[str] | None = None,
+    warmup: int = 0,
+    dtype: str | np.dtype = np.float64,
+    chunksize: int = CSV_CHUNK_ROWS,
+) -> pd.DataFrame:
+    rename = _CSV_COLUMNS
+    if columns is not None:
+        rename = {k: v for k, v in _CSV_COLUMNS.items() if v in columns}
+    source: Path | io.BytesIO = data_file
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
     try:
-        df = pd.read_csv(data_file)
+        if start is not None or end is not None:
+            source = _csv_rows(data_file, start, end, warmup)
+        reader = pd.read_csv(
+            source, usecols=["Open time", *rename], chunksize=chunksize
+        )
+        with reader:
+            df = _ingest(reader, rename, np.dtype(dtype), _rows_hint(source))
     except FileNotFoundError:
         log.error("Data file not found: %s", data_file)
         raise
-    except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+    except (pd.errors.ParserError, pd.errors.EmptyDataError, ValueError) as e:
         log.error("Invalid CSV format for %s: %s", data_file, e)
         raise DataFormatError(str(e)) from e
+    if start is None and end is None:
+        return df
+    return _select_rows(df, start, end, warmup)
 
-    try:
-        df["timestamp"] = pd.to_datetime(df["Open time"], errors="coerce")
-        rename = {
-            "Open": "open",
-            "High": "high",
-            "Low": "low",
-            "Close": "close",
-            "Volume": "volume",
-        }
+
+def _rows_hint(source: Path | io.BytesIO) -> int:
+    # Stima delle righe dalla lunghezza media delle prime righe
+    if isinstance(source, io.BytesIO):
+        view = source.getbuffer()
+        size, head = len(view), bytes(view[: 1 << 16])
+    else:
+        size = os.path.getsize(source)
+        with open(source, "rb") as fh:
+            head = fh.read(1 << 16)
+    lines = max(head.count(b"\n"), 1)
+    return int(size / (len(head) / lines) * 1.05) + 1
+
+
+def _time_parser(first: pd.Series) -> Callable[[pd.Series], np.ndarray]:
+    """Return the ``Open time`` parser, with the format inferred once."""
+
+    if first.dtype.kind in "iu":
+        # Stessa interpretazione di pd.to_datetime su interi (nanosecondi)
+        return lambda col: pd.to_datetime(
+            pd.to_numeric(col, errors="coerce")
+        ).to_numpy()
+    sample = first.dropna()
+    fmt = guess_datetime_format(str(sample.iloc[0])) if len(sample) else None
+    return lambda col: pd.to_datetime(col, format=fmt, errors="coerce").to_numpy()
+
+
+def _ingest(
+    reader: Iterable[pd.DataFrame],
+    rename: dict[str, str],
+    dtype: np.dtype,
+    rows_hint: int,
+) -> pd.DataFrame:
+    """Append the valid rows of every chunk into preallocated arrays."""
+
+    names = ["timestamp", *rename.values()]
+    arrays: dict[str, np.ndarray] = {}
+    parse_time = None
+    n = 0
+    monotonic = True
+    for chunk in reader:
+        if parse_time is None:
+            parse_time = _time_parser(chunk["Open time"])
+            arrays = {
+                name: np.empty(
+                    rows_hint, "datetime64[ns]" if name == "timestamp" else dtype
+                )
+                for name in names
+            }
+        cols = {"timestamp": parse_time(chunk["Open time"])}
         for old, new in rename.items():
-            df[new] = pd.to_numeric(df[old], errors="coerce")
-        df = (
-            df.dropna(subset=["timestamp", "open", "high", "low", "close"])
-            .sort_values("timestamp")
-            .reset_index(drop=True)
-        )
-    except KeyError as e:
-        log.error("Missing expected columns in %s: %s", data_file, e)
-        raise DataFormatError(str(e)) from e
+            values = chunk[old]
+            if values.dtype.kind not in "iuf":
+                values = pd.to_numeric(values, errors="coerce")
+            cols[new] = values.to_numpy(dtype=dtype)
+        # Righe non valide scartate chunk per chunk
+        valid = ~np.isnat(cols["timestamp"])
+        for name in ("open", "high", "low", "close"):
+            if name in cols:
+                valid &= ~np.isnan(cols[name])
+        m = int(valid.sum())
+        if n + m > len(arrays["timestamp"]):
+            size = max(n + m, 2 * len(arrays["timestamp"]))
+            for name in names:
+                arrays[name] = np.resize(arrays[name], size)
+        for name in names:
+            arrays[name][n : n + m] = cols[name][valid]
+        ts = arrays["timestamp"]
+        if monotonic and m:
+            prev = ts[n - 1 : n + m] if n else ts[:m]
+            monotonic = bool((prev[1:] >= prev[:-1]).all())
+        n += m
+    if parse_time is None:
+        raise pd.errors.EmptyDataError("Nessuna riga nel CSV")
+
+    for values in arrays.values():
+        # Rilascia la capacità in eccesso (realloc, senza copia dei dati)
+        values.resize(n, refcheck=False)
+    if not monotonic:
+        order = np.argsort(arrays["timestamp"], kind="stable")
+        arrays = {name: values[order] for name, values in arrays.items()}
+    return pd.DataFrame(arrays, copy=False)
+
+
+def _csv_rows(
+    data_file: Path, start: pd.Timestamp | None, end: pd.Timestamp | None, warmup: int
+) -> Path | io.BytesIO:
+    # Righe dell'intervallo (più il warm-up) trovate per bisezione sugli
+    # offset del file; CSV non ordinati vengono letti per intero
+    with open(data_file, "rb") as fh:
+        names = fh.readline().decode().strip().split(",")
+    try:
+        pos = [n.strip().strip('"') for n in names].index("Open time")
+    except ValueError:
+        raise DataFormatError("Colonna mancante: Open time") from None
+
+    def key(line: bytes) -> pd.Timestamp | None:
+        fields = line.split(b",", pos + 1)
+        return _parse_time(fields[pos]) if len(fields) > pos else None
+
+    # Margine per le righe non valide scartate nel warm-up
+    found = csv_byte_range(
+        data_file, key, start, end, before=warmup + warmup // 10 + 16
+    )
+    if found is None:
+        log.warning("%s non è ordinato per timestamp: lettura completa", data_file)
+        return data_file
+    header, lo, hi = found
+    with open(data_file, "rb") as fh:
+        fh.seek(lo)
+        return io.BytesIO(header + fh.read(hi - lo))
+
+
+def _select_rows(
+    df: pd.DataFrame,
+    start: pd.Timestamp | None,
+    end: pd.Timestamp | None,
+    warmup: int,
+) -> pd.DataFrame:
+    ts = df["timestamp"].to_numpy()
+    lo = 0 if start is None else int(np.searchsorted(ts, start.to_datetime64()))
+    hi = len(df) if end is None else int(np.searchsorted(ts, end.to_datetime64()))
+    first = max(lo - warmup, 0)
+    df = df.iloc[first : max(lo, hi)].reset_index(drop=True)
+    df.attrs["warmup"] = lo - first
+    return df
+
+
+def trim_warmup(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop the warm-up bars loaded by :func:`load_price_data`.
+
+    Call it after computing the indicators, so that they are already valid
+    on the first remaining bar.  The result is a view on the columns of
+    ``df`` (memory-mapped ones included), renumbered from 0.
+    """
+
+    warmup = df.attrs.get("warmup", 0)
+    if not warmup:
+        return df
+    view = df.iloc[warmup:]
+    df = view.set_axis(pd.RangeIndex(len(view)), axis=0, copy=False)
+    df.attrs["warmup"] = 0
     return df
 
 
+def timeframe_store(data_file: Path, timeframe: str) -> Path:
+    """Return the store of ``data_file`` resampled to ``timeframe``.
+
+    Missing or stale levels of the pyramid are built, each from the next
+    finer one (see :func:`~trading_backtest.resample.pyramid`), starting
+    from the coarsest level already cached or from the source bars.
+    """
+
+    target = parse_timeframe(timeframe)
+    path = store_path(data_file, timeframe)
+    if is_fresh(path, data_file):
+        return path
+
+    # Livello in cache più grossolano da cui partire
+    frame = None
+    for name in reversed(LADDER):
+        step = parse_timeframe(name)
+        cached = store_path(data_file, name)
+        if step < target and not target % step and is_fresh(cached, data_file):
+            frame, base = read_store(cached), step
+            break
+    if frame is None:
+        frame = load_price_data(data_file)[list(COLUMNS)]
+        base = base_step(frame["timestamp"].to_numpy())
+        if base == target:
+            if not is_fresh(store_path(data_file), data_file):
+                convert_price_data(data_file)
+            return store_path(data_file)
+
+    for name in pyramid(base, timeframe):
+        frame = resample_ohlcv(frame, name)
+        write_store(frame, store_path(data_file, name), data_file, timeframe=name)
+        log.info("Barre %s salvate (%d)", name, len(frame))
+    return path
+
+
+def convert_price_data(data_file: Path = DATA_FILE, out: Path | None = None) -> Path:
+    """Parse the CSV ``data_file`` once and write it to a columnar store.
+
+    The store goes next to the CSV (see :func:`~trading_backtest.store.store_path`)
+    unless ``out`` is given; :func:`load_price_data` picks it up automatically
+    while it is newer than the CSV.
+    """
+
+    df = _read_price_csv(data_file)
+    path = write_store(df, out or store_path(data_file), source=data_file)
+    log.info("Archivio prezzi scritto in %s (%d barre)", path, len(df))
+    return path
+
+
 def add_indicator_cache(
     df: pd.DataFrame,
     sma: list[int] | None = None,
@@ -58,75 +362,158 @@ def add_indicator_cache(
     imp: list[int] | None = None,
     hmax: list[int] | None = None,
     bb: list[int] | None = None,
+    ema: list[int] | None = None,
+    stoch: list[int] | None = None,
+    cache: IndicatorCache | None = None,
+    workers: int = INDICATOR_WORKERS,
 ) -> None:
     """Compute and store commonly used indicators in ``df``.
 
     Parameters mirror the window lengths for simple moving averages, RSI,
-    average true range, historical volatility, impulse, breakout highs and
-    Bollinger bands. Columns are added in bulk to minimise fragmentation.
+    average true range, historical volatility, impulse, breakout highs,
+    Bollinger bands, exponential moving averages (MACD legs) and stochastic
+    %K. Columns are added in bulk to minimise fragmentation.
+    The columns are computed by an :class:`IndicatorPlan`, which shares
+    intermediate series (prefix sums, true range, …) between windows and
+    families; ``workers`` threads compute the family × window tasks in
+    parallel before the single bulk assignment.
+
+    With ``cache`` columns already stored for the same OHLCV data are mapped
+    from disk instead of recomputed, and newly computed ones are stored.
     """
 
     log.info("Caching indicatori …")
+    cols = compute_indicator_columns(
+        df,
+        sma=sma,
+        rsi=rsi,
+        atr=atr,
+        vol=vol,
+        imp=imp,
+        hmax=hmax,
+        bb=bb,
+        ema=ema,
+        stoch=stoch,
+        cache=cache,
+        workers=workers,
+    )
+    if cols:
+        df[list(cols.keys())] = pd.DataFrame(cols, index=df.index)
+    log.info("Indicatori pronti.")
 
-    sma = sorted(set(sma or []))
-    rsi = sorted(set(rsi or []))
-    atr = sorted(set(atr or []))
-    vol = sorted(set(vol or []))
-    imp = sorted(set(imp or []))
-    hmax = sorted(set(hmax or []))
-    bb = sorted(set(bb or []))
-
-    cols = {}
-
-    # SMA
-    for w in sma:
-        cols[f"sma_{w}"] = df["close"].rolling(w).mean().shift(1)
-
-    # RSI - start rolling early to reduce initial NaNs
-    if rsi:
-        delta = df["close"].diff()
-        up, down = delta.clip(lower=0), -delta.clip(upper=0)
-        for p in rsi:
-            gain = up.rolling(p, min_periods=1).mean()
-            loss = down.rolling(p, min_periods=1).mean()
-            rs = gain / loss.replace(0, np.nan)
-            rsi_vals = 100 - 100 / (1 + rs)
-            rsi_vals = rsi_vals.bfill()  # fill leading NaNs
-            cols[f"rsi_{p}"] = rsi_vals.shift(1)
-
-    # ATR and true range
-    if atr:
-        tr = np.maximum(
-            df["high"] - df["low"],
-            np.maximum(
-                abs(df["high"] - df["close"].shift()),
-                abs(df["low"] - df["close"].shift()),
-            ),
-        )
-        cols["tr"] = tr
-        for p in atr:
-            cols[f"atr_{p}"] = tr.rolling(p).mean().shift(1)
 
-    # Historical volatility
-    if vol:
-        pct = df["close"].pct_change()
-        for w in vol:
-            cols[f"vol_{w}"] = pct.rolling(w).std().shift(1)
+def with_indicators(
+    df: pd.DataFrame,
+    sma: list[int] | None = None,
+    rsi: list[int] | None = None,
+    atr: list[int] | None = None,
+    vol: list[int] | None = None,
+    imp: list[int] | None = None,
+    hmax: list[int] | None = None,
+    bb: list[int] | None = None,
+    ema: list[int] | None = None,
+    stoch: list[int] | None = None,
+    cache: IndicatorCache | None = None,
+    workers: int = INDICATOR_WORKERS,
+) -> pd.DataFrame:
+    """Return a new frame with ``df`` and the columns of :func:`add_indicator_cache`.
+
+    :func:`add_indicator_cache` consolidates the new columns into ``df``,
+    copying the ones mapped from ``cache``.  Here every column keeps its own
+    array: the columns of ``df`` and the cache hits are referenced, not
+    copied, so memory-mapped prices and indicators stay shared with the
+    other processes mapping the same files.  Indicators whose columns are
+    already in ``df`` are not computed again.
+    """
 
-    # Impulse
-    for w in imp:
-        cols[f"impulse_{w}"] = df["close"].pct_change(w).shift(1)
+    specs = [
+        spec
+        for spec in specs_from_periods(
+            {
+                "sma": sma or [],
+                "rsi": rsi or [],
+                "atr": atr or [],
+                "vol": vol or [],
+                "imp": imp or [],
+                "hmax": hmax or [],
+                "bb": bb or [],
+                "ema": ema or [],
+                "stoch": stoch or [],
+            }
+        )
+        if any(col not in df for col in spec.columns)
+    ]
+    if not specs:
+        return df
+    log.info("Caching indicatori …")
+    cols = compute_indicator_columns(
+        df, **periods_from_specs(specs), cache=cache, workers=workers
+    )
+    arrays = {col: df[col].to_numpy() for col in df.columns}
+    arrays.update((name, values.to_numpy()) for name, values in cols.items())
+    out = pd.DataFrame(arrays, index=df.index, copy=False)
+    out.attrs.update(df.attrs)
+    log.info("Indicatori pronti.")
+    return out
 
-    # Breakout highs (HMAX)
-    for w in hmax:
-        cols[f"hmax_{w}"] = df["close"].shift(1).rolling(w).max()
 
-    # Bollinger bands
-    for w in bb:
-        cols[f"bbm_{w}"] = df["close"].rolling(w).mean().shift(1)
-        cols[f"bbs_{w}"] = df["close"].rolling(w).std().shift(1)
+def compute_indicator_columns(
+    df: pd.DataFrame,
+    sma: list[int] | None = None,
+    rsi: list[int] | None = None,
+    atr: list[int] | None = None,
+    vol: list[int] | None = None,
+    imp: list[int] | None = None,
+    hmax: list[int] | None = None,
+    bb: list[int] | None = None,
+    ema: list[int] | None = None,
+    stoch: list[int] | None = None,
+    cache: IndicatorCache | None = None,
+    workers: int = INDICATOR_WORKERS,
+) -> dict[str, pd.Series]:
+    """Return the columns of :func:`add_indicator_cache` without touching ``df``."""
 
-    if cols:
-        df[list(cols.keys())] = pd.DataFrame(cols, index=df.index)
+    plan = IndicatorPlan(
+        specs_from_periods(
+            {
+                "sma": sma or [],
+                "rsi": rsi or [],
+                "atr": atr or [],
+                "vol": vol or [],
+                "imp": imp or [],
+                "hmax": hmax or [],
+                "bb": bb or [],
+                "ema": ema or [],
+                "stoch": stoch or [],
+            }
+        )
+    )
+    if cache is None:
+        return plan.evaluate(df, workers=workers)
 
-    log.info("Indicatori pronti.")
+    # Calcola solo le spec non presenti nella cache persistente
+    key = f"{fingerprint(df)}-v{INDICATOR_VERSION}"
+    if column_dtype(df) == np.float32:
+        key += "-f32"
+    cols: dict[str, pd.Series] = {}
+    missing = []
+    for spec in plan.specs:
+        names = spec.columns + (("tr",) if spec.kind == "atr" else ())
+        hit = cache.load(key, names)
+        if hit is None:
+            missing.append(spec)
+            continue
+        for name, values in hit.items():
+            cols[name] = pd.Series(values, index=df.index)
+    from_cache = set(cols)
+    computed = IndicatorPlan(missing).evaluate(df, workers=workers)
+    cols.update(computed)
+    stored = {k: v.to_numpy() for k, v in computed.items() if k not in from_cache}
+    if stored:
+        cache.store(key, stored)
+    log.debug(
+        "Cache indicatori: %d da disco, %d calcolati", len(from_cache), len(stored)
+    )
+    # Ordine delle colonne come nel calcolo completo
+    cols = {name: cols[name] for name in plan.columns}
+    return cols
@@ -0,0 +1,599 @@
+# -*- coding: utf-8 -*-
+"""Motore di simulazione dei trade su array NumPy contigui.
+
+La macchina a stati è la stessa di :meth:`BaseStrategy.generate_trades`
+(long-only con stop loss, take profit, trailing stop e uscita forzata), ma
+lavora su array ``high``/``low``/``close`` e maschere booleane di ingresso e
+uscita.  Se ``numba`` è installato il kernel viene compilato, altrimenti si
+usa la stessa funzione in puro Python su liste.  I prezzi possono essere
+``float32`` (modalità compatta): lo stato della posizione resta ``float64``.
+
+Il motore ``"event"`` salta direttamente da un segnale di ingresso al primo
+evento di uscita usando un indice di minimi/massimi sui prezzi.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .ledger import ExitReason, TradeLedger
+from .performance import N_STATS, TradeMetrics
+from .rangeindex import range_index
+
+try:
+    from numba import njit
+except ImportError:  # numba è una dipendenza opzionale
+    njit = None
+
+ENGINES = ("loop", "array", "event")
+DEFAULT_ENGINE = "array"
+# Da incrementare quando cambiano i risultati delle simulazioni (invalida
+# l'archivio dei risultati, vedi results.py)
+ENGINE_VERSION = 1
+
+# Codici di uscita come costanti intere (leggibili anche dai kernel numba)
+_SL = int(ExitReason.SL)
+_TP = int(ExitReason.TP)
+_SIGNAL = int(ExitReason.SIGNAL)
+_END = int(ExitReason.END)
+
+
+def _price_array(values) -> np.ndarray:
+    # I prezzi float32 restano tali (numba compila una specializzazione);
+    # livelli di SL/TP e rendimenti nei kernel sono comunque in float64.
+    values = np.asarray(values)
+    dtype = np.float32 if values.dtype == np.float32 else np.float64
+    return np.ascontiguousarray(values, dtype=dtype)
+
+
+@dataclass(frozen=True)
+class PriceArrays:
+    """Contiguous OHLC arrays shared by the simulation kernels."""
+
+    timestamp: Any
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "PriceArrays":
+        def col(name: str) -> np.ndarray:
+            return _price_array(df[name].to_numpy())
+
+        return cls(
+            timestamp=df["timestamp"],
+            open=col("open") if "open" in df else col("close"),
+            high=col("high"),
+            low=col("low"),
+            close=col("close"),
+        )
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """Trades of ``N`` configurations stored in one ragged ledger.
+
+    Trades of configuration ``n`` live in ``offsets[n]:offsets[n + 1]`` of
+    ``ledger``, ordered by entry bar.
+    """
+
+    offsets: np.ndarray
+    ledger: TradeLedger
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def config_ids(self) -> np.ndarray:
+        """Return the configuration index of every trade."""
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    def pct_change(self) -> np.ndarray:
+        """Return the percentage return of every trade."""
+        return self.ledger.pct_change()
+
+    def trades(self, n: int) -> TradeLedger:
+        """Return the ledger of configuration ``n``."""
+        return self.ledger[self.offsets[n] : self.offsets[n + 1]]
+
+
+def _accumulate(stats, net):
+    # Aggiorna conteggi, somma, media/M2 (Welford), equity e drawdown
+    stats[0] += 1
+    if net != net:
+        return
+    stats[1] += 1
+    stats[2] += net
+    delta = net - stats[3]
+    stats[3] += delta / stats[1]
+    stats[4] += delta * (net - stats[3])
+    stats[5] *= 1 + net / 100
+    if stats[5] > stats[6]:
+        stats[6] = stats[5]
+    dd = (stats[5] / stats[6] - 1) * 100
+    if dd < stats[7]:
+        stats[7] = dd
+    if net > 0:
+        stats[8] += 1
+
+
+if njit:
+    _accumulate = njit(cache=True, nogil=True)(_accumulate)
+
+
+def _simulate(
+    high,
+    low,
+    close,
+    entries,
+    exits,
+    sl_pct,
+    tp_pct,
+    trail_pct,
+    commission,
+    slippage,
+    record,
+):
+    # Con record=False non si allocano i buffer dei trade: restano solo le
+    # statistiche accumulate in ``stats``.
+    n = len(close)
+    cap = n // 2 + 1 if record else 0
+    entry_idx = np.empty(cap, np.int64)
+    exit_idx = np.empty(cap, np.int64)
+    entry_px = np.empty(cap, np.float64)
+    exit_px = np.empty(cap, np.float64)
+    reason = np.empty(cap, np.int8)
+    stats = np.zeros(N_STATS, np.float64)
+    stats[5] = 1.0
+
+    k = 0
+    in_pos = False
+    e_i = 0
+    e_price = 0.0
+    sl_price = 0.0
+    tp_price = 0.0
+    trailing = 0.0
+    for i in range(n):
+        if not in_pos:
+            if entries[i]:
+                in_pos = True
+                e_i = i
+                e_price = close[i]
+                sl_price = e_price * (1 - sl_pct / 100)
+                tp_price = e_price * (1 + tp_pct / 100)
+                if trail_pct > 0:
+                    trailing = e_price * (1 - trail_pct / 100)
+                    if trailing > sl_price:
+                        sl_price = trailing
+            continue
+
+        hit_sl = low[i] <= sl_price
+        hit_tp = high[i] >= tp_price
+        if hit_sl or hit_tp or exits[i]:
+            if hit_sl:
+                x_price = sl_price
+                why = _SL
+            elif hit_tp:
+                x_price = tp_price
+                why = _TP
+            else:
+                x_price = close[i]
+                why = _SIGNAL
+            if record:
+                entry_idx[k] = e_i
+                exit_idx[k] = i
+                entry_px[k] = e_price
+                exit_px[k] = x_price
+                reason[k] = why
+                k += 1
+            _accumulate(stats, (x_price / e_price - 1) * 100 - commission - slippage)
+            in_pos = False
+        elif trail_pct > 0:
+            new_trail = high[i] * (1 - trail_pct / 100)
+            if new_trail > trailing:
+                trailing = new_trail
+            if trailing > sl_price:
+                sl_price = trailing
+
+    if in_pos:
+        if record:
+            entry_idx[k] = e_i
+            exit_idx[k] = n - 1
+            entry_px[k] = e_price
+            exit_px[k] = close[n - 1]
+            reason[k] = _END
+            k += 1
+        x_price = close[n - 1]
+        _accumulate(stats, (x_price / e_price - 1) * 100 - commission - slippage)
+
+    ledger = (entry_idx[:k], exit_idx[:k], entry_px[:k], exit_px[:k], reason[:k])
+    return ledger, stats
+
+
+_simulate_jit = njit(cache=True, nogil=True)(_simulate) if njit else None
+
+
+def simulate_trades(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    entries: np.ndarray,
+    exits: np.ndarray,
+    sl_pct: float,
+    tp_pct: float,
+    trailing_stop_pct: float | None = None,
+    qty: float = 1.0,
+) -> TradeLedger:
+    """Simulate long-only trades over price arrays and signal masks.
+
+    Returns a :class:`TradeLedger` whose indices are positional bar numbers.
+    A falsy ``trailing_stop_pct`` disables the trailing stop exactly as in
+    the DataFrame loop.
+    """
+
+    args = (sl_pct, tp_pct, trailing_stop_pct, 0.0, 0.0, True)
+    ledger, _ = _run_kernel(high, low, close, entries, exits, *args)
+    return TradeLedger.from_arrays(*ledger, qty=qty)
+
+
+def simulate_metrics(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    entries: np.ndarray,
+    exits: np.ndarray,
+    sl_pct: float,
+    tp_pct: float,
+    trailing_stop_pct: float | None = None,
+    commission: float = 0.0,
+    slippage: float = 0.0,
+) -> TradeMetrics:
+    """Score-only variant of :func:`simulate_trades`.
+
+    No trade is stored: each closed trade updates running statistics of its
+    net return (``pct_change - commission - slippage``), returned as a
+    :class:`~trading_backtest.performance.TradeMetrics`.
+    """
+
+    args = (sl_pct, tp_pct, trailing_stop_pct, commission, slippage, False)
+    _, stats = _run_kernel(high, low, close, entries, exits, *args)
+    return TradeMetrics.from_stats(stats)
+
+
+def _run_kernel(
+    high, low, close, entries, exits, sl, tp, trail, commission, slippage, record
+):
+    high = _price_array(high)
+    low = _price_array(low)
+    close = _price_array(close)
+    entries = np.ascontiguousarray(entries, dtype=np.bool_)
+    exits = np.ascontiguousarray(exits, dtype=np.bool_)
+    args = (
+        float(sl),
+        float(tp),
+        float(trail or 0.0),
+        float(commission),
+        float(slippage),
+        bool(record),
+    )
+    if _simulate_jit is not None:
+        return _simulate_jit(high, low, close, entries, exits, *args)
+    # Fallback puro Python: l'indicizzazione di liste è molto più veloce
+    # di quella elemento per elemento su ndarray.
+    return _simulate(
+        high.tolist(),
+        low.tolist(),
+        close.tolist(),
+        entries.tolist(),
+        exits.tolist(),
+        *args,
+    )
+
+
+def simulate_trades_event(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    entries: np.ndarray,
+    exits: np.ndarray,
+    sl_pct: float,
+    tp_pct: float,
+    trailing_stop_pct: float | None = None,
+    qty: float = 1.0,
+) -> TradeLedger:
+    """Event-driven equivalent of :func:`simulate_trades`.
+
+    Instead of visiting every bar, jump to the next entry with
+    ``searchsorted`` and find the exit as the first of: ``low`` reaching the
+    stop loss, ``high`` reaching the take profit, or the next exit signal.
+    The first two use cached :class:`~trading_backtest.rangeindex.SparseTable`
+    indexes, so each trade costs ``O(log n)``.  A trailing stop moves every
+    bar, so in that case the bar-by-bar kernel is used.
+    """
+
+    if trailing_stop_pct:
+        return simulate_trades(
+            high, low, close, entries, exits, sl_pct, tp_pct, trailing_stop_pct, qty
+        )
+
+    n = len(close)
+    close = np.asarray(close, dtype=np.float64)
+    ent = np.flatnonzero(entries)
+    ext = np.flatnonzero(exits)
+    if len(ent) == 0:
+        return TradeLedger.empty()
+    low_idx = range_index(low, "min")
+    high_idx = range_index(high, "max")
+
+    e_list: list[int] = []
+    x_list: list[int] = []
+    ep_list: list[float] = []
+    xp_list: list[float] = []
+    reasons: list[int] = []
+    k = 0
+    while k < len(ent):
+        e = int(ent[k])
+        e_price = close[e]
+        sl_price = e_price * (1 - sl_pct / 100)
+        tp_price = e_price * (1 + tp_pct / 100)
+        start = e + 1
+        t_sl = low_idx.first_crossing(start, sl_price)
+        t_tp = high_idx.first_crossing(start, tp_price)
+        j = np.searchsorted(ext, start)
+        t_x = int(ext[j]) if j < len(ext) else n
+        t = min(t_sl, t_tp, t_x)
+        e_list.append(e)
+        ep_list.append(e_price)
+        if t >= n:
+            x_list.append(n - 1)
+            xp_list.append(close[n - 1])
+            reasons.append(_END)
+            break
+        x_list.append(t)
+        if t == t_sl:
+            xp_list.append(sl_price)
+            reasons.append(_SL)
+        elif t == t_tp:
+            xp_list.append(tp_price)
+            reasons.append(_TP)
+        else:
+            xp_list.append(close[t])
+            reasons.append(_SIGNAL)
+        k = np.searchsorted(ent, t + 1)
+
+    return TradeLedger.from_arrays(e_list, x_list, ep_list, xp_list, reasons, qty=qty)
+
+
+def _simulate_batch(
+    high, low, close, entries, exits, sl_pct, tp_pct, trail_pct, starts
+):
+    # entries/exits hanno forma (T, N): il ciclo interno sulle configurazioni
+    # legge memoria contigua.
+    n_bars, n_cfg = entries.shape
+    total = starts[n_cfg]
+    entry_idx = np.empty(total, np.int64)
+    exit_idx = np.empty(total, np.int64)
+    entry_px = np.empty(total, np.float64)
+    exit_px = np.empty(total, np.float64)
+    reason = np.empty(total, np.int8)
+    count = np.zeros(n_cfg, np.int64)
+
+    in_pos = np.zeros(n_cfg, np.bool_)
+    e_i = np.zeros(n_cfg, np.int64)
+    e_price = np.zeros(n_cfg, np.float64)
+    sl_price = np.zeros(n_cfg, np.float64)
+    tp_price = np.zeros(n_cfg, np.float64)
+    trailing = np.zeros(n_cfg, np.float64)
+    for i in range(n_bars):
+        for n in range(n_cfg):
+            if not in_pos[n]:
+                if entries[i, n]:
+                    in_pos[n] = True
+                    e_i[n] = i
+                    e_price[n] = close[i]
+                    sl_price[n] = close[i] * (1 - sl_pct[n] / 100)
+                    tp_price[n] = close[i] * (1 + tp_pct[n] / 100)
+                    if trail_pct[n] > 0:
+                        trailing[n] = close[i] * (1 - trail_pct[n] / 100)
+                        if trailing[n] > sl_price[n]:
+                            sl_price[n] = trailing[n]
+                continue
+
+            hit_sl = low[i] <= sl_price[n]
+            hit_tp = high[i] >= tp_price[n]
+            if hit_sl or hit_tp or exits[i, n]:
+                k = starts[n] + count[n]
+                entry_idx[k] = e_i[n]
+                exit_idx[k] = i
+                entry_px[k] = e_price[n]
+                if hit_sl:
+                    exit_px[k] = sl_price[n]
+                    reason[k] = _SL
+                elif hit_tp:
+                    exit_px[k] = tp_price[n]
+                    reason[k] = _TP
+                else:
+                    exit_px[k] = close[i]
+                    reason[k] = _SIGNAL
+                count[n] += 1
+                in_pos[n] = False
+            elif trail_pct[n] > 0:
+                new_trail = high[i] * (1 - trail_pct[n] / 100)
+                if new_trail > trailing[n]:
+                    trailing[n] = new_trail
+                if trailing[n] > sl_price[n]:
+                    sl_price[n] = trailing[n]
+
+    for n in range(n_cfg):
+        if in_pos[n]:
+            k = starts[n] + count[n]
+            entry_idx[k] = e_i[n]
+            exit_idx[k] = n_bars - 1
+            entry_px[k] = e_price[n]
+            exit_px[k] = close[n_bars - 1]
+            reason[k] = _END
+            count[n] += 1
+
+    return count, entry_idx, exit_idx, entry_px, exit_px, reason
+
+
+_simulate_batch_jit = njit(cache=True, nogil=True)(_simulate_batch) if njit else None
+
+
+def _simulate_batch_numpy(high, low, close, entries, exits, sl_pct, tp_pct, trail_pct):
+    """Vectorised fallback: one pass over the bars, NumPy ops across configs."""
+
+    n_bars, n_cfg = entries.shape
+    in_pos = np.zeros(n_cfg, dtype=bool)
+    e_i = np.zeros(n_cfg, dtype=np.int64)
+    e_price = np.zeros(n_cfg)
+    sl_price = np.zeros(n_cfg)
+    tp_price = np.zeros(n_cfg)
+    trailing = np.zeros(n_cfg)
+    has_trail = trail_pct > 0
+    sl_f = 1 - sl_pct / 100
+    tp_f = 1 + tp_pct / 100
+    trail_f = 1 - trail_pct / 100
+    any_entry = entries.any(axis=1)
+
+    chunks: list[tuple[np.ndarray, ...]] = []
+    n_open = 0
+    for i in range(n_bars):
+        if n_open == 0 and not any_entry[i]:
+            continue
+        opening = ~in_pos & entries[i] if any_entry[i] else None
+
+        if n_open:
+            hit_sl = in_pos & (low[i] <= sl_price)
+            hit_tp = in_pos & (high[i] >= tp_price)
+            closing = hit_sl | hit_tp | (in_pos & exits[i])
+            if closing.any():
+                ids = np.flatnonzero(closing)
+                x_px = np.where(
+                    hit_sl[ids],
+                    sl_price[ids],
+                    np.where(hit_tp[ids], tp_price[ids], close[i]),
+                )
+                why = np.where(hit_sl[ids], _SL, np.where(hit_tp[ids], _TP, _SIGNAL))
+                chunks.append(
+                    (ids, e_i[ids], np.full(len(ids), i), e_price[ids], x_px, why)
+                )
+                in_pos[ids] = False
+                n_open -= len(ids)
+            upd = in_pos & has_trail
+            if upd.any():
+                new_trail = high[i] * trail_f
+                trailing = np.where(upd & (new_trail > trailing), new_trail, trailing)
+                sl_price = np.where(upd & (trailing > sl_price), trailing, sl_price)
+
+        if opening is not None and opening.any():
+            ids = np.flatnonzero(opening)
+            px = close[i]
+            e_i[ids] = i
+            e_price[ids] = px
+            sl_price[ids] = px * sl_f[ids]
+            tp_price[ids] = px * tp_f[ids]
+            trail_ids = ids[has_trail[ids]]
+            trailing[trail_ids] = px * trail_f[trail_ids]
+            sl_price[trail_ids] = np.maximum(sl_price[trail_ids], trailing[trail_ids])
+            in_pos[ids] = True
+            n_open += len(ids)
+
+    if n_open:
+        ids = np.flatnonzero(in_pos)
+        chunks.append(
+            (
+                ids,
+                e_i[ids],
+                np.full(len(ids), n_bars - 1),
+                e_price[ids],
+                np.full(len(ids), close[n_bars - 1]),
+                np.full(len(ids), _END),
+            )
+        )
+
+    if chunks:
+        cfg, *cols = (np.concatenate(c) for c in zip(*chunks))
+    else:
+        cfg = np.empty(0, dtype=np.int64)
+        cols = [cfg, cfg, np.empty(0), np.empty(0), cfg]
+    order = np.argsort(cfg, kind="stable")
+    counts = np.bincount(cfg, minlength=n_cfg)
+    return (counts, *(c[order] for c in cols))
+
+
+def simulate_batch(
+    arrays: PriceArrays,
+    entry_masks: np.ndarray,
+    exit_masks: np.ndarray,
+    sl_pct: np.ndarray,
+    tp_pct: np.ndarray,
+    trailing_stop_pct: np.ndarray | None = None,
+    qty: np.ndarray | None = None,
+) -> BatchResult:
+    """Simulate ``N`` configurations in a single pass over the bars.
+
+    ``entry_masks`` and ``exit_masks`` have shape ``(N, T)``; ``sl_pct``,
+    ``tp_pct``, ``trailing_stop_pct`` and ``qty`` have one value per
+    configuration (``0``/``NaN`` disables the trailing stop, ``qty``
+    defaults to 1).  Each configuration keeps its own position state, so the
+    trades are identical to ``N`` separate calls to :func:`simulate_trades`.
+    """
+
+    entry_masks = np.asarray(entry_masks, dtype=np.bool_)
+    exit_masks = np.asarray(exit_masks, dtype=np.bool_)
+    n_cfg, n_bars = entry_masks.shape
+    if exit_masks.shape != entry_masks.shape or n_bars != len(arrays):
+        raise ValueError("Maschere di forma incompatibile con i prezzi")
+    sl = np.asarray(sl_pct, dtype=np.float64).reshape(n_cfg)
+    tp = np.asarray(tp_pct, dtype=np.float64).reshape(n_cfg)
+    if trailing_stop_pct is None:
+        trail = np.zeros(n_cfg)
+    else:
+        trail = np.nan_to_num(
+            np.asarray(trailing_stop_pct, dtype=np.float64).reshape(n_cfg)
+        )
+
+    # Layout (T, N): una riga per barra, contigua sulle configurazioni.
+    entries_t = np.ascontiguousarray(entry_masks.T)
+    exits_t = np.ascontiguousarray(exit_masks.T)
+    prices = (arrays.high, arrays.low, arrays.close)
+
+    if _simulate_batch_jit is not None:
+        # Ogni configurazione apre al più tanti trade quante sono le sue
+        # entrate: si riserva una regione per configurazione e si compatta.
+        caps = entry_masks.sum(axis=1)
+        starts = np.concatenate(([0], np.cumsum(caps))).astype(np.int64)
+        count, *cols = _simulate_batch_jit(
+            *prices, entries_t, exits_t, sl, tp, trail, starts
+        )
+        pos = np.arange(starts[-1]) - np.repeat(starts[:-1], caps)
+        keep = pos < np.repeat(count, caps)
+        cols = [c[keep] for c in cols]
+    else:
+        count, *cols = _simulate_batch_numpy(*prices, entries_t, exits_t, sl, tp, trail)
+
+    offsets = np.concatenate(([0], np.cumsum(count))).astype(np.int64)
+    if qty is None:
+        return BatchResult(offsets, TradeLedger.from_arrays(*cols))
+    qty = np.repeat(np.asarray(qty, dtype=np.float64).reshape(n_cfg), count)
+    return BatchResult(offsets, TradeLedger.from_arrays(*cols, qty=qty))
+
+
+__all__ = [
+    "ENGINES",
+    "DEFAULT_ENGINE",
+    "PriceArrays",
+    "BatchResult",
+    "simulate_trades",
+    "simulate_metrics",
+    "simulate_trades_event",
+    "simulate_batch",
+]
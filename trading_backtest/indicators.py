@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""Indicatori rolling su più finestre da somme prefisse condivise.
+
+Le somme prefisse di una serie vengono calcolate una sola volta e ogni
+finestra richiesta si ottiene come differenza.  Per limitare la deriva
+numerica su serie lunghe le somme prefisse sono "a blocchi": ripartono da zero
+ogni ``block`` barre e sono calcolate sugli scarti dalla media del blocco,
+quindi il loro modulo dipende dal blocco e non dalla lunghezza o dal livello
+della serie.  Se ``numba`` è installato il kernel per finestra viene
+compilato, altrimenti si usa una versione vettoriale NumPy.
+
+Le medie mobili esponenziali di più span sono calcolate insieme in un solo
+passaggio sulla serie (:func:`ema_spans`).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+try:  # pragma: no cover - optional dependency
+    from numba import njit
+except ImportError:  # numba è una dipendenza opzionale
+    njit = None
+
+MIN_BLOCK = 64
+
+_MEAN = 0
+_STD = 1
+
+
+def _window_stat(incl, excl, rest, ref, block, w, need, ddof, stat):
+    """Kernel: rolling mean or std of window ``w`` from blocked prefix sums.
+
+    Rows of ``incl``/``excl``/``rest`` are count, s1 and (for the std) s2;
+    see :class:`PrefixSums`.  Bars with fewer than ``need`` valid values are
+    NaN.
+    """
+
+    n = incl.shape[1]
+    out = np.empty(n)
+    pos = 0
+    for i in range(n):
+        if pos == block:
+            pos = 0
+        if i < w - 1:
+            c = incl[0, i]
+            s1 = incl[1, i]
+            s2 = incl[2, i] if stat == _STD else 0.0
+        elif pos >= w - 1:
+            h = i - w + 1
+            c = incl[0, i] - excl[0, h]
+            s1 = incl[1, i] - excl[1, h]
+            s2 = incl[2, i] - excl[2, h] if stat == _STD else 0.0
+        else:
+            # La finestra attraversa il confine: coda del blocco precedente
+            # riportata al riferimento del blocco di ``i``
+            h = i - w + 1
+            d = ref[h] - ref[i]
+            hc = rest[0, h]
+            h1 = rest[1, h]
+            c = incl[0, i] + hc
+            s1 = incl[1, i] + h1 + hc * d
+            s2 = 0.0
+            if stat == _STD:
+                s2 = incl[2, i] + rest[2, h] + 2 * d * h1 + hc * d * d
+        pos += 1
+        if c < need or c < 1:
+            out[i] = np.nan
+        elif stat == _MEAN:
+            out[i] = s1 / c + ref[i]
+        elif c <= ddof:
+            out[i] = np.nan
+        else:
+            out[i] = np.sqrt(max((s2 - s1 * s1 / c) / (c - ddof), 0.0))
+    return out
+
+
+_window_stat_jit = njit(cache=True, nogil=True)(_window_stat) if njit else None
+
+
+class PrefixSums:
+    """Blocked prefix sums of a 1-D series, ignoring NaN like pandas.
+
+    Every block is centred on its own mean, stored per bar in ``ref``.  For
+    the number of valid values, the sum of deviations and (with
+    ``moments=2``) the sum of squared deviations, three arrays are kept: the
+    sum from the start of the block up to ``i`` included, up to ``i``
+    excluded and from ``i`` to the end of the block.  Any trailing window no
+    longer than ``block`` is then answered in ``O(1)``.
+    """
+
+    def __init__(
+        self, values: np.ndarray, block: int = MIN_BLOCK, moments: int = 2
+    ) -> None:
+        x = np.asarray(values, dtype=np.float64)
+        n = len(x)
+        self.n = n
+        self.block = block
+        self.moments = moments
+        pad = (-n) % block
+        x = np.concatenate([x, np.full(pad, np.nan)]).reshape(-1, block)
+        valid = ~np.isnan(x)
+        counts = valid.sum(axis=1)
+        totals = np.where(valid, x, 0.0).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ref = np.where(counts > 0, totals / counts, 0.0)
+        dev = np.where(valid, x - ref[:, None], 0.0)
+        self.ref = np.repeat(ref, block)[:n]
+        terms = [valid.astype(np.float64), dev]
+        if moments == 2:
+            terms.append(dev * dev)
+        terms = np.stack(terms)
+        incl = np.cumsum(terms, axis=2)
+        excl = incl - terms
+        rest = incl[:, :, -1:] - excl
+        self._incl, self._excl, self._rest = (
+            np.ascontiguousarray(a.reshape(len(terms), -1)[:, :n])
+            for a in (incl, excl, rest)
+        )
+
+    def _stat(self, w: int, need: int, ddof: int, stat: int) -> np.ndarray:
+        if w > self.block:
+            raise ValueError(f"Finestra {w} più ampia del blocco {self.block}")
+        if stat == _STD and self.moments < 2:
+            raise ValueError("Servono le somme dei quadrati (moments=2)")
+        args = (self._incl, self._excl, self._rest, self.ref, self.block, w)
+        if _window_stat_jit is not None:
+            return _window_stat_jit(*args, need, ddof, stat)
+        return self._stat_numpy(w, need, ddof, stat)
+
+    def _stat_numpy(self, w: int, need: int, ddof: int, stat: int) -> np.ndarray:
+        n = self.n
+        c, s1, *s2 = (row.copy() for row in self._incl)
+        if w < n:
+            tail = slice(w - 1, n)
+            head = slice(0, n - w + 1)
+            for acc, a, e in zip([c, s1, *s2], self._incl, self._excl):
+                acc[tail] = a[tail] - e[head]
+            i = np.arange(w - 1, n)
+            i = i[i % self.block < w - 1]
+            h = i - w + 1
+            d = self.ref[h] - self.ref[i]
+            hc, h1 = self._rest[0, h], self._rest[1, h]
+            c[i] = self._incl[0, i] + hc
+            s1[i] = self._incl[1, i] + h1 + hc * d
+            if s2:
+                h2 = self._rest[2, h]
+                s2[0][i] = self._incl[2, i] + h2 + 2 * d * h1 + hc * d * d
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if stat == _MEAN:
+                out = s1 / c + self.ref
+            else:
+                out = np.sqrt(np.maximum((s2[0] - s1 * s1 / c) / (c - ddof), 0.0))
+                out[c <= ddof] = np.nan
+        out[(c < need) | (c < 1)] = np.nan
+        return out
+
+    @classmethod
+    def for_windows(
+        cls, values: np.ndarray, windows: Iterable[int], moments: int = 2
+    ) -> "PrefixSums":
+        """Build prefix sums with a block size suited to ``windows``."""
+        return cls(values, _block_for(list(windows)), moments=moments)
+
+    def mean(
+        self, w: int, min_periods: int | None = None, shift: int = 0
+    ) -> np.ndarray:
+        """Rolling mean like ``Series.rolling(w, min_periods).mean().shift()``."""
+        need = w if min_periods is None else min_periods
+        return _shifted(self._stat(w, need, 0, _MEAN), shift)
+
+    def std(self, w: int, ddof: int = 1, shift: int = 0) -> np.ndarray:
+        """Rolling std like ``Series.rolling(w).std(ddof).shift(shift)``."""
+        return _shifted(self._stat(w, w, ddof, _STD), shift)
+
+
+def _block_for(windows: list[int]) -> int:
+    # Blocchi più ampi delle finestre: pochi attraversamenti del confine
+    return max([MIN_BLOCK, *(8 * w for w in windows)])
+
+
+def _shifted(values: np.ndarray, shift: int) -> np.ndarray:
+    if not shift:
+        return values
+    out = np.full(len(values), np.nan)
+    out[shift:] = values[: len(values) - shift]
+    return out
+
+
+def rolling_mean(
+    values: np.ndarray,
+    windows: Iterable[int],
+    min_periods: int | None = None,
+    shift: int = 0,
+) -> dict[int, np.ndarray]:
+    """Rolling mean of ``values`` for every window, from one prefix-sum pass.
+
+    Matches ``Series.rolling(w, min_periods).mean().shift(shift)``;
+    ``min_periods`` defaults to the window length.
+    """
+
+    windows = sorted(set(windows))
+    if not windows:
+        return {}
+    ps = PrefixSums.for_windows(values, windows, moments=1)
+    return {w: ps.mean(w, min_periods, shift) for w in windows}
+
+
+def rolling_std(
+    values: np.ndarray,
+    windows: Iterable[int],
+    ddof: int = 1,
+    shift: int = 0,
+) -> dict[int, np.ndarray]:
+    """Rolling standard deviation for every window, from one prefix-sum pass.
+
+    Matches ``Series.rolling(w).std(ddof).shift(shift)``.
+    """
+
+    windows = sorted(set(windows))
+    if not windows:
+        return {}
+    ps = PrefixSums.for_windows(values, windows)
+    return {w: ps.std(w, ddof, shift) for w in windows}
+
+
+def _ema(values, alphas):
+    """Kernel: ``ewm(alpha, adjust=False).mean()`` for every alpha at once.
+
+    Same recurrence as pandas, NaN handling included: a missing value keeps
+    the previous mean and decays its weight.
+    """
+
+    n = len(values)
+    k = len(alphas)
+    out = np.empty((k, n))
+    weighted = np.full(k, np.nan)
+    old_wt = np.ones(k)
+    for i in range(n):
+        cur = values[i]
+        is_obs = cur == cur
+        for j in range(k):
+            if weighted[j] == weighted[j]:
+                old_wt[j] *= 1.0 - alphas[j]
+                if is_obs:
+                    if weighted[j] != cur:
+                        weighted[j] = old_wt[j] * weighted[j] + alphas[j] * cur
+                        weighted[j] /= old_wt[j] + alphas[j]
+                    old_wt[j] = 1.0
+            elif is_obs:
+                weighted[j] = cur
+            out[j, i] = weighted[j]
+    return out
+
+
+_ema_jit = njit(cache=True, nogil=True)(_ema) if njit else None
+
+
+def ema_spans(
+    values: np.ndarray, spans: Iterable[int], shift: int = 0
+) -> dict[int, np.ndarray]:
+    """Exponential moving average of ``values`` for every span, in one pass.
+
+    Matches ``Series.ewm(span=s, adjust=False).mean().shift(shift)``.
+    """
+
+    spans = sorted(set(spans))
+    if not spans:
+        return {}
+    x = np.ascontiguousarray(values, dtype=np.float64)
+    if _ema_jit is not None:
+        alphas = np.array([2.0 / (1.0 + s) for s in spans])
+        rows = _ema_jit(x, alphas)
+        return {s: _shifted(rows[j], shift) for j, s in enumerate(spans)}
+    series = pd.Series(x)
+    return {
+        s: _shifted(series.ewm(span=s, adjust=False).mean().to_numpy(), shift)
+        for s in spans
+    }
+
+
+__all__ = ["PrefixSums", "rolling_mean", "rolling_std", "ema_spans"]
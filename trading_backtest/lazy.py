@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""Frame di indicatori calcolati alla prima richiesta.
+
+Invece di calcolare in anticipo ogni finestra di ogni spazio dei parametri,
+:class:`LazyIndicatorFrame` calcola una colonna come ``sma_135`` solo quando
+una strategia la legge, la memorizza e libera le colonne usate meno di
+recente quando viene superato il limite di memoria.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Iterable, Mapping
+
+import pandas as pd
+
+from .cache import IndicatorCache
+from .config import INDICATOR_MEMORY_MB, log
+from .data import compute_indicator_columns, trim_warmup
+from .registry import IndicatorSpec, periods_from_specs
+
+
+class LazyIndicatorFrame:
+    """Read-only view of ``df`` that computes indicator columns on access.
+
+    ``frame["sma_20"]`` returns the column as a Series, computing it (or
+    mapping it from ``cache``) the first time.  Columns of ``df`` are always
+    available; computed ones are kept until their total size exceeds
+    ``max_bytes`` and are then evicted least recently used first.  The
+    array-based engines only need ``frame[name]`` and ``name in frame``;
+    :meth:`copy` gives a plain DataFrame for the DataFrame hooks.
+
+    The warm-up bars of ``df`` (``df.attrs["warmup"]``, see
+    :func:`~trading_backtest.data.load_price_data`) are used to compute the
+    indicators but are not part of the view.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        cache: IndicatorCache | None = None,
+        max_bytes: int = INDICATOR_MEMORY_MB << 20,
+    ) -> None:
+        self._base = df
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self._warmup = df.attrs.get("warmup", 0)
+        self._index = pd.RangeIndex(len(df) - self._warmup)
+        self._columns: OrderedDict[str, pd.Series] = OrderedDict()
+
+    # ---------------- interfaccia tipo DataFrame ------------
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, name: object) -> bool:
+        return (
+            name in self._base
+            or name in self._columns
+            or (isinstance(name, str) and IndicatorSpec.from_column(name) is not None)
+        )
+
+    def __getitem__(self, key: str | list[str]) -> pd.Series | pd.DataFrame:
+        if isinstance(key, list):
+            return pd.DataFrame({k: self[k] for k in key}, index=self.index)
+        if key in self._base:
+            return self._view(self._base[key])
+        if key not in self._columns:
+            self._compute([key])
+        self._columns.move_to_end(key)
+        return self._columns[key]
+
+    @property
+    def index(self) -> pd.Index:
+        return self._index
+
+    @property
+    def columns(self) -> pd.Index:
+        """Base columns plus the indicator columns computed so far."""
+        return self._base.columns.append(pd.Index(list(self._columns)))
+
+    def copy(self) -> pd.DataFrame:
+        """Return a DataFrame with the base and the computed columns."""
+        extra = pd.DataFrame(dict(self._columns), index=self.index)
+        return pd.concat([trim_warmup(self._base), extra], axis=1)
+
+    # ---------------- calcolo e memoria -----------------------
+    def prefetch(self, periods: Mapping[str, Iterable[int]]) -> None:
+        """Compute in one pass the windows listed in ``periods``.
+
+        ``periods`` has the layout of :func:`gather_indicator_periods`; it is
+        only a hint, missing windows are still computed on access.
+        """
+        self._store(compute_indicator_columns(self._base, cache=self.cache, **periods))
+
+    def _compute(self, names: list[str]) -> None:
+        specs = [IndicatorSpec.from_column(name) for name in names]
+        if None in specs:
+            raise KeyError(names[specs.index(None)])
+        log.debug("Calcolo indicatori su richiesta: %s", ", ".join(names))
+        periods = periods_from_specs(specs)
+        self._store(compute_indicator_columns(self._base, cache=self.cache, **periods))
+
+    def _view(self, col: pd.Series) -> pd.Series:
+        # Colonna senza le barre di warm-up, senza copiare i dati
+        if not self._warmup:
+            return col
+        values = col.to_numpy()[self._warmup :]
+        return pd.Series(values, index=self._index, name=col.name, copy=False)
+
+    def _store(self, cols: Mapping[str, pd.Series]) -> None:
+        for name, col in cols.items():
+            self._columns.pop(name, None)
+            col.name = name
+            self._columns[name] = self._view(col)
+        # Libera le colonne meno recenti, mai quelle appena calcolate
+        while self.nbytes > self.max_bytes and len(self._columns) > len(cols):
+            self._columns.popitem(last=False)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by computed columns; aliased arrays count once."""
+        buffers = {}
+        for col in self._columns.values():
+            values = col.to_numpy()
+            buffers[values.__array_interface__["data"][0]] = values.nbytes
+        return sum(buffers.values())
+
+
+__all__ = ["LazyIndicatorFrame"]
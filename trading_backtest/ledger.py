@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Registro compatto dei trade in forma struct-of-arrays."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+class ExitReason(IntEnum):
+    """Why a trade was closed."""
+
+    SL = 1
+    TP = 2
+    SIGNAL = 3
+    END = 4
+
+
+@dataclass(frozen=True)
+class TradeLedger:
+    """Trades stored as parallel NumPy arrays.
+
+    Bar positions are ``int64``, prices and quantity ``float64`` and the exit
+    reason an ``int8`` :class:`ExitReason` code.  Timestamps and DataFrames are
+    only built by :meth:`to_frame`.
+    """
+
+    entry_idx: np.ndarray
+    exit_idx: np.ndarray
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    qty: np.ndarray
+    reason: np.ndarray
+
+    @classmethod
+    def from_arrays(
+        cls,
+        entry_idx: np.ndarray,
+        exit_idx: np.ndarray,
+        entry_price: np.ndarray,
+        exit_price: np.ndarray,
+        reason: np.ndarray,
+        qty: float | np.ndarray = 1.0,
+    ) -> "TradeLedger":
+        entry_idx = np.asarray(entry_idx, dtype=np.int64)
+        return cls(
+            entry_idx=entry_idx,
+            exit_idx=np.asarray(exit_idx, dtype=np.int64),
+            entry_price=np.asarray(entry_price, dtype=np.float64),
+            exit_price=np.asarray(exit_price, dtype=np.float64),
+            qty=np.broadcast_to(np.asarray(qty, dtype=np.float64), entry_idx.shape),
+            reason=np.asarray(reason, dtype=np.int8),
+        )
+
+    @classmethod
+    def empty(cls) -> "TradeLedger":
+        return cls.from_arrays([], [], [], [], [])
+
+    def __len__(self) -> int:
+        return len(self.entry_idx)
+
+    def __getitem__(self, key: slice | np.ndarray) -> "TradeLedger":
+        return TradeLedger(
+            self.entry_idx[key],
+            self.exit_idx[key],
+            self.entry_price[key],
+            self.exit_price[key],
+            self.qty[key],
+            self.reason[key],
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self) == 0
+
+    def pct_change(self) -> np.ndarray:
+        """Return the percentage return of every trade."""
+        return (self.exit_price / self.entry_price - 1) * 100
+
+    def to_frame(
+        self, timestamps: Any = None, with_reason: bool = False
+    ) -> pd.DataFrame:
+        """Return the trades in the DataFrame layout of ``generate_trades``.
+
+        ``timestamps`` maps bar positions to times (Series or array); without
+        it the bar positions themselves are used.
+        """
+
+        if timestamps is None:
+            entry_time, exit_time = self.entry_idx, self.exit_idx
+        elif isinstance(timestamps, pd.Series):
+            entry_time = timestamps.take(self.entry_idx).reset_index(drop=True)
+            exit_time = timestamps.take(self.exit_idx).reset_index(drop=True)
+        else:
+            timestamps = np.asarray(timestamps)
+            entry_time, exit_time = (
+                timestamps[self.entry_idx],
+                timestamps[self.exit_idx],
+            )
+        frame = pd.DataFrame(
+            {
+                "entry_time": entry_time,
+                "exit_time": exit_time,
+                "entry": self.entry_price,
+                "exit": self.exit_price,
+                "pct_change": self.pct_change(),
+                "qty": self.qty,
+            }
+        )
+        if with_reason:
+            frame["reason"] = pd.Categorical.from_codes(
+                self.reason - 1, [r.name for r in ExitReason]
+            )
+        return frame
+
+
+__all__ = ["ExitReason", "TradeLedger"]
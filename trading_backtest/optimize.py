@@ -1,15 +1,29 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 from typing import Any, Callable, Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass, fields
+from pathlib import Path
 import dataclasses
+import tempfile
+import warnings
+import numpy as np
 import pandas as pd
 import optuna
 from tqdm import tqdm
 from .performance import PerformanceAnalyzer
+from .cache import IndicatorCache
 from .data import add_indicator_cache
+from .engine import DEFAULT_ENGINE, PriceArrays, simulate_batch
+from .lazy import LazyIndicatorFrame
+from .ledger import TradeLedger
+from .registry import IndicatorSpec, periods_from_specs, specs_from_periods
+from .results import ResultStore, config_key
+from .shared import SharedFrame, SharedFrameHandle, attach
+from .strategy import STRATEGY_REGISTRY, get_strategy
 from .config import (
     log,
+    STUDY_HEARTBEAT,
     SMAConfig,
     RSIConfig,
     BreakoutConfig,
@@ -128,47 +142,12 @@ PARAM_SPACES = {
 }
 
 
-def _int_values(param: tuple) -> list[int]:
-    """Return all integer values represented by ``param``."""
-
-    t, low, high, *rest = param
-    if t != "int":
-        return []
-    step = rest[0] if rest else 1
-    return list(range(low, high + 1, step))
-
-
 def gather_indicator_periods(strategy_name: str) -> dict[str, list[int]]:
     """Return indicator windows required by the strategy's parameter space."""
 
-    ps = PARAM_SPACES[strategy_name]
-    res: dict[str, set[int]] = {
-        "sma": set(),
-        "rsi": set(),
-        "atr": set(),
-        "vol": set(),
-        "imp": set(),
-        "hmax": set(),
-        "bb": set(),
-    }
-
-    if strategy_name == "sma":
-        res["sma"].update(_int_values(ps.sma_fast))
-        res["sma"].update(_int_values(ps.sma_slow))
-        res["sma"].update(v for v in ps.sma_trend[1] if isinstance(v, int))
-    elif strategy_name == "rsi":
-        res["rsi"].update(_int_values(ps.period))
-    elif strategy_name == "breakout":
-        res["hmax"].update(_int_values(ps.lookback))
-        res["atr"].update(_int_values(ps.atr_period))
-    elif strategy_name == "bollinger":
-        res["bb"].update(_int_values(ps.period))
-    elif strategy_name == "momentum":
-        res["imp"].update(_int_values(ps.window))
-    elif strategy_name == "vol_expansion":
-        res["vol"].update(_int_values(ps.vol_window))
-
-    return {k: sorted(v) for k, v in res.items() if v}
+    return gather_all_indicator_periods(
+        PARAM_SPACES[strategy_name], strategy_name=strategy_name
+    )
 
 
 def _value_list(value: Any) -> list[int]:
@@ -197,76 +176,68 @@ def _value_list(value: Any) -> list[int]:
     return []
 
 
-def gather_all_indicator_periods(params: Any) -> dict[str, list[int]]:
-    """Return indicator windows required by a parameter space or grid list."""
-
-    res: dict[str, set[int]] = {
-        "sma": set(),
-        "rsi": set(),
-        "atr": set(),
-        "vol": set(),
-        "imp": set(),
-        "hmax": set(),
-        "bb": set(),
-    }
-
-    def process(p: Mapping[str, Any]) -> None:
-        # Determine strategy to disambiguate ``period``
-        strat = None
-        if any(k.startswith("sma_") for k in p):
-            strat = "sma"
-        elif "nstd" in p:
-            strat = "bollinger"
-        elif "vol_threshold" in p:
-            strat = "vol_expansion"
-        elif "threshold" in p and "window" in p:
-            strat = "momentum"
-        elif "lookback" in p or "atr_period" in p:
-            strat = "breakout"
-        elif (
-            "oversold" in p
-            and "period" in p
-            and not {"k_period", "d_period"} & p.keys()
-        ):
-            strat = "rsi"
-
-        for name, val in p.items():
-            vals = _value_list(val)
-            if name in {"sma_fast", "sma_slow", "sma_trend"}:
-                res["sma"].update(vals)
-            elif name == "period":
-                if strat == "rsi":
-                    res["rsi"].update(vals)
-                elif strat == "bollinger":
-                    res["bb"].update(vals)
-            elif name == "lookback":
-                res["hmax"].update(vals)
-            elif name == "atr_period":
-                res["atr"].update(vals)
-            elif name == "window":
-                res["imp"].update(vals)
-            elif name == "vol_window":
-                res["vol"].update(vals)
+def _candidate_values(params: Mapping[str, Any]) -> dict[str, list[int]]:
+    return {name: _value_list(val) for name, val in params.items()}
+
+
+def _strategies_for(keys: set[str]) -> list[type]:
+    """Return the strategies whose config best matches the parameter ``keys``.
+
+    A strategy matches when its config accepts every key; among those the
+    ones with the fewest unused fields win (ties are all returned).
+    """
+
+    matches = []
+    for strategy_cls, config_cls in STRATEGY_REGISTRY.values():
+        names = {f.name for f in fields(config_cls)}
+        if keys <= names:
+            matches.append((len(names - keys), strategy_cls))
+    if not matches:
+        return []
+    best = min(extra for extra, _ in matches)
+    return [cls for extra, cls in matches if extra == best]
+
+
+def gather_all_indicator_periods(
+    params: Any, strategy_name: str | None = None
+) -> dict[str, list[int]]:
+    """Return indicator windows required by a parameter space or grid list.
+
+    The indicators come from the ``indicator_params`` declared by the
+    strategy; without ``strategy_name`` it is identified from the parameter
+    names.
+    """
 
     if isinstance(params, list):
-        for d in params:
-            process(d)
+        combos = params
     elif dataclasses.is_dataclass(params):
-        process({f.name: getattr(params, f.name) for f in dataclasses.fields(params)})
+        combos = [{f.name: getattr(params, f.name) for f in fields(params)}]
     elif isinstance(params, Mapping):
-        process(params)
+        combos = [params]
     else:
         raise TypeError("Unsupported parameter container")
 
-    for v in res.values():
-        v.discard(None)
-    return {k: sorted(v) for k, v in res.items() if v}
+    specs: set[IndicatorSpec] = set()
+    for p in combos:
+        if strategy_name is not None:
+            strategies = [get_strategy(strategy_name)[0]]
+        else:
+            strategies = _strategies_for(set(p))
+        values = _candidate_values(p)
+        for strategy_cls in strategies:
+            specs.update(strategy_cls.indicator_specs(values))
+    return periods_from_specs(specs)
 
 
-def ensure_indicator_cache(df: pd.DataFrame, params: Any) -> dict[str, list[int]]:
+def ensure_indicator_cache(
+    df: pd.DataFrame,
+    params: Any,
+    cache: IndicatorCache | None = None,
+    strategy_name: str | None = None,
+) -> dict[str, list[int]]:
     """Populate indicator columns based on ``params`` and validate their presence."""
 
-    periods = gather_all_indicator_periods(params)
+    periods = gather_all_indicator_periods(params, strategy_name=strategy_name)
     add_indicator_cache(
         df,
         sma=periods.get("sma", []),
@@ -276,31 +247,17 @@ def ensure_indicator_cache(df: pd.DataFrame, params: Any) -> dict[str, list[int]
         imp=periods.get("imp", []),
         hmax=periods.get("hmax", []),
         bb=periods.get("bb", []),
+        ema=periods.get("ema", []),
+        stoch=periods.get("stoch", []),
+        cache=cache,
     )
 
-    missing = []
-    for p in periods.get("sma", []):
-        if f"sma_{p}" not in df:
-            missing.append(f"sma_{p}")
-    for p in periods.get("rsi", []):
-        if f"rsi_{p}" not in df:
-            missing.append(f"rsi_{p}")
-    for p in periods.get("atr", []):
-        if f"atr_{p}" not in df:
-            missing.append(f"atr_{p}")
-    for p in periods.get("vol", []):
-        if f"vol_{p}" not in df:
-            missing.append(f"vol_{p}")
-    for p in periods.get("imp", []):
-        if f"impulse_{p}" not in df:
-            missing.append(f"impulse_{p}")
-    for p in periods.get("hmax", []):
-        if f"hmax_{p}" not in df:
-            missing.append(f"hmax_{p}")
-    for p in periods.get("bb", []):
-        if f"bbm_{p}" not in df or f"bbs_{p}" not in df:
-            missing.append(f"bb_{p}")
-
+    missing = [
+        col
+        for spec in specs_from_periods(periods)
+        for col in spec.columns
+        if col not in df
+    ]
     if missing:
         raise KeyError(f"Colonne mancanti: {', '.join(missing)}")
 
@@ -331,7 +288,9 @@ def suggest(trial, param_info, name=None):
             raise ValueError(
                 f"[ERROR] Parametro FLOAT range invertito: {name} low={low}, high={high}"
             )
-        return trial.suggest_float(name=name, low=low, high=high)
+        # Il passo, se indicato, è la risoluzione distinta dalla strategia
+        step = rest[0] if rest else None
+        return trial.suggest_float(name=name, low=low, high=high, step=step)
     elif t == "cat":
         categories = args[0]
         return trial.suggest_categorical(name=name, choices=categories)
@@ -412,12 +371,32 @@ def prune_random_forest(params, trial):
         raise optuna.TrialPruned()
 
 
+# Funzione di prune di ogni strategia di PARAM_SPACES
+PRUNE_FUNCS = {
+    "sma": prune_sma,
+    "rsi": prune_rsi,
+    "breakout": prune_breakout,
+    "bollinger": prune_bollinger,
+    "momentum": prune_momentum,
+    "vol_expansion": prune_vol_expansion,
+    "macd": prune_macd,
+    "stochastic": prune_stochastic,
+    "random_forest": prune_random_forest,
+}
+
+
 # ---------------------- STRATEGY EVALUATION -----------------------------
+COMMISSION = 0.1
+SLIPPAGE = 0.05
+
+
 def evaluate_strategy(
     df: pd.DataFrame,
     make_strategy: Callable[[], Any],
     *,
     with_sharpe: bool = False,
+    engine: str = DEFAULT_ENGINE,
+    results: ResultStore | None = None,
 ) -> float:
     """Return a score for the given strategy on ``df``.
 
@@ -425,41 +404,151 @@ def evaluate_strategy(
     and the Sharpe ratio computed by :class:`PerformanceAnalyzer`.  This can be
     useful during optimization to favour strategies with a better risk/return
     profile while remaining backward compatible when the flag is ``False``.
+    ``engine`` selects the trade simulation backend (see
+    :mod:`trading_backtest.engine`).  With a ``results`` store a result
+    already stored for the same data, strategy config, input columns, costs
+    and engine is returned without simulating, and new results are stored.
     """
 
     strat = make_strategy()
-    trades = strat.generate_trades(df)
-    pa = PerformanceAnalyzer(trades, commission=0.1, slippage=0.05)
+    if results is not None:
+        key = results.key(df, strat, engine, COMMISSION, SLIPPAGE)
+        metrics = results.get(key)
+        if metrics is None:
+            ledger = None
+            if engine != "loop" and results.trades:
+                ledger = strat.simulate(df, engine=engine)
+                pa = PerformanceAnalyzer(
+                    ledger, commission=COMMISSION, slippage=SLIPPAGE
+                )
+            else:
+                pa = _analyze(strat, df, engine)
+            metrics = results.put(key, pa, ledger)
+        score = metrics["total_return"]
+        if with_sharpe:
+            score += metrics["sharpe_ratio"]
+        return score
+
+    pa = _analyze(strat, df, engine)
     score = pa.total_return()
     if with_sharpe:
         score += pa.sharpe_ratio()
     return score
 
 
+def _analyze(strat, df: pd.DataFrame, engine: str):
+    if engine == "loop":
+        trades = strat.generate_trades(df, engine=engine)
+        return PerformanceAnalyzer(trades, commission=COMMISSION, slippage=SLIPPAGE)
+    # Percorso solo-punteggio: nessun trade né DataFrame materializzato
+    return strat.simulate_metrics(
+        df, commission=COMMISSION, slippage=SLIPPAGE, engine=engine
+    )
+
+
 # ---------------------- OBJECTIVE GENERICO ---------------------------
+# Risoluzione dei float campionati senza passo nella chiave della memo: valori
+# più vicini di così contano come la stessa configurazione
+PARAM_RESOLUTION: dict[str, float] = {
+    "position_size": 0.01,
+    "trailing_stop_pct": 0.1,
+    "atr_mult": 0.1,
+}
+
+
+def canonical_params(params: Mapping[str, Any]) -> str:
+    """Return a hashable key identifying the configuration ``params``.
+
+    Floats are rounded (see :func:`~trading_backtest.results.config_key`), so
+    stepped values that differ only by floating point noise share the key;
+    the continuous ranges of :data:`PARAM_RESOLUTION` are rounded to their
+    resolution, so the memo also hits on nearby samples.
+    """
+    return config_key(params, PARAM_RESOLUTION)
+
+
+class MemoizedObjective:
+    """Optuna objective that backtests each distinct configuration once.
+
+    Stepped parameter spaces are small, so TPE often suggests a
+    configuration it has already tried; its score is then returned from
+    :attr:`scores` without running the backtest again.  :attr:`hits` and
+    :attr:`misses` count reused and computed scores.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        strategy_cls,
+        config_cls,
+        param_space,
+        prune_logic=None,
+        results: ResultStore | None = None,
+    ) -> None:
+        self.df = df
+        self.strategy_cls = strategy_cls
+        self.config_cls = config_cls
+        self.param_space = param_space
+        self.prune_logic = prune_logic
+        self.results = results
+        self.scores: dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, trial) -> float:
+        if hasattr(self.param_space, "suggest"):
+            params = self.param_space.suggest(trial)
+        else:
+            params = {
+                name: suggest(trial, info, name=name)
+                for name, info in self.param_space.items()
+            }
+        if self.prune_logic is not None:
+            self.prune_logic(params, trial)
+        key = canonical_params(params)
+        if key in self.scores:
+            self.hits += 1
+            return self.scores[key]
+        self.misses += 1
+        config = self.config_cls(**params)
+        score = evaluate_strategy(
+            self.df, lambda: self.strategy_cls(config), results=self.results
+        )
+        self.scores[key] = score
+        return score
+
+    def remember(self, trials: list[optuna.trial.FrozenTrial]) -> None:
+        """Add the scores of completed ``trials`` (e.g. of a resumed study)."""
+        for trial in trials:
+            if trial.state == optuna.trial.TrialState.COMPLETE:
+                self.scores.setdefault(canonical_params(trial.params), trial.value)
+
+    def log_stats(self) -> None:
+        total = self.hits + self.misses
+        log.info(
+            "Configurazioni ripetute: %d su %d trial (%d backtest)",
+            self.hits,
+            total,
+            self.misses,
+        )
+
+
 def make_objective(
     df: pd.DataFrame,
     strategy_cls,
     config_cls,
     param_space,
     prune_logic=None,
-):
-    """Create an Optuna objective for the provided strategy class."""
-
-    def objective(trial):
-        if hasattr(param_space, "suggest"):
-            params = param_space.suggest(trial)
-        else:
-            params = {
-                name: suggest(trial, info, name=name)
-                for name, info in param_space.items()
-            }
-        if prune_logic is not None:
-            prune_logic(params, trial)
-        config = config_cls(**params)
-        return evaluate_strategy(df, lambda: strategy_cls(config))
+    results: ResultStore | None = None,
+) -> MemoizedObjective:
+    """Create an Optuna objective for the provided strategy class.
 
-    return objective
+    Repeated configurations are scored once (see :class:`MemoizedObjective`);
+    ``results`` is consulted as in :func:`evaluate_strategy`.
+    """
+    return MemoizedObjective(
+        df, strategy_cls, config_cls, param_space, prune_logic, results
+    )
 
 
 # ---------------------- OPTIMIZZA GENERICO ---------------------------
@@ -470,11 +559,62 @@ def optimize_with_optuna(
     param_space,
     prune_logic=None,
     n_trials: int = 300,
+    workers: int = 1,
+    storage: str | Path | None = None,
+    study_name: str | None = None,
+    resume: bool = False,
+    results: ResultStore | None = None,
 ) -> optuna.FrozenTrial:
-    """Run Optuna optimization and return the best trial."""
-    study = optuna.create_study(direction="maximize")
-    objective = make_objective(df, strategy_cls, config_cls, param_space, prune_logic)
-    study.optimize(objective, n_trials=n_trials, show_progress_bar=True)
+    """Run Optuna optimization and return the best trial.
+
+    ``storage`` (see :func:`open_storage`) keeps the study ``study_name`` on
+    disk or in a database shared with ``worker`` processes on other machines
+    (see :mod:`trading_backtest.study`); trials already stored there count
+    towards the best trial.  With ``workers > 1`` the trials run in a pool of
+    local processes pulling from the same study, through a temporary journal
+    file when no ``storage`` is given.  With ``resume`` the trials already
+    finished in the stored study count towards ``n_trials``, so an
+    interrupted run only runs the missing ones.  ``results`` is consulted
+    as in :func:`evaluate_strategy`.
+    """
+    if workers > 1 and storage is None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "study.log"
+            study = _optimize_study(
+                df,
+                strategy_cls,
+                config_cls,
+                param_space,
+                prune_logic,
+                n_trials,
+                workers,
+                path,
+                study_name,
+                resume,
+                results,
+            )
+            # Copia in memoria: il journal viene cancellato con la directory
+            memory = optuna.storages.InMemoryStorage()
+            optuna.copy_study(
+                from_study_name=study.study_name,
+                from_storage=open_storage(path),
+                to_storage=memory,
+            )
+            study = optuna.load_study(study_name=study.study_name, storage=memory)
+    else:
+        study = _optimize_study(
+            df,
+            strategy_cls,
+            config_cls,
+            param_space,
+            prune_logic,
+            n_trials,
+            workers,
+            storage,
+            study_name,
+            resume,
+            results,
+        )
     try:
         trial = study.best_trial
         log.info("🏆 Best params: %s (%.2f%%)", study.best_params, study.best_value)
@@ -485,8 +625,191 @@ def optimize_with_optuna(
         return study.trials[-1]
 
 
+# Stati dei trial conclusi
+FINISHED_STATES = (
+    optuna.trial.TrialState.COMPLETE,
+    optuna.trial.TrialState.PRUNED,
+    optuna.trial.TrialState.FAIL,
+)
+
+
+def open_storage(url: str | Path | None) -> optuna.storages.BaseStorage | None:
+    """Return the Optuna storage for ``url``.
+
+    ``None`` means in memory.  ``journal:PATH`` or a path ending in ``.log``
+    is a journal file, which works on a shared filesystem; any other value is
+    a database URL such as ``sqlite:///studies.db``.  On databases running
+    trials send a heartbeat every ``STUDY_HEARTBEAT`` seconds, so the trials
+    of a killed worker are failed and run again; journal files have no
+    heartbeat.
+    """
+    if url is None:
+        return None
+    url = str(url)
+    if url.startswith("journal:") or url.endswith(".log"):
+        path = url.removeprefix("journal:")
+        backend = optuna.storages.journal.JournalFileBackend(path)
+        return optuna.storages.JournalStorage(backend)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", optuna.exceptions.ExperimentalWarning)
+        return optuna.storages.RDBStorage(
+            url, heartbeat_interval=STUDY_HEARTBEAT, grace_period=2 * STUDY_HEARTBEAT
+        )
+
+
+# Trial che consumano il budget di uno studio: quelli falliti (per esempio
+# trial rimasti RUNNING di un worker terminato) vengono rieseguiti
+BUDGET_STATES = (
+    optuna.trial.TrialState.COMPLETE,
+    optuna.trial.TrialState.PRUNED,
+    optuna.trial.TrialState.RUNNING,
+)
+
+
+def fail_stale_trials(study: optuna.Study) -> None:
+    """Fail the running trials whose worker stopped sending heartbeats.
+
+    Only database storages have heartbeats (see :func:`open_storage`); on
+    journal files and in memory this does nothing.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", optuna.exceptions.ExperimentalWarning)
+        optuna.storages.fail_stale_trials(study)
+
+
+def run_trials(
+    study: optuna.Study,
+    objective: MemoizedObjective,
+    total: int,
+    n_trials: int | None = None,
+    show_progress_bar: bool = False,
+) -> None:
+    """Run trials of ``study`` until it holds ``total`` of them.
+
+    This is the loop of every process working on a study: the serial run and
+    the local processes of :func:`optimize_with_optuna` as well as the
+    ``worker`` command of :mod:`trading_backtest.study`.  Completed, pruned
+    and running trials count, those of other processes included; failed
+    ones are run again.  ``n_trials`` caps the trials run by this process.
+    """
+    fail_stale_trials(study)
+    missing = total - len(study.get_trials(deepcopy=False, states=BUDGET_STATES))
+    if n_trials is not None:
+        missing = min(missing, n_trials)
+    if missing <= 0:
+        return
+    # Riusa anche i punteggi già nello studio, calcolati da altri processi
+    objective.remember(study.get_trials(deepcopy=False))
+    study.optimize(
+        objective,
+        n_trials=missing,
+        callbacks=[optuna.study.MaxTrialsCallback(total, states=BUDGET_STATES)],
+        show_progress_bar=show_progress_bar,
+    )
+    objective.log_stats()
+
+
+def _space_values(param_space) -> dict[str, list[int]]:
+    if dataclasses.is_dataclass(param_space):
+        param_space = {
+            f.name: getattr(param_space, f.name) for f in fields(param_space)
+        }
+    return _candidate_values(param_space)
+
+
+def _optimize_study(
+    df: pd.DataFrame,
+    strategy_cls,
+    config_cls,
+    param_space,
+    prune_logic,
+    n_trials: int,
+    workers: int,
+    storage: str | Path | None,
+    study_name: str | None,
+    resume: bool = False,
+    results: ResultStore | None = None,
+) -> optuna.Study:
+    """Run ``n_trials`` more trials on the study and return it.
+
+    With ``workers > 1`` the trials are split across processes.  The price
+    and indicator columns are published once in shared memory
+    (:class:`SharedFrame`) and every worker attaches them without copying; a
+    :class:`LazyIndicatorFrame` first computes the windows of the whole
+    parameter space.  The workers pull trials from the same ``storage``, so
+    the study holds every trial as in the serial run.
+    """
+
+    study = optuna.create_study(
+        direction="maximize",
+        storage=open_storage(storage),
+        study_name=study_name,
+        load_if_exists=True,
+    )
+    if resume:
+        done = len(study.get_trials(deepcopy=False, states=FINISHED_STATES))
+        if done:
+            log.info("Ripresa studio %s: %d trial già eseguiti", study_name, done)
+        n_trials = max(n_trials - done, 0)
+    if not n_trials:
+        return study
+    fail_stale_trials(study)
+    total = len(study.get_trials(deepcopy=False, states=BUDGET_STATES)) + n_trials
+    if workers <= 1:
+        objective = make_objective(
+            df, strategy_cls, config_cls, param_space, prune_logic, results
+        )
+        run_trials(study, objective, total, show_progress_bar=True)
+        return study
+
+    if isinstance(df, LazyIndicatorFrame):
+        specs = strategy_cls.indicator_specs(_space_values(param_space))
+        df.prefetch(periods_from_specs(specs))
+        df = df.copy()
+    counts = [n_trials // workers + (i < n_trials % workers) for i in range(workers)]
+    counts = [n for n in counts if n]
+    log.info("Ottimizzazione su %d processi (%d trial)", len(counts), n_trials)
+    with SharedFrame(df) as frame:
+        # Stato del worker passato all'avvio del processo, i task sono solo
+        # il numero di trial da eseguire
+        init = (frame.handle, study.study_name, storage, strategy_cls, config_cls)
+        with ProcessPoolExecutor(
+            max_workers=len(counts),
+            initializer=_init_optuna_worker,
+            initargs=(*init, param_space, prune_logic, results),
+        ) as pool:
+            for _ in pool.map(_optuna_worker, [total] * len(counts), counts):
+                pass
+    return study
+
+
+_WORKER: dict[str, Any] = {}
+
+
+def _init_optuna_worker(
+    handle: SharedFrameHandle,
+    study_name: str,
+    storage: str | Path,
+    strategy_cls,
+    config_cls,
+    param_space,
+    prune_logic,
+    results: ResultStore | None,
+) -> None:
+    df = attach(handle)
+    _WORKER["study"] = optuna.load_study(
+        study_name=study_name, storage=open_storage(storage)
+    )
+    _WORKER["objective"] = make_objective(
+        df, strategy_cls, config_cls, param_space, prune_logic, results
+    )
+
+
+def _optuna_worker(total: int, n_trials: int) -> None:
+    run_trials(_WORKER["study"], _WORKER["objective"], total, n_trials)
+
+
 # ---------------------- RETROCOMPATIBILITA' SMA ----------------------
-from .strategy import get_strategy
 
 
 def optimize_sma(df: pd.DataFrame, n_trials: int = 300):
@@ -596,15 +919,161 @@ def refined_grid(strategy_name: str, best: Mapping[str, Any]) -> list[dict[str,
 
 # ---------------------- GRID SEARCH ---------------------------
 def grid_search(
-    df: pd.DataFrame, combos: list[dict[str, Any]], strategy_name: str
+    df: pd.DataFrame,
+    combos: list[dict[str, Any]],
+    strategy_name: str,
+    batch_size: int = 256,
+    results: ResultStore | None = None,
+    workers: int = 1,
+    chunksize: int | None = None,
 ) -> pd.DataFrame:
-    """Evaluate parameter combinations for ``strategy_name`` and rank the results."""
+    """Evaluate parameter combinations for ``strategy_name`` and rank the results.
+
+    Signals are computed per combination, then every ``batch_size`` combos are
+    simulated together by :func:`simulate_batch` in a single pass over the
+    bars.  Scores match :func:`evaluate_strategy` without Sharpe.  With a
+    ``results`` store only the combos it does not hold yet are simulated, and
+    they are stored with the other results.
+
+    With ``workers > 1`` chunks of ``chunksize`` combos (by default about four
+    chunks per worker, at most ``batch_size``) are evaluated in a process
+    pool.  Prices and indicators are published once in shared memory
+    (:class:`SharedFrame`); tasks only carry combo positions, so the ranking
+    is the same as in the serial run.
+    """
 
     log.info("Grid %s – %d combo", strategy_name.upper(), len(combos))
-    results = []
     strategy_cls, config_cls = get_strategy(strategy_name)
-    for p in tqdm(combos, desc=strategy_name.upper()):
-        cfg = config_cls(**p)
-        ret = evaluate_strategy(df, lambda cfg=cfg: strategy_cls(cfg))
-        results.append({**p, "total_return": ret})
-    return pd.DataFrame(results).sort_values("total_return", ascending=False)
+    scores = np.zeros(len(combos))
+    todo = list(range(len(combos)))
+    if results is not None:
+        keys = [
+            results.key(
+                df, strategy_cls(config_cls(**p)), "array", COMMISSION, SLIPPAGE
+            )
+            for p in combos
+        ]
+        todo = []
+        for i, key in enumerate(keys):
+            metrics = results.get(key)
+            if metrics is None:
+                todo.append(i)
+            else:
+                scores[i] = metrics["total_return"]
+        log.info("Risultati già in archivio: %d combo", len(combos) - len(todo))
+
+    def collect(chunk: list[int], batch: np.ndarray | list[TradeLedger]) -> None:
+        if results is None:
+            scores[chunk] = batch
+            return
+        stored = results.put_many(
+            (
+                keys[i],
+                PerformanceAnalyzer(ledger, commission=COMMISSION, slippage=SLIPPAGE),
+                ledger,
+            )
+            for i, ledger in zip(chunk, batch)
+        )
+        scores[chunk] = [m["total_return"] for m in stored]
+
+    if chunksize is None:
+        chunksize = min(batch_size, -(-len(todo) // (4 * max(workers, 1))))
+    chunks = [todo[i : i + chunksize] for i in range(0, len(todo), max(chunksize, 1))]
+    ledgers = results is not None
+    with tqdm(
+        total=len(combos), initial=len(combos) - len(todo), desc=strategy_name.upper()
+    ) as bar:
+        if workers <= 1 or len(chunks) <= 1:
+            arrays = PriceArrays.from_frame(df)
+            for start in range(0, len(todo), batch_size):
+                chunk = todo[start : start + batch_size]
+                configs = [config_cls(**combos[i]) for i in chunk]
+                batch = _grid_batch(
+                    df, arrays, strategy_cls, configs, ledgers, bar.update
+                )
+                collect(chunk, batch)
+        else:
+            if isinstance(df, LazyIndicatorFrame):
+                df.prefetch(gather_all_indicator_periods(combos, strategy_name))
+                df = df.copy()
+            workers = min(workers, len(chunks))
+            log.info("Grid su %d processi (%d chunk)", workers, len(chunks))
+            with SharedFrame(df) as frame, ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_grid_worker,
+                initargs=(frame.handle, strategy_cls, config_cls, combos, ledgers),
+            ) as pool:
+                tasks = {
+                    pool.submit(_grid_worker, chunk, batch_size): chunk
+                    for chunk in chunks
+                }
+                # Ogni chunk scrive nelle proprie posizioni: ordine stabile
+                for task in as_completed(tasks):
+                    collect(tasks[task], task.result())
+                    bar.update(len(tasks[task]))
+    rows = [{**p, "total_return": ret} for p, ret in zip(combos, scores)]
+    return pd.DataFrame(rows).sort_values("total_return", ascending=False)
+
+
+def _grid_batch(
+    df: pd.DataFrame,
+    arrays: PriceArrays,
+    strategy_cls,
+    configs: list[Any],
+    ledgers: bool,
+    update: Callable[[int], Any] | None = None,
+) -> np.ndarray | list[TradeLedger]:
+    """Simulate ``configs`` in one batch.
+
+    Returns the net return of each config or, with ``ledgers``, its trades.
+    """
+
+    strats = [strategy_cls(cfg) for cfg in configs]
+    entries = np.empty((len(strats), len(df)), dtype=bool)
+    exits = np.empty_like(entries)
+    for i, strat in enumerate(strats):
+        entries[i], exits[i] = strat.compute_signals(df)
+        if update is not None:
+            update(1)
+    res = simulate_batch(
+        arrays,
+        entries,
+        exits,
+        [s.sl_pct for s in strats],
+        [s.tp_pct for s in strats],
+        [s.trailing_stop_pct or 0.0 for s in strats],
+        [getattr(s, "position_size", 1) for s in strats],
+    )
+    if ledgers:
+        return [res.trades(n) for n in range(len(strats))]
+    net = res.pct_change() - COMMISSION - SLIPPAGE
+    # Trade senza rendimento (prezzi NaN) esclusi dal totale, come in TradeMetrics
+    net[np.isnan(net)] = 0.0
+    return np.bincount(res.config_ids(), weights=net, minlength=len(strats))
+
+
+def _init_grid_worker(
+    handle: SharedFrameHandle,
+    strategy_cls,
+    config_cls,
+    combos: list[dict[str, Any]],
+    ledgers: bool,
+) -> None:
+    df = attach(handle)
+    _WORKER["grid"] = (df, PriceArrays.from_frame(df), strategy_cls, config_cls)
+    _WORKER["combos"] = combos
+    _WORKER["ledgers"] = ledgers
+
+
+def _grid_worker(chunk: list[int], batch_size: int) -> np.ndarray | list[TradeLedger]:
+    df, arrays, strategy_cls, config_cls = _WORKER["grid"]
+    out = []
+    for start in range(0, len(chunk), batch_size):
+        configs = [
+            config_cls(**_WORKER["combos"][i])
+            for i in chunk[start : start + batch_size]
+        ]
+        out.append(_grid_batch(df, arrays, strategy_cls, configs, _WORKER["ledgers"]))
+    if _WORKER["ledgers"]:
+        return [ledger for batch in out for ledger in batch]
+    return np.concatenate(out)
@@ -1,45 +1,165 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
 import pandas as pd
 
+from .ledger import TradeLedger
+
+# Lunghezza del vettore di statistiche riempito dai kernel di simulazione:
+# [n, n_validi, somma, media, M2, equity, picco, max_drawdown, vincenti]
+N_STATS = 9
+
+
+@dataclass(frozen=True)
+class TradeMetrics:
+    """Running statistics of net trade returns.
+
+    Produced without materialising the trades, either by the simulation
+    kernel (:func:`~trading_backtest.engine.simulate_metrics`) or from an
+    array of returns.  Exposes the same metrics as
+    :class:`PerformanceAnalyzer`.
+    """
+
+    count: int = 0
+    valid: int = 0
+    total: float = 0.0
+    mean: float = 0.0
+    m2: float = 0.0
+    max_dd: float = 0.0
+    wins: int = 0
+
+    @classmethod
+    def from_stats(cls, stats: np.ndarray) -> "TradeMetrics":
+        return cls(
+            count=int(stats[0]),
+            valid=int(stats[1]),
+            total=float(stats[2]),
+            mean=float(stats[3]),
+            m2=float(stats[4]),
+            max_dd=float(stats[7]),
+            wins=int(stats[8]),
+        )
+
+    @classmethod
+    def from_returns(cls, net_pct: np.ndarray) -> "TradeMetrics":
+        net_pct = np.asarray(net_pct, dtype=np.float64)
+        if len(net_pct) == 0:
+            return cls()
+        valid = net_pct[~np.isnan(net_pct)]
+        mean = float(valid.mean()) if len(valid) else 0.0
+        equity = np.cumprod(1 + np.nan_to_num(net_pct) / 100)
+        drawdown = (equity / np.maximum.accumulate(equity) - 1) * 100
+        return cls(
+            count=len(net_pct),
+            valid=len(valid),
+            total=float(valid.sum()),
+            mean=mean,
+            m2=float(((valid - mean) ** 2).sum()),
+            max_dd=float(min(drawdown.min(), 0.0)),
+            wins=int((valid > 0).sum()),
+        )
+
+    def total_return(self) -> float:
+        return self.total
+
+    def trade_count(self) -> int:
+        return self.count
+
+    def avg_trade(self) -> float:
+        return self.mean if self.valid else 0.0
+
+    def sharpe_ratio(self) -> float:
+        if self.count == 0:
+            return 0.0
+        if self.valid < 2:
+            return float("nan")
+        std = (self.m2 / (self.valid - 1)) ** 0.5
+        if std == 0:
+            return 0.0
+        return (self.mean / std) * (self.count**0.5)
+
+    def max_drawdown(self) -> float:
+        return self.max_dd
+
+    def win_rate(self) -> float:
+        return self.wins / self.count * 100 if self.count else 0.0
+
 
 class PerformanceAnalyzer:
-    """Report basilare di performance single-asset."""
+    """Report basilare di performance single-asset.
+
+    Accetta il DataFrame di ``generate_trades`` oppure direttamente un
+    :class:`TradeLedger`; in entrambi i casi lavora sull'array dei rendimenti
+    netti senza copiare i trade.
+    """
 
     def __init__(
-        self, trades: pd.DataFrame, commission: float = 0.0, slippage: float = 0.0
+        self,
+        trades: pd.DataFrame | TradeLedger,
+        commission: float = 0.0,
+        slippage: float = 0.0,
     ):
-        self.trades = trades.copy()
-        if not self.trades.empty:
-            self.trades["net_pct"] = self.trades["pct_change"] - commission - slippage
+        self._trades = trades
+        if isinstance(trades, TradeLedger):
+            pct = trades.pct_change()
+        elif trades.empty:
+            pct = np.empty(0)
+        else:
+            pct = trades["pct_change"].to_numpy(dtype=np.float64)
+        self.net_pct = pct - commission - slippage
+        # Come in pandas, i NaN vengono ignorati nelle aggregazioni
+        self._valid = self.net_pct[~np.isnan(self.net_pct)]
+
+    @property
+    def trades(self) -> pd.DataFrame:
+        """Trades as a DataFrame with the ``net_pct`` column, built on demand.
+
+        Trades given as a :class:`TradeLedger` report bar positions as
+        ``entry_time``/``exit_time``.
+        """
+        if isinstance(self._trades, TradeLedger):
+            frame = self._trades.to_frame()
+        else:
+            frame = self._trades.copy()
+        if not frame.empty:
+            frame["net_pct"] = self.net_pct
+        return frame
+
+    def metrics(self) -> TradeMetrics:
+        """Return the same statistics as a :class:`TradeMetrics`."""
+        return TradeMetrics.from_returns(self.net_pct)
 
     def total_return(self) -> float:
-        return self.trades["net_pct"].sum() if not self.trades.empty else 0.0
+        return float(self._valid.sum())
 
     def trade_count(self) -> int:
-        return len(self.trades)
+        return len(self.net_pct)
 
     def avg_trade(self) -> float:
-        return self.trades["net_pct"].mean() if not self.trades.empty else 0.0
+        return float(self._valid.mean()) if len(self._valid) else 0.0
 
     def sharpe_ratio(self) -> float:
         """Return the simple Sharpe ratio based on ``net_pct`` returns."""
-        if self.trades.empty:
+        if len(self.net_pct) == 0:
             return 0.0
-        r = self.trades["net_pct"]
-        std = r.std()
-        if std == 0 or len(r) == 0:
+        r = self._valid
+        if len(r) < 2:
+            return float("nan")
+        std = r.std(ddof=1)
+        if std == 0:
             return 0.0
-        return (r.mean() / std) * (len(r) ** 0.5)
+        return float((r.mean() / std) * (len(self.net_pct) ** 0.5))
 
     def max_drawdown(self) -> float:
         """Return the maximum drawdown in percent."""
-        if self.trades.empty:
+        if len(self.net_pct) == 0:
             return 0.0
-        equity = (1 + self.trades["net_pct"] / 100).cumprod()
-        drawdown = equity.div(equity.cummax()).sub(1) * 100
-        return drawdown.min()
+        equity = np.cumprod(1 + np.nan_to_num(self.net_pct) / 100)
+        drawdown = (equity / np.maximum.accumulate(equity) - 1) * 100
+        return float(drawdown.min())
 
     def win_rate(self) -> float:
         """Return the percentage of profitable trades."""
-        if self.trades.empty:
+        if len(self.net_pct) == 0:
             return 0.0
-        return (self.trades["net_pct"] > 0).mean() * 100
+        return float((self.net_pct > 0).mean() * 100)
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Indice di minimi/massimi su intervalli (sparse table).
+
+Costruito una volta per serie, risponde in ``O(1)`` al minimo/massimo di un
+intervallo qualsiasi: il motore ``"event"`` lo usa per trovare le uscite, le
+strategie per massimi/minimi mobili su finestre arbitrarie (:meth:`rolling`)
+senza una colonna precalcolata per finestra.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import numpy as np
+
+_OPS = {"min": np.fmin, "max": np.fmax}
+
+
+class SparseTable:
+    """Range-extremum index over a 1-D array.
+
+    Level ``j`` stores the min (or max) of ``values[i : i + 2**j]`` for every
+    valid ``i``, so any range is answered by combining two overlapping blocks.
+    NaN values are ignored, as in pandas rolling reductions.  ``max_width``
+    limits the levels to ranges of at most that many bars, which is enough
+    for :meth:`query` and :meth:`rolling` on shorter ranges;
+    :meth:`first_crossing` needs the full table.
+    """
+
+    def __init__(
+        self, values: np.ndarray, op: str = "min", max_width: int | None = None
+    ) -> None:
+        if op not in _OPS:
+            raise ValueError(f"Operazione non supportata: {op}")
+        self.op = op
+        self._ufunc = _OPS[op]
+        level = np.ascontiguousarray(values, dtype=np.float64)
+        self.levels = [level]
+        limit = len(level) if max_width is None else min(max_width, len(level))
+        width = 1
+        while 2 * width <= limit:
+            prev = self.levels[-1]
+            self.levels.append(self._ufunc(prev[:-width], prev[width:]))
+            width *= 2
+
+    def __len__(self) -> int:
+        return len(self.levels[0])
+
+    def query(self, lo: np.ndarray | int, hi: np.ndarray | int) -> np.ndarray:
+        """Return the extremum of ``values[lo:hi]`` (vectorised, ``hi > lo``)."""
+
+        lo = np.asarray(lo, dtype=np.int64)
+        hi = np.asarray(hi, dtype=np.int64)
+        j = np.floor(np.log2(hi - lo)).astype(np.int64)
+        out = np.empty(np.broadcast(lo, hi).shape)
+        for level in np.unique(j):
+            sel = j == level
+            table = self.levels[level]
+            out[sel] = self._ufunc(
+                table[np.broadcast_to(lo, sel.shape)[sel]],
+                table[np.broadcast_to(hi, sel.shape)[sel] - (1 << level)],
+            )
+        return out
+
+    def rolling(
+        self, w: int, min_periods: int | None = None, shift: int = 0
+    ) -> np.ndarray:
+        """Extremum over the last ``w`` bars at every bar.
+
+        Matches ``Series.rolling(w, min_periods).max().shift(shift)`` (or
+        ``min``); ``min_periods`` defaults to ``w``.  Every bar combines two
+        slices of one level, so the cost does not depend on ``w``.
+        """
+
+        n = len(self)
+        if w < 1:
+            raise ValueError(f"Finestra non valida: {w}")
+        min_periods = w if min_periods is None else min_periods
+        if n == 0:
+            return np.empty(0)
+        w = min(w, n)
+        j = w.bit_length() - 1
+        if j >= len(self.levels):
+            raise ValueError(f"Finestra oltre max_width: {w}")
+        table = self.levels[j]
+        out = np.empty(n)
+        # Finestre complete: due blocchi di 2**j sovrapposti
+        out[w - 1 :] = self._ufunc(table[: n - w + 1], table[w - (1 << j) :])
+        if w > 1:
+            head = np.arange(1, w)
+            out[: w - 1] = self.query(0, head)
+        values = self.levels[0]
+        valid = np.concatenate(([0], np.cumsum(~np.isnan(values))))
+        hi = np.arange(1, n + 1)
+        count = valid[hi] - valid[np.maximum(hi - w, 0)]
+        out[count < max(min_periods, 1)] = np.nan
+        shift = min(shift, n)
+        if shift:
+            out[shift:] = out[: n - shift].copy()
+            out[:shift] = np.nan
+        return out
+
+    def first_crossing(self, start: int, threshold: float) -> int:
+        """Return the first ``t >= start`` whose value crosses ``threshold``.
+
+        For a ``"min"`` table this is the first ``values[t] <= threshold``,
+        for a ``"max"`` table the first ``values[t] >= threshold``.  Returns
+        ``len(self)`` when no bar crosses.  Cost is ``O(log n)``.
+        """
+
+        p = start
+        below = self.op == "min"
+        for j in range(len(self.levels) - 1, -1, -1):
+            table = self.levels[j]
+            if p < len(table):
+                v = table[p]
+                hit = v <= threshold if below else v >= threshold
+                if not hit:
+                    p += 1 << j
+        return min(p, len(self))
+
+
+_CACHE: OrderedDict[tuple, tuple[np.ndarray, SparseTable]] = OrderedDict()
+_CACHE_SIZE = 8
+
+
+def range_index(values: np.ndarray, op: str = "min") -> SparseTable:
+    """Return a :class:`SparseTable` for ``values``, reusing a cached one.
+
+    Tables are keyed by the memory buffer of ``values``; the array is kept
+    alive in the cache so its address cannot be reused by other data.  Arrays
+    modified in place after indexing are not detected.
+    """
+
+    arr = np.asarray(values)
+    key = (
+        op,
+        arr.__array_interface__["data"][0],
+        arr.shape,
+        arr.strides,
+        arr.dtype.str,
+    )
+    hit = _CACHE.get(key)
+    if hit is not None:
+        _CACHE.move_to_end(key)
+        return hit[1]
+    table = SparseTable(arr, op)
+    _CACHE[key] = (arr, table)
+    if len(_CACHE) > _CACHE_SIZE:
+        _CACHE.popitem(last=False)
+    return table
+
+
+__all__ = ["SparseTable", "range_index"]
@@ -0,0 +1,365 @@
+# -*- coding: utf-8 -*-
+"""Registro dichiarativo degli indicatori e pianificatore del calcolo.
+
+Le strategie dichiarano le colonne che leggono come :class:`IndicatorSpec`
+(``sma`` 20, ``bb`` 14, …).  :class:`IndicatorPlan` trasforma un insieme di
+spec in un piccolo DAG: ogni serie intermedia (differenze del close, true
+range, somme prefisse, indice dei massimi, …) viene calcolata una sola volta e condivisa dalle
+colonne che ne dipendono, e le colonne identiche (``bbm_w`` e ``sma_w``) sono
+alias dello stesso array invece di copie.  Con prezzi ``float32`` il calcolo
+avviene comunque in ``float64`` e solo le colonne prodotte sono compattate.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .indicators import PrefixSums, ema_spans
+from .rangeindex import SparseTable
+
+# Famiglie di indicatori, nell'ordine delle colonne di add_indicator_cache
+KINDS = ("sma", "rsi", "atr", "vol", "imp", "hmax", "bb", "ema", "stoch")
+
+# Prefisso della colonna -> famiglia
+_PREFIXES = {
+    "sma": "sma",
+    "rsi": "rsi",
+    "atr": "atr",
+    "vol": "vol",
+    "impulse": "imp",
+    "hmax": "hmax",
+    "bbm": "bb",
+    "bbs": "bb",
+    "ema": "ema",
+    "stoch_k": "stoch",
+}
+
+
+@dataclass(frozen=True, order=True)
+class IndicatorSpec:
+    """One indicator family evaluated on one window."""
+
+    kind: str
+    window: int
+
+    def __post_init__(self) -> None:
+        if self.kind not in KINDS:
+            raise ValueError(f"Indicatore sconosciuto: {self.kind}")
+        if self.window < 1:
+            raise ValueError(f"Finestra non valida: {self.window}")
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        """Columns produced for this spec (``tr`` excluded)."""
+        w = self.window
+        if self.kind == "imp":
+            return (f"impulse_{w}",)
+        if self.kind == "bb":
+            return (f"bbm_{w}", f"bbs_{w}")
+        if self.kind == "stoch":
+            return (f"stoch_k_{w}",)
+        return (f"{self.kind}_{w}",)
+
+    @classmethod
+    def from_column(cls, name: str) -> "IndicatorSpec | None":
+        """Return the spec producing column ``name`` (``None`` if unknown)."""
+        if name == "tr":
+            return cls("atr", 1)
+        prefix, _, window = name.rpartition("_")
+        if prefix not in _PREFIXES or not window.isdigit() or window == "0":
+            return None
+        return cls(_PREFIXES[prefix], int(window))
+
+
+def specs_from_periods(periods: Mapping[str, Iterable[int]]) -> list[IndicatorSpec]:
+    """Convert ``{"sma": [5, 20], ...}`` into a sorted list of specs."""
+    return sorted(
+        {IndicatorSpec(kind, int(w)) for kind, ws in periods.items() for w in ws}
+    )
+
+
+def periods_from_specs(specs: Iterable[IndicatorSpec]) -> dict[str, list[int]]:
+    """Inverse of :func:`specs_from_periods`, without empty families."""
+    res: dict[str, set[int]] = {}
+    for spec in specs:
+        res.setdefault(spec.kind, set()).add(spec.window)
+    return {k: sorted(res[k]) for k in KINDS if k in res}
+
+
+# ---------------------- DAG delle serie intermedie ----------------------
+# nodo -> (dipendenze, funzione(valutazione, *dipendenze))
+_NODES: dict[str, tuple[tuple[str, ...], Callable]] = {
+    "close": ((), lambda ev: ev.df["close"].to_numpy(dtype=np.float64)),
+    "delta": ((), lambda ev: ev.df["close"].diff().to_numpy()),
+    "gain_sums": (
+        ("delta",),
+        lambda ev, d: PrefixSums.for_windows(np.clip(d, 0, None), ev.windows("rsi"), 1),
+    ),
+    "loss_sums": (
+        ("delta",),
+        lambda ev, d: PrefixSums.for_windows(
+            -np.clip(d, None, 0), ev.windows("rsi"), 1
+        ),
+    ),
+    "close_sums": (
+        ("close",),
+        lambda ev, c: PrefixSums.for_windows(
+            c, ev.windows("sma", "bb"), 2 if ev.windows("bb") else 1
+        ),
+    ),
+    "tr": ((), lambda ev: _true_range(ev.df)),
+    "tr_sums": (
+        ("tr",),
+        lambda ev, tr: PrefixSums.for_windows(tr.to_numpy(), ev.windows("atr"), 1),
+    ),
+    "pct_sums": (
+        (),
+        lambda ev: PrefixSums.for_windows(
+            ev.df["close"].pct_change().to_numpy(), ev.windows("vol")
+        ),
+    ),
+    "close_max": (
+        ("close",),
+        lambda ev, c: SparseTable(c, "max", max_width=max(ev.windows("hmax"))),
+    ),
+    # Tutti gli span EMA in un solo passaggio sul close
+    "close_emas": (
+        ("close",),
+        lambda ev, c: ema_spans(c, ev.windows("ema"), shift=1),
+    ),
+    "high_max": (
+        (),
+        lambda ev: SparseTable(
+            ev.df["high"].to_numpy(), "max", max_width=max(ev.windows("stoch"))
+        ),
+    ),
+    "low_min": (
+        (),
+        lambda ev: SparseTable(
+            ev.df["low"].to_numpy(), "min", max_width=max(ev.windows("stoch"))
+        ),
+    ),
+}
+
+
+def _true_range(df: pd.DataFrame) -> pd.Series:
+    # Riusa la colonna se già presente nel frame
+    if "tr" in df:
+        return df["tr"]
+    return np.maximum(
+        df["high"] - df["low"],
+        np.maximum(
+            abs(df["high"] - df["close"].shift()),
+            abs(df["low"] - df["close"].shift()),
+        ),
+    )
+
+
+def _rsi(ev: "_Evaluation", p: int) -> pd.Series:
+    # RSI - start rolling early to reduce initial NaNs
+    gain = ev["gain_sums"].mean(p, min_periods=1)
+    loss = ev["loss_sums"].mean(p, min_periods=1)
+    rs = gain / np.where(loss == 0, np.nan, loss)
+    rsi_vals = ev.series(100 - 100 / (1 + rs))
+    return rsi_vals.bfill().shift(1)  # fill leading NaNs
+
+
+def _stoch_k(ev: "_Evaluation", p: int) -> pd.Series:
+    # %K sui minimi/massimi delle ``p`` barre precedenti
+    low_n = ev["low_min"].rolling(p, shift=1)
+    high_n = ev["high_max"].rolling(p, shift=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = (ev["close"] - low_n) / (high_n - low_n) * 100
+    return ev.series(k)
+
+
+# famiglia -> funzione(valutazione, finestra) -> colonne
+_OUTPUTS: dict[str, Callable[["_Evaluation", int], dict[str, pd.Series]]] = {
+    "sma": lambda ev, w: {f"sma_{w}": ev.close_mean(w)},
+    "rsi": lambda ev, p: {f"rsi_{p}": _rsi(ev, p)},
+    "atr": lambda ev, p: {f"atr_{p}": ev.series(ev["tr_sums"].mean(p, shift=1))},
+    "vol": lambda ev, w: {f"vol_{w}": ev.series(ev["pct_sums"].std(w, shift=1))},
+    "imp": lambda ev, w: {f"impulse_{w}": ev.df["close"].pct_change(w).shift(1)},
+    "hmax": lambda ev, w: {f"hmax_{w}": ev.series(ev["close_max"].rolling(w, shift=1))},
+    "bb": lambda ev, w: {
+        f"bbm_{w}": ev.close_mean(w),
+        f"bbs_{w}": ev.series(ev["close_sums"].std(w, shift=1)),
+    },
+    "ema": lambda ev, w: {f"ema_{w}": ev.series(ev["close_emas"][w])},
+    "stoch": lambda ev, w: {f"stoch_k_{w}": _stoch_k(ev, w)},
+}
+
+
+class _Evaluation:
+    """Memoized evaluation of the intermediate nodes of a plan on ``df``."""
+
+    def __init__(self, plan: "IndicatorPlan", df: pd.DataFrame) -> None:
+        self.plan = plan
+        self.df = _float64_prices(df)
+        self._memo: dict[str, object] = {}
+        self._means: dict[int, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, node: str):
+        if node not in self._memo:
+            self._memo[node] = self.compute(node)
+        return self._memo[node]
+
+    def compute(self, node: str):
+        deps, fn = _NODES[node]
+        return fn(self, *(self[d] for d in deps))
+
+    def windows(self, *kinds: str) -> list[int]:
+        return [w for k in kinds for w in self.plan.periods.get(k, [])]
+
+    def series(self, values: np.ndarray) -> pd.Series:
+        return pd.Series(values, index=self.df.index, copy=False)
+
+    def close_mean(self, w: int) -> pd.Series:
+        # sma_w e bbm_w sono la stessa serie: un solo array condiviso, anche
+        # quando i due task girano su thread diversi
+        with self._lock:
+            if w not in self._means:
+                self._means[w] = self["close_sums"].mean(w, shift=1)
+        return self.series(self._means[w])
+
+
+def _float64_prices(df: pd.DataFrame) -> pd.DataFrame:
+    # I nodi leggono solo questi campi: con prezzi float32 se ne fa una copia
+    # float64, così differenze e true range non perdono precisione
+    cols = [c for c in ("high", "low", "close", "tr") if c in df]
+    if all(df[c].dtype == np.float64 for c in cols):
+        return df
+    return pd.DataFrame(
+        {c: df[c].to_numpy(dtype=np.float64) for c in cols}, index=df.index
+    )
+
+
+def column_dtype(df: pd.DataFrame) -> np.dtype:
+    """Dtype of the indicator columns for ``df``: float32 if prices are."""
+    if "close" in df and df["close"].dtype == np.float32:
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def _cast(cols: dict[str, pd.Series], dtype: np.dtype) -> dict[str, pd.Series]:
+    # Converte una sola volta gli array condivisi, mantenendo gli alias
+    arrays: dict[int, np.ndarray] = {}
+    out = {}
+    for name, col in cols.items():
+        values = col.to_numpy()
+        addr = values.__array_interface__["data"][0]
+        if addr not in arrays:
+            arrays[addr] = values.astype(dtype)
+        out[name] = pd.Series(arrays[addr], index=col.index, copy=False)
+    return out
+
+
+class IndicatorPlan:
+    """Execution plan for a set of :class:`IndicatorSpec`.
+
+    ``nodes`` lists the intermediate series in dependency order; ``aliases``
+    maps every column that is computed as the same array as another one.
+    :meth:`evaluate` can run the independent nodes and the family × window
+    tasks on a thread pool: the rolling kernels release the GIL.
+    """
+
+    def __init__(self, specs: Iterable[IndicatorSpec]) -> None:
+        self.specs = sorted(set(specs))
+        self.periods = periods_from_specs(self.specs)
+        bb = set(self.periods.get("bb", []))
+        self.aliases = {
+            f"bbm_{w}": f"sma_{w}" for w in self.periods.get("sma", []) if w in bb
+        }
+        self.nodes: list[str] = []
+        for kind in self.periods:
+            for node in _ROOTS[kind]:
+                self._visit(node)
+
+    def _visit(self, node: str) -> None:
+        if node in self.nodes:
+            return
+        for dep in _NODES[node][0]:
+            self._visit(dep)
+        self.nodes.append(node)
+
+    @property
+    def columns(self) -> list[str]:
+        """Output columns in the order of :func:`add_indicator_cache`."""
+        cols = []
+        for kind in KINDS:
+            if kind == "atr" and "atr" in self.periods:
+                cols.append("tr")
+            for w in self.periods.get(kind, []):
+                cols.extend(IndicatorSpec(kind, w).columns)
+        return cols
+
+    @property
+    def levels(self) -> list[list[str]]:
+        """Nodes grouped so that each group only depends on earlier ones."""
+        depth: dict[str, int] = {}
+        for node in self.nodes:
+            depth[node] = 1 + max((depth[d] for d in _NODES[node][0]), default=-1)
+        out: list[list[str]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for node in self.nodes:
+            out[depth[node]].append(node)
+        return out
+
+    def evaluate(self, df: pd.DataFrame, workers: int = 1) -> dict[str, pd.Series]:
+        """Compute every column of the plan on ``df``.
+
+        With ``workers > 1`` the intermediate nodes of each level and then
+        one task per family × window run on a :class:`ThreadPoolExecutor`;
+        the result does not depend on ``workers``.  Columns have the dtype
+        given by :func:`column_dtype`; intermediate series are always
+        float64.
+        """
+        ev = _Evaluation(self, df)
+        tasks = [(kind, w) for kind in KINDS for w in self.periods.get(kind, [])]
+        if workers > 1 and len(tasks) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for level in self.levels:
+                    for node, value in zip(level, pool.map(ev.compute, level)):
+                        ev._memo[node] = value
+                outputs = list(pool.map(lambda t: _OUTPUTS[t[0]](ev, t[1]), tasks))
+        else:
+            for node in self.nodes:
+                ev[node]
+            outputs = [_OUTPUTS[kind](ev, w) for kind, w in tasks]
+        cols: dict[str, pd.Series] = {}
+        for (kind, w), out in zip(tasks, outputs):
+            if kind == "atr" and "tr" not in cols:
+                cols["tr"] = ev["tr"]
+            cols.update(out)
+        dtype = column_dtype(df)
+        return cols if dtype == np.float64 else _cast(cols, dtype)
+
+
+# famiglia -> nodi intermedi letti direttamente
+_ROOTS = {
+    "sma": ("close_sums",),
+    "rsi": ("gain_sums", "loss_sums"),
+    "atr": ("tr_sums",),
+    "vol": ("pct_sums",),
+    "imp": (),
+    "hmax": ("close_max",),
+    "bb": ("close_sums",),
+    "ema": ("close_emas",),
+    "stoch": ("close", "high_max", "low_min"),
+}
+
+
+__all__ = [
+    "KINDS",
+    "IndicatorSpec",
+    "IndicatorPlan",
+    "specs_from_periods",
+    "periods_from_specs",
+    "column_dtype",
+]
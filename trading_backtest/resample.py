@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Barre OHLCV su timeframe più ampi (1h, 4h, 1d, …).
+
+Ogni livello si ottiene dal livello più fine che lo divide (es. 15m → 1h →
+4h → 1d) raggruppando le barre per intervallo allineato all'epoch: primo
+open, massimo high, minimo low, ultimo close e somma dei volumi, in un solo
+passaggio vettoriale.  I livelli sono salvati su disco accanto ai dati
+sorgente da :func:`~trading_backtest.data.load_price_data`.
+"""
+
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# Livelli intermedi usati per costruire i timeframe più ampi
+LADDER = ("5m", "15m", "30m", "1h", "2h", "4h", "12h", "1d")
+
+_UNITS = {"m": "min", "h": "h", "d": "D"}
+
+
+def parse_timeframe(timeframe: str) -> pd.Timedelta:
+    """Return the bar length of ``timeframe`` (``"15m"``, ``"4h"``, ``"1d"``)."""
+    match = re.fullmatch(r"(\d+)([mhd])", timeframe)
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Timeframe non valido: {timeframe}")
+    return pd.Timedelta(int(match.group(1)), unit=_UNITS[match.group(2)])
+
+
+def base_step(timestamps: np.ndarray) -> pd.Timedelta:
+    """Most frequent spacing between consecutive bars."""
+    steps = np.diff(np.asarray(timestamps, dtype="datetime64[ns]").view(np.int64))
+    steps = steps[steps > 0]
+    if not len(steps):
+        raise ValueError("Servono almeno due barre per stimare il timeframe")
+    values, counts = np.unique(steps, return_counts=True)
+    return pd.Timedelta(int(values[np.argmax(counts)]), unit="ns")
+
+
+def pyramid(base: pd.Timedelta, timeframe: str) -> list[str]:
+    """Return the levels to build, finest first, ending with ``timeframe``.
+
+    Each level is a multiple of the previous one (and of ``base``), so its
+    bars are exact unions of the finer bars.
+    """
+
+    target = parse_timeframe(timeframe)
+    if target < base or target % base:
+        raise ValueError(f"{timeframe} non è un multiplo delle barre sorgente")
+    levels = []
+    step = base
+    for name in LADDER:
+        size = parse_timeframe(name)
+        if (
+            step < size < target
+            and size % step == pd.Timedelta(0)
+            and not target % size
+        ):
+            levels.append(name)
+            step = size
+    return [*levels, timeframe] if target > base else []
+
+
+def resample_ohlcv(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Aggregate the bars of ``df`` into ``timeframe`` bars.
+
+    Bars are grouped by ``timeframe`` intervals aligned to the epoch and
+    labelled with the interval start; intervals without bars are omitted.
+    ``df`` must be sorted by ``timestamp``.
+    """
+
+    step = parse_timeframe(timeframe).value
+    ts = df["timestamp"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    if not len(ts):
+        return df.iloc[:0].copy()
+    bucket = ts // step * step
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(ts)] - 1
+    out = {"timestamp": bucket[starts].view("datetime64[ns]")}
+    if "open" in df:
+        out["open"] = df["open"].to_numpy()[starts]
+    out["high"] = np.maximum.reduceat(df["high"].to_numpy(), starts)
+    out["low"] = np.minimum.reduceat(df["low"].to_numpy(), starts)
+    out["close"] = df["close"].to_numpy()[ends]
+    if "volume" in df:
+        out["volume"] = np.add.reduceat(df["volume"].to_numpy(), starts)
+    return pd.DataFrame(out)
+
+
+__all__ = ["LADDER", "parse_timeframe", "base_step", "pyramid", "resample_ohlcv"]
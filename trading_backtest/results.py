@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""Archivio persistente dei risultati dei backtest (SQLite).
+
+Ogni risultato è indicizzato dal contenuto: impronta dei prezzi OHLCV,
+strategia, configurazione in forma canonica, nomi, dtype e contenuto delle
+colonne lette dalla strategia, modello dei costi e versione del motore di
+simulazione.  :func:`~trading_backtest.optimize.evaluate_strategy` e
+:func:`~trading_backtest.optimize.grid_search` consultano l'archivio prima di
+simulare, così grid search, benchmark e valutazioni ripetute sugli stessi
+dati non ricalcolano i punteggi già noti; ``python -m trading_backtest
+results`` elenca le configurazioni migliori senza ricalcolare nulla.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import io
+import json
+import math
+import os
+import sqlite3
+import weakref
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .cache import _FINGERPRINT_COLUMNS, fingerprint
+from .engine import ENGINE_VERSION
+from .ledger import TradeLedger
+
+# Metriche salvate per ogni risultato (metodi di PerformanceAnalyzer)
+METRICS = (
+    "total_return",
+    "sharpe_ratio",
+    "trade_count",
+    "avg_trade",
+    "max_drawdown",
+    "win_rate",
+)
+
+# Cifre decimali dei float nella configurazione canonica
+_DIGITS = 10
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS results (
+    data TEXT NOT NULL,
+    strategy TEXT NOT NULL,
+    config TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    costs TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    {", ".join(f"{m} REAL" for m in METRICS)},
+    ledger BLOB,
+    created TEXT NOT NULL,
+    PRIMARY KEY (data, strategy, config, inputs, costs, engine)
+);
+CREATE INDEX IF NOT EXISTS results_rank
+    ON results (strategy, data, total_return);
+"""
+
+
+# Connessioni del processo padre ereditate dopo un fork
+_INHERITED: list[sqlite3.Connection] = []
+
+
+class ResultKey(NamedTuple):
+    """Content address of one backtest result."""
+
+    data: str
+    strategy: str
+    config: str
+    inputs: str
+    costs: str
+    engine: str
+
+
+def config_key(config: Any, resolution: Mapping[str, float] | None = None) -> str:
+    """Return the canonical JSON of a strategy config (dataclass or mapping).
+
+    Floats are rounded to ten decimals, so stepped values that differ only
+    by floating point noise share the key.  ``resolution`` maps parameter
+    names to the step their values are rounded to first.
+    """
+
+    if dataclasses.is_dataclass(config):
+        config = dataclasses.asdict(config)
+    resolution = resolution or {}
+    canonical = {}
+    for name, value in config.items():
+        if isinstance(value, float):
+            if name in resolution:
+                value = round(value / resolution[name]) * resolution[name]
+            value = round(value, _DIGITS)
+        canonical[name] = value
+    return json.dumps(canonical, sort_keys=True)
+
+
+def _owner(values: np.ndarray) -> np.ndarray:
+    """Return the array owning the buffer ``values`` is a view of."""
+    while isinstance(values.base, np.ndarray):
+        values = values.base
+    return values
+
+
+class _ArrayMemo:
+    """Values computed from arrays, kept while the arrays are alive.
+
+    Entries are keyed by the identity and layout of the arrays and hold weak
+    references to the arrays owning their buffers: an entry is dropped as
+    soon as one of them is freed, so a new array reusing its ``id`` or its
+    address never hits it.  Arrays are assumed not to change in place.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[tuple, tuple[Any, list[weakref.ref]]] = {}
+
+    def get(self, arrays: list[np.ndarray], compute: Callable[[], Any]) -> Any:
+        owners = [_owner(a) for a in arrays]
+        sig = tuple(
+            (id(o), a.__array_interface__["data"][0], a.shape, a.strides, a.dtype.str)
+            for o, a in zip(owners, arrays)
+        )
+        entry = self._entries.get(sig)
+        if entry is None:
+
+            def drop(_: weakref.ref, entries: dict = self._entries) -> None:
+                entries.pop(sig, None)
+
+            entry = (compute(), [weakref.ref(o, drop) for o in owners])
+            self._entries[sig] = entry
+        return entry[0]
+
+
+def _column_digest(values: np.ndarray) -> str:
+    """Return a hash of the dtype and the contents of a column."""
+    h = hashlib.blake2b(values.dtype.str.encode(), digest_size=16)
+    if values.dtype.kind == "O":
+        values = pd.util.hash_array(values)
+    h.update(np.ascontiguousarray(values).view(np.uint8))
+    return h.hexdigest()
+
+
+def _pack_ledger(ledger: TradeLedger) -> bytes:
+    buf = io.BytesIO()
+    np.savez_compressed(
+        buf, **{f.name: getattr(ledger, f.name) for f in dataclasses.fields(ledger)}
+    )
+    return buf.getvalue()
+
+
+def _unpack_ledger(blob: bytes) -> TradeLedger:
+    with np.load(io.BytesIO(blob)) as arrays:
+        return TradeLedger(**{name: arrays[name] for name in arrays.files})
+
+
+class ResultStore:
+    """SQLite database of backtest results keyed by :class:`ResultKey`.
+
+    With ``trades=True`` the compact trade ledger of each result is stored
+    as well, when the engine produces one.  The store can be passed to
+    worker processes: each process opens its own connection.
+    """
+
+    def __init__(self, path: str | Path, trades: bool = False) -> None:
+        self.path = Path(path)
+        self.trades = trades
+        self._conn: sqlite3.Connection | None = None
+        self._pid = None
+        # Impronte di prezzi e colonne, finché i loro array restano in memoria
+        self._fingerprints = _ArrayMemo()
+        self._digests = _ArrayMemo()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"path": self.path, "trades": self.trades}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is not None and self._pid != os.getpid():
+            # Connessione ereditata con fork: mai usata né chiusa dal figlio
+            _INHERITED.append(self._conn)
+            self._conn = None
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=60)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def data_key(self, df: pd.DataFrame) -> str:
+        """Return the OHLCV fingerprint of ``df``, hashed once per price arrays."""
+        cols = [df[c].to_numpy() for c in _FINGERPRINT_COLUMNS if c in df]
+        return self._fingerprints.get(cols, lambda: fingerprint(df))
+
+    def key(
+        self,
+        df: pd.DataFrame,
+        strategy: Any,
+        engine: str,
+        commission: float,
+        slippage: float,
+    ) -> ResultKey:
+        """Return the key of the ``strategy`` instance run on ``df``.
+
+        Besides the prices the signals depend on the columns the strategy
+        reads: those of its ``input_columns()`` found in ``df`` or, for
+        strategies working on the whole frame, every column of ``df``.  Their
+        names, dtypes and contents are hashed, together with the price
+        columns read by the simulation.
+        """
+        names = strategy.input_columns()
+        if names is None:
+            names = list(df.columns)
+        h = hashlib.blake2b(digest_size=16)
+        for name in dict.fromkeys([*names, "high", "low", "close"]):
+            if name not in df:
+                continue
+            values = df[name].to_numpy()
+            digest = self._digests.get([values], lambda: _column_digest(values))
+            h.update(f"{name}={digest};".encode())
+        return ResultKey(
+            self.data_key(df),
+            type(strategy).__name__,
+            config_key(strategy.config),
+            h.hexdigest(),
+            f"commission={commission!r},slippage={slippage!r}",
+            f"{engine}-v{ENGINE_VERSION}",
+        )
+
+    def get(self, key: ResultKey) -> dict[str, float] | None:
+        """Return the stored metrics of ``key`` (``None`` if unknown)."""
+        row = self.conn.execute(
+            f"SELECT {', '.join(METRICS)} FROM results WHERE data=? AND "
+            "strategy=? AND config=? AND inputs=? AND costs=? AND engine=?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+        # SQLite salva i NaN come NULL
+        return {m: math.nan if v is None else v for m, v in zip(METRICS, row)}
+
+    def put(
+        self, key: ResultKey, analyzer: Any, ledger: TradeLedger | None = None
+    ) -> dict[str, float]:
+        """Store the metrics of ``analyzer`` under ``key`` and return them.
+
+        ``analyzer`` is a :class:`PerformanceAnalyzer` or :class:`TradeMetrics`.
+        """
+        return self.put_many([(key, analyzer, ledger)])[0]
+
+    def put_many(
+        self, entries: Iterable[tuple[ResultKey, Any, TradeLedger | None]]
+    ) -> list[dict[str, float]]:
+        """Store several ``(key, analyzer, ledger)`` results in one transaction."""
+        created = datetime.now().isoformat(timespec="seconds")
+        stored, rows = [], []
+        for key, analyzer, ledger in entries:
+            metrics = {m: float(getattr(analyzer, m)()) for m in METRICS}
+            blob = _pack_ledger(ledger) if self.trades and ledger is not None else None
+            stored.append(metrics)
+            rows.append((*key, *metrics.values(), blob, created))
+        with self.conn:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO results VALUES ({', '.join('?' * 14)})", rows
+            )
+        return stored
+
+    def ledger(self, key: ResultKey) -> TradeLedger | None:
+        """Return the stored trade ledger of ``key``, if any."""
+        row = self.conn.execute(
+            "SELECT ledger FROM results WHERE data=? AND strategy=? AND config=? "
+            "AND inputs=? AND costs=? AND engine=?",
+            key,
+        ).fetchone()
+        return _unpack_ledger(row[0]) if row and row[0] is not None else None
+
+    def top(
+        self,
+        strategy_name: str | None = None,
+        data: str | None = None,
+        by: str = "total_return",
+        limit: int = 10,
+    ) -> pd.DataFrame:
+        """Return the best ``limit`` stored results ordered by ``by``.
+
+        ``data`` may be a fingerprint prefix.  Each config field becomes a
+        column.
+        """
+
+        if by not in METRICS:
+            raise ValueError(f"Metrica sconosciuta: {by}")
+        where, args = [], []
+        if strategy_name is not None:
+            where.append("strategy = ?")
+            args.append(strategy_name)
+        if data is not None:
+            where.append("data LIKE ?")
+            args.append(f"{data}%")
+        query = (
+            f"SELECT data, strategy, config, costs, engine, {', '.join(METRICS)} "
+            f"FROM results {'WHERE ' + ' AND '.join(where) if where else ''} "
+            f"ORDER BY {by} IS NULL, {by} DESC LIMIT ?"
+        )
+        rows = self.conn.execute(query, (*args, limit)).fetchall()
+        frame = pd.DataFrame(
+            rows, columns=["data", "strategy", "config", "costs", "engine", *METRICS]
+        )
+        configs = pd.DataFrame([json.loads(c) for c in frame.pop("config")])
+        frame["data"] = frame["data"].str[:12]
+        return pd.concat([frame, configs], axis=1)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+__all__ = ["METRICS", "ResultKey", "ResultStore", "config_key"]
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Colonne di prezzi e indicatori condivise tra processi.
+
+:class:`SharedFrame` copia una volta le colonne numeriche di un DataFrame in
+un unico blocco di ``multiprocessing.shared_memory``; i processi worker
+ricevono solo il piccolo :class:`SharedFrameHandle` e con :func:`attach`
+ottengono un DataFrame le cui colonne sono viste in sola lettura sul blocco,
+senza copie né pickling dei dati.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# Allineamento delle colonne nel blocco condiviso (una linea di cache)
+_ALIGN = 64
+
+# Blocchi già aperti da questo processo, riusati tra task successivi
+_ATTACHED: dict[str, tuple[shared_memory.SharedMemory, pd.DataFrame]] = {}
+
+
+@dataclass(frozen=True)
+class SharedFrameHandle:
+    """Picklable description of a :class:`SharedFrame` block."""
+
+    name: str
+    rows: int
+    # (colonna, dtype, offset in byte)
+    columns: tuple[tuple[str, str, int], ...]
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+
+class SharedFrame:
+    """Numeric columns of ``df`` published in one shared memory block.
+
+    The publishing process owns the block: use it as a context manager (or
+    call :meth:`close`) so the block is released once the workers are done.
+    """
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        layout = []
+        size = 0
+        for col in df.columns:
+            values = df[col].to_numpy()
+            if values.dtype.kind not in "biufM":
+                raise TypeError(f"Colonna non numerica: {col}")
+            layout.append((str(col), values))
+            size += -size % _ALIGN
+            size += values.nbytes
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        columns = []
+        offset = 0
+        for col, values in layout:
+            offset += -offset % _ALIGN
+            view = np.ndarray(
+                values.shape, values.dtype, buffer=self._shm.buf, offset=offset
+            )
+            view[...] = values
+            del view
+            columns.append((col, values.dtype.str, offset))
+            offset += values.nbytes
+        self.handle = SharedFrameHandle(
+            self._shm.name, len(df), tuple(columns), dict(df.attrs)
+        )
+
+    def close(self) -> None:
+        """Release the block; workers must no longer use their frames."""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self) -> SharedFrame:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def attach(handle: SharedFrameHandle) -> pd.DataFrame:
+    """Return a DataFrame viewing the columns published under ``handle``.
+
+    The block is opened once per process and the arrays are read-only.
+    """
+
+    if handle.name in _ATTACHED:
+        return _ATTACHED[handle.name][1]
+    shm = shared_memory.SharedMemory(name=handle.name)
+    data = {}
+    for col, dtype, offset in handle.columns:
+        values = np.ndarray(handle.rows, np.dtype(dtype), buffer=shm.buf, offset=offset)
+        values.flags.writeable = False
+        data[col] = values
+    df = pd.DataFrame(data, copy=False)
+    df.attrs.update(handle.attrs)
+    _ATTACHED[handle.name] = (shm, df)
+    return df
+
+
+__all__ = ["SharedFrame", "SharedFrameHandle", "attach"]
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""Archivio colonnare binario dei prezzi OHLCV.
+
+Il CSV viene convertito una volta (``python -m trading_backtest convert``,
+vedi :func:`~trading_backtest.data.convert_price_data`) in
+una directory accanto al file sorgente, con un ``.npy`` per colonna
+(timestamp come ``int64`` in nanosecondi) e un piccolo ``meta.json``.  Le
+colonne possono essere aperte in memory-map, per storici che non stanno in
+RAM.
+:func:`~trading_backtest.data.load_price_data` usa l'archivio al posto del CSV
+quando è più recente di quest'ultimo: la lettura evita parsing delle date,
+conversioni numeriche e ordinamento.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+# Da incrementare quando cambia il formato dell'archivio
+STORE_VERSION = 2
+STORE_SUFFIX = ".store"
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+_META = "meta.json"
+# Un timestamp ogni INDEX_STRIDE righe in ``index.npy``: la ricerca di un
+# intervallo legge l'indice e un solo tratto della colonna dei timestamp
+INDEX_STRIDE = 4096
+
+
+def store_path(data_file: str | Path, timeframe: str | None = None) -> Path:
+    """Return the store directory used for ``data_file``.
+
+    ``timeframe`` selects the store of the bars resampled to that timeframe
+    (``prices.4h.store``).
+    """
+    path = Path(data_file)
+    if timeframe is None:
+        return path.with_suffix(STORE_SUFFIX)
+    return path.with_name(f"{path.stem}.{timeframe}{STORE_SUFFIX}")
+
+
+def _replace(path: Path, write) -> None:
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        write(fh)
+    os.replace(tmp, path)
+
+
+def write_store(
+    df: pd.DataFrame,
+    path: str | Path,
+    source: str | Path | None = None,
+    timeframe: str | None = None,
+) -> Path:
+    """Write the OHLCV columns of ``df`` to the store directory ``path``.
+
+    ``meta.json`` is written last, so a store interrupted halfway is never
+    considered valid.
+    """
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    (path / _META).unlink(missing_ok=True)
+    columns = [c for c in COLUMNS if c in df]
+    for col in columns:
+        values = df[col].to_numpy()
+        if col == "timestamp":
+            values = values.astype("datetime64[ns]").view(np.int64)
+        else:
+            values = values.astype(np.float64, copy=False)
+        _replace(path / f"{col}.npy", lambda fh: np.save(fh, values))
+        if col == "timestamp":
+            index = np.ascontiguousarray(values[::INDEX_STRIDE])
+            _replace(path / "index.npy", lambda fh: np.save(fh, index))
+    meta = {
+        "version": STORE_VERSION,
+        "rows": len(df),
+        "columns": columns,
+        "source": str(source) if source is not None else None,
+        "index_stride": INDEX_STRIDE,
+        "timeframe": timeframe,
+    }
+    _replace(path / _META, lambda fh: fh.write(json.dumps(meta, indent=2).encode()))
+    return path
+
+
+def read_meta(path: str | Path) -> dict[str, Any] | None:
+    """Return the metadata of the store at ``path`` (``None`` if invalid)."""
+    try:
+        meta = json.loads((Path(path) / _META).read_text())
+    except (FileNotFoundError, NotADirectoryError, ValueError):
+        return None
+    if meta.get("version") != STORE_VERSION:
+        return None
+    return meta
+
+
+def is_fresh(path: str | Path, data_file: str | Path) -> bool:
+    """Return ``True`` if the store is valid and newer than ``data_file``.
+
+    A store whose source file no longer exists is always usable.
+    """
+
+    if read_meta(path) is None:
+        return False
+    try:
+        source_mtime = Path(data_file).stat().st_mtime_ns
+    except FileNotFoundError:
+        return True
+    return (Path(path) / _META).stat().st_mtime_ns >= source_mtime
+
+
+def _search(path: Path, meta: dict[str, Any], value: Any) -> int:
+    # Indice sparso, poi ricerca nel solo tratto di timestamp che lo contiene
+    key = pd.Timestamp(value).as_unit("ns").value
+    stride = meta["index_stride"]
+    index = np.load(path / "index.npy")
+    block = max(int(np.searchsorted(index, key)) - 1, 0)
+    ts = np.load(path / "timestamp.npy", mmap_mode="r")
+    lo = block * stride
+    chunk = ts[lo : lo + 2 * stride]
+    return lo + int(np.searchsorted(chunk, key))
+
+
+def row_range(path: str | Path, start: Any = None, end: Any = None) -> tuple[int, int]:
+    """Return the rows ``[lo, hi)`` with ``start <= timestamp < end``."""
+
+    path = Path(path)
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"Archivio prezzi non valido: {path}")
+    lo = 0 if start is None else _search(path, meta, start)
+    hi = meta["rows"] if end is None else _search(path, meta, end)
+    return lo, max(lo, hi)
+
+
+def read_store(
+    path: str | Path,
+    columns: Iterable[str] | None = None,
+    mmap: bool = False,
+    rows: tuple[int, int] | None = None,
+) -> pd.DataFrame:
+    """Load the store at ``path`` as a DataFrame with a ``timestamp`` column.
+
+    ``rows`` restricts the result to the rows ``[lo, hi)`` (see
+    :func:`row_range`); only those are read from disk.  With ``mmap=True`` the
+    columns are read-only memory maps of the ``.npy`` files wrapped without
+    copying: the data is paged in on demand and the page cache is shared by
+    every process mapping the same store.
+    """
+
+    path = Path(path)
+    meta = read_meta(path)
+    if meta is None:
+        raise FileNotFoundError(f"Archivio prezzi non valido: {path}")
+    names = meta["columns"] if columns is None else list(columns)
+    lo, hi = (0, meta["rows"]) if rows is None else rows
+    data = {}
+    for col in names:
+        if col not in meta["columns"]:
+            raise KeyError(col)
+        values = np.load(path / f"{col}.npy", mmap_mode="r")[lo:hi]
+        if not mmap:
+            values = np.array(values)
+        data[col] = values.view("datetime64[ns]") if col == "timestamp" else values
+    return pd.DataFrame(data, copy=False)
+
+
+__all__ = [
+    "STORE_VERSION",
+    "COLUMNS",
+    "store_path",
+    "write_store",
+    "read_meta",
+    "is_fresh",
+    "read_store",
+    "row_range",
+]
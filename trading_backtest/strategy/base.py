@@ -2,9 +2,20 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, ClassVar, Iterable, Mapping
+import numpy as np
 import pandas as pd
 from ..config import log
+from ..engine import (
+    DEFAULT_ENGINE,
+    ENGINES,
+    simulate_metrics,
+    simulate_trades,
+    simulate_trades_event,
+)
+from ..ledger import TradeLedger
+from ..performance import TradeMetrics
+from ..registry import IndicatorSpec
 
 
 @dataclass
@@ -31,6 +42,10 @@ class Trade:
 class BaseStrategy(ABC):
     """Scheletro comune per strategie long-only."""
 
+    # Parametro della config -> famiglia di indicatori (``"sma"``, ``"bb"``…)
+    # la cui colonna per quella finestra è letta dalla strategia
+    indicator_params: ClassVar[Mapping[str, str]] = {}
+
     def __init__(self, config: Any) -> None:
         self.config = config
         self.sl_pct = config.sl_pct
@@ -51,9 +66,62 @@ class BaseStrategy(ABC):
     @abstractmethod
     def exit_signal(self, df: pd.DataFrame) -> pd.Series: ...
 
+    @classmethod
+    def indicator_specs(
+        cls, params: Mapping[str, Iterable[int | None]]
+    ) -> list[IndicatorSpec]:
+        """Return the indicators read for the candidate values in ``params``.
+
+        ``params`` maps parameter names to the window values they may take, so
+        a single config, a grid or a whole parameter space can be planned.
+        """
+        return sorted(
+            {
+                IndicatorSpec(kind, w)
+                for name, kind in cls.indicator_params.items()
+                for w in params.get(name, ())
+                if w is not None
+            }
+        )
+
+    # ---------------- hooks opzionali su array -----------
+    def input_columns(self) -> list[str] | None:
+        """Columns read by :meth:`signal_arrays`.
+
+        ``None`` (the default) means the strategy only implements the
+        DataFrame hooks and works on a full copy of the frame.
+        """
+        return None
+
+    def signal_arrays(
+        self, cols: Mapping[str, np.ndarray]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return entry/exit masks from read-only column arrays.
+
+        ``cols`` holds the columns of :meth:`input_columns` that exist in the
+        frame; optional columns may be missing.
+        """
+        raise NotImplementedError
+
     # ---------------- motore trades ----------------------
-    def generate_trades(self, df: pd.DataFrame) -> pd.DataFrame:
+    def generate_trades(
+        self, df: pd.DataFrame, engine: str = DEFAULT_ENGINE
+    ) -> pd.DataFrame:
+        """Return the trades produced on ``df``.
+
+        ``engine="array"`` (the default) runs the state machine on NumPy
+        arrays via :func:`simulate_trades` and ``engine="event"`` jumps
+        between signals with :func:`simulate_trades_event`;
+        ``engine="loop"`` walks the frame row by row and is kept as the
+        reference implementation.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Engine sconosciuto: {engine}")
         log.debug(f"Config: {self.config}")
+        if engine != "loop":
+            trades_df = self.simulate(df, engine=engine).to_frame(df["timestamp"])
+            log.debug(f"Numero trade generati: {len(trades_df)}")
+            return trades_df
         df = self.prepare_indicators(df.copy())
         entries = self.entry_signal(df).fillna(False)
         exits = self.exit_signal(df).fillna(False)
@@ -103,7 +171,76 @@ class BaseStrategy(ABC):
             log.debug(trades_df.head(3))
         return trades_df
 
+    def simulate(self, df: pd.DataFrame, engine: str = "array") -> TradeLedger:
+        """Return the trades on ``df`` as a :class:`TradeLedger`.
+
+        Only the array-based engines (``"array"``, ``"event"``) are supported.
+        """
+        if engine not in ENGINES or engine == "loop":
+            raise ValueError(f"Engine non supportato da simulate: {engine}")
+        run = simulate_trades_event if engine == "event" else simulate_trades
+        return run(*self._kernel_args(df), qty=getattr(self, "position_size", 1))
+
+    def simulate_metrics(
+        self,
+        df: pd.DataFrame,
+        commission: float = 0.0,
+        slippage: float = 0.0,
+        engine: str = "array",
+    ) -> TradeMetrics:
+        """Return only the running statistics of net trade returns on ``df``.
+
+        With the ``"array"`` engine no trade is stored at all; the
+        ``"event"`` engine builds its (small) ledger and summarises it.
+        """
+        if engine == "event":
+            ledger = self.simulate(df, engine=engine)
+            return TradeMetrics.from_returns(
+                ledger.pct_change() - commission - slippage
+            )
+        if engine != "array":
+            raise ValueError(f"Engine non supportato da simulate_metrics: {engine}")
+        return simulate_metrics(
+            *self._kernel_args(df), commission=commission, slippage=slippage
+        )
+
+    def compute_signals(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        """Return boolean entry and exit masks for ``df`` as NumPy arrays.
+
+        Strategies declaring :meth:`input_columns` receive read-only views of
+        just those columns, so the frame is neither copied nor modified.
+        """
+        names = self.input_columns()
+        if names is None:
+            return self._signal_masks(self.prepare_indicators(df.copy()))
+        cols = {}
+        for name in names:
+            if name in df:
+                arr = df[name].to_numpy().view()
+                arr.flags.writeable = False
+                cols[name] = arr
+        entries, exits = self.signal_arrays(cols)
+        return np.asarray(entries, dtype=bool), np.asarray(exits, dtype=bool)
+
     # ---------------- metodi interni ----------------------
+    def _kernel_args(self, df: pd.DataFrame) -> tuple:
+        entries, exits = self.compute_signals(df)
+        return (
+            df["high"].to_numpy(),
+            df["low"].to_numpy(),
+            df["close"].to_numpy(),
+            entries,
+            exits,
+            self.sl_pct,
+            self.tp_pct,
+            self.trailing_stop_pct,
+        )
+
+    def _signal_masks(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        entries = self.entry_signal(df).fillna(False).to_numpy(dtype=bool)
+        exits = self.exit_signal(df).fillna(False).to_numpy(dtype=bool)
+        return entries, exits
+
     def _open_trade(
         self, row: Any
     ) -> tuple[float, float, float, float | None, Any, float]:
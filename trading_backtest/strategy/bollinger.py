@@ -1,12 +1,15 @@
+import numpy as np
 import pandas as pd
 from .base import BaseStrategy
 from ..config import BollingerConfig
-from ..utils import validate_column
+from ..utils import validate_column, require_column
 
 
 class BollingerBandStrategy(BaseStrategy):
     """Mean-reversion strategy based on Bollinger Bands."""
 
+    indicator_params = {"period": "bb"}
+
     def __init__(self, config: BollingerConfig):
         super().__init__(config)
         self.config = config
@@ -28,3 +31,19 @@ class BollingerBandStrategy(BaseStrategy):
 
     def exit_signal(self, df: pd.DataFrame) -> pd.Series:
         return df["close"] > df["ma"]
+
+    def input_columns(self) -> list[str]:
+        return ["close", f"bbm_{self.config.period}", f"bbs_{self.config.period}"]
+
+    def signal_arrays(self, cols) -> tuple[np.ndarray, np.ndarray]:
+        close = cols["close"]
+        ma_col = f"bbm_{self.config.period}"
+        if ma_col in cols:
+            ma = require_column(cols, ma_col)
+            sd = require_column(cols, f"bbs_{self.config.period}")
+        else:
+            roll = pd.Series(close).rolling(self.config.period)
+            ma = roll.mean().shift(1).to_numpy()
+            sd = roll.std().shift(1).to_numpy()
+        lb = ma - self.config.nstd * sd
+        return close < lb, close > ma
@@ -1,12 +1,16 @@
+import numpy as np
 import pandas as pd
 from .base import BaseStrategy
 from ..config import BreakoutConfig
-from ..utils import validate_column
+from ..rangeindex import range_index
+from ..utils import validate_column, require_column
 
 
 class BreakoutStrategy(BaseStrategy):
     """Breakout del massimo recente + filtro ATR."""
 
+    indicator_params = {"lookback": "hmax", "atr_period": "atr"}
+
     def __init__(self, config: BreakoutConfig):
         super().__init__(config)
         self.config = config
@@ -14,14 +18,36 @@ class BreakoutStrategy(BaseStrategy):
     def prepare_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         h_col = f"hmax_{self.config.lookback}"
         if h_col not in df:
-            df[h_col] = df["close"].shift(1).rolling(self.config.lookback).max()
+            df[h_col] = self._rolling_high(df["close"].to_numpy())
         df["h"] = df[h_col]
         atr_col = f"atr_{self.config.atr_period}"
         df["atr"] = validate_column(df, atr_col)
         return df
 
+    def _rolling_high(self, close: np.ndarray) -> np.ndarray:
+        # Massimo dei ``lookback`` close precedenti dall'indice condiviso:
+        # ogni lookback costa O(n) senza colonne precalcolate
+        return range_index(close, "max").rolling(self.config.lookback, shift=1)
+
     def entry_signal(self, df: pd.DataFrame) -> pd.Series:
         return df["close"] > df["h"] + self.config.atr_mult * df["atr"]
 
     def exit_signal(self, df: pd.DataFrame) -> pd.Series:
         return df["close"] < df["h"]
+
+    def input_columns(self) -> list[str]:
+        return [
+            "close",
+            f"hmax_{self.config.lookback}",
+            f"atr_{self.config.atr_period}",
+        ]
+
+    def signal_arrays(self, cols) -> tuple[np.ndarray, np.ndarray]:
+        close = cols["close"]
+        h_col = f"hmax_{self.config.lookback}"
+        if h_col in cols:
+            h = require_column(cols, h_col)
+        else:
+            h = self._rolling_high(close)
+        atr = require_column(cols, f"atr_{self.config.atr_period}")
+        return close > h + self.config.atr_mult * atr, close < h
@@ -1,22 +1,27 @@
+import numpy as np
 import pandas as pd
 from .base import BaseStrategy
 from ..config import MACDConfig, log
+from ..indicators import ema_spans
+from ..utils import shift_array
 
 
 class MACDStrategy(BaseStrategy):
     """Simple MACD crossover strategy."""
 
+    indicator_params = {"fast": "ema", "slow": "ema"}
+
     def __init__(self, config: MACDConfig):
         super().__init__(config)
         self.config = config
 
     def prepare_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        fast = df["close"].ewm(span=self.config.fast, adjust=False).mean().shift(1)
-        slow = df["close"].ewm(span=self.config.slow, adjust=False).mean().shift(1)
-        df["macd"] = fast - slow
-        df["signal"] = (
-            df["macd"].ewm(span=self.config.signal, adjust=False).mean().shift(1)
-        )
+        cols = {
+            name: df[name].to_numpy() for name in self.input_columns() if name in df
+        }
+        macd, signal = self._macd(cols)
+        df["macd"] = macd
+        df["signal"] = signal
         log.debug(
             f"MACD fast={self.config.fast}, slow={self.config.slow}, signal={self.config.signal}"
         )
@@ -31,3 +36,24 @@ class MACDStrategy(BaseStrategy):
         macd = df["macd"]
         signal = df["signal"]
         return (macd < signal) & (macd.shift(1) >= signal.shift(1))
+
+    def input_columns(self) -> list[str]:
+        return ["close", f"ema_{self.config.fast}", f"ema_{self.config.slow}"]
+
+    def _macd(self, cols) -> tuple[np.ndarray, np.ndarray]:
+        # Le EMA veloce/lenta vengono dalla cache indicatori se presenti; la
+        # linea di segnale dipende dalla coppia e si calcola per trial
+        fast, slow = self.config.fast, self.config.slow
+        emas = {s: cols[f"ema_{s}"] for s in (fast, slow) if f"ema_{s}" in cols}
+        missing = [s for s in (fast, slow) if s not in emas]
+        emas.update(ema_spans(cols["close"], missing, shift=1))
+        macd = np.asarray(emas[fast], dtype=np.float64) - emas[slow]
+        signal = ema_spans(macd, [self.config.signal], shift=1)[self.config.signal]
+        return macd, signal
+
+    def signal_arrays(self, cols) -> tuple[np.ndarray, np.ndarray]:
+        macd, signal = self._macd(cols)
+        prev_macd, prev_signal = shift_array(macd), shift_array(signal)
+        entries = (macd > signal) & (prev_macd <= prev_signal)
+        exits = (macd < signal) & (prev_macd >= prev_signal)
+        return entries, exits
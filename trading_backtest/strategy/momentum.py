@@ -1,12 +1,15 @@
+import numpy as np
 import pandas as pd
 from .base import BaseStrategy
 from ..config import MomentumConfig, VolExpansionConfig, log
-from ..utils import validate_column
+from ..utils import validate_column, require_column
 
 
 class VolatilityExpansionStrategy(BaseStrategy):
     """Trade when volatility expands beyond a threshold."""
 
+    indicator_params = {"vol_window": "vol"}
+
     def __init__(self, config: VolExpansionConfig):
         super().__init__(config)
         self.config = config
@@ -33,10 +36,21 @@ class VolatilityExpansionStrategy(BaseStrategy):
     def exit_signal(self, df: pd.DataFrame) -> pd.Series:
         return df["v"] < self.config.vol_threshold
 
+    def input_columns(self) -> list[str]:
+        return [f"vol_{self.config.vol_window}"]
+
+    def signal_arrays(self, cols) -> tuple[np.ndarray, np.ndarray]:
+        v = require_column(cols, f"vol_{self.config.vol_window}")
+        v = pd.Series(v).bfill().ffill().to_numpy()
+        thr = self.config.vol_threshold
+        return v > thr, v < thr
+
 
 class MomentumImpulseStrategy(BaseStrategy):
     """Follow short-term price momentum using impulse."""
 
+    indicator_params = {"window": "imp"}
+
     def __init__(self, config: MomentumConfig):
         super().__init__(config)
         self.config = config
@@ -51,3 +65,10 @@ class MomentumImpulseStrategy(BaseStrategy):
 
     def exit_signal(self, df: pd.DataFrame) -> pd.Series:
         return df["imp"] < 0
+
+    def input_columns(self) -> list[str]:
+        return [f"impulse_{self.config.window}"]
+
+    def signal_arrays(self, cols) -> tuple[np.ndarray, np.ndarray]:
+        imp = require_column(cols, f"impulse_{self.config.window}")
+        return imp > self.config.threshold, imp < 0
@@ -1,8 +1,12 @@
+from typing import ClassVar
+
+import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestClassifier
 
 from .base import BaseStrategy
 from ..config import RandomForestConfig, log
+from ..lazy import LazyIndicatorFrame
 
 
 class RandomForestStrategy(BaseStrategy):
@@ -17,8 +21,31 @@ class RandomForestStrategy(BaseStrategy):
             random_state=42,
         )
 
-    def prepare_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
+    # Feature fisse per i LazyIndicatorFrame, le cui colonne dipendono da
+    # quali indicatori sono stati letti (ed espulsi) fino a quel momento
+    FEATURES: ClassVar[tuple[str, ...]] = (
+        "sma_20",
+        "sma_50",
+        "rsi_14",
+        "atr_14",
+        "vol_20",
+        "impulse_10",
+    )
+
+    def compute_signals(self, df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+        # Le feature sono l'unica copia: il frame non viene duplicato
+        prob = pd.DataFrame({"rf_prob": self._probabilities(df)}, index=df.index)
+        return self._signal_masks(prob)
+
+    def _features(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return the model features of ``df``.
+
+        A :class:`~trading_backtest.lazy.LazyIndicatorFrame` always gives
+        :attr:`FEATURES`; other frames use every technical indicator they
+        hold, falling back on the one-bar return.
+        """
+        if isinstance(df, LazyIndicatorFrame):
+            return df[list(self.FEATURES)]
         # Usa tutte le feature tecniche se ci sono, altrimenti fallback su ret_1
         feature_cols = [
             c
@@ -27,27 +54,33 @@ class RandomForestStrategy(BaseStrategy):
         ]
         if not feature_cols:
             # fallback: usa il return a 1 periodo
-            df["ret_1"] = df["close"].pct_change().fillna(0)
-            feature_cols = ["ret_1"]
+            return df["close"].pct_change().fillna(0).to_frame("ret_1")
+        return df[feature_cols]
+
+    def _probabilities(self, df: pd.DataFrame) -> np.ndarray:
+        """Fit the model on ``df`` and return the "up" probability per bar.
 
-        X = df[feature_cols].fillna(method="bfill").fillna(method="ffill").fillna(0)
-        log.debug(f"RandomForest feature cols: {feature_cols}")
+        ``df`` is only read, never modified.
+        """
+        X = self._features(df).bfill().ffill().fillna(0)
+        log.debug(f"RandomForest feature cols: {list(X.columns)}")
 
-        y = (df["close"].shift(-1) > df["close"]).astype(int)
+        close = df["close"]
+        y = (close.shift(-1) > close).astype(int)
 
         split = int(len(df) * 0.7)
-        if split > 0:
-            self.model.fit(X.iloc[:split], y.iloc[:split])
-            probs = self.model.predict_proba(X)
-            # Usa la probabilità della classe "1" (up)
-            prob_col = probs[:, 1] if probs.shape[1] > 1 else probs[:, 0]
-            df["rf_prob"] = prob_col
-        else:
-            df["rf_prob"] = 0.0
+        if split == 0:
+            return np.zeros(len(df))
+        self.model.fit(X.iloc[:split], y.iloc[:split])
+        probs = self.model.predict_proba(X)
         log.debug(
             f"RF params n_estimators={self.config.n_estimators}, max_depth={self.config.max_depth}"
         )
-        return df
+        # Usa la probabilità della classe "1" (up)
+        return probs[:, 1] if probs.shape[1] > 1 else probs[:, 0]
+
+    def prepare_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df.assign(rf_prob=self._probabilities(df))
 
     def entry_signal(self, df: pd.DataFrame) -> pd.Series:
         return df["rf_prob"] > getattr(self.config, "entry_threshold", 0.55)
@@ -1,12 +1,15 @@
+import numpy as np
 import pandas as pd
 from .base import BaseStrategy
 from ..config import RSIConfig
-from ..utils import validate_column
+from ..utils import validate_column, require_column, shift_array
 
 
 class RSIStrategy(BaseStrategy):
     """Enter on RSI oversold crosses back above the threshold."""
 
+    indicator_params = {"period": "rsi"}
+
     def __init__(self, config: RSIConfig):
         super().__init__(config)
         self.config = config
@@ -23,3 +26,12 @@ class RSIStrategy(BaseStrategy):
     def exit_signal(self, df: pd.DataFrame) -> pd.Series:
         r = df["r"]
         return (r.shift(1) <= 50) & (r > 50)
+
+    def input_columns(self) -> list[str]:
+        return [f"rsi_{self.config.period}"]
+
+    def signal_arrays(self, cols) -> tuple[np.ndarray, np.ndarray]:
+        r = require_column(cols, f"rsi_{self.config.period}")
+        prev = shift_array(r)
+        oversold = self.config.oversold
+        return (prev <= oversold) & (r > oversold), (prev <= 50) & (r > 50)
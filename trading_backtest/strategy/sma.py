@@ -1,13 +1,16 @@
 from __future__ import annotations
+import numpy as np
 import pandas as pd
 from .base import BaseStrategy
 from ..config import SMAConfig
-from ..utils import validate_column
+from ..utils import validate_column, require_column, shift_array
 
 
 class SMACrossoverStrategy(BaseStrategy):
     """Classic fast/slow moving average crossover strategy."""
 
+    indicator_params = {"sma_fast": "sma", "sma_slow": "sma", "sma_trend": "sma"}
+
     def __init__(self, config: SMAConfig) -> None:
         super().__init__(config)
         self.position_size = config.position_size
@@ -31,3 +34,18 @@ class SMACrossoverStrategy(BaseStrategy):
 
     def exit_signal(self, df: pd.DataFrame) -> pd.Series:
         return df["f"] < df["s"]
+
+    def input_columns(self) -> list[str]:
+        cols = ["close", f"sma_{self.config.sma_fast}", f"sma_{self.config.sma_slow}"]
+        if self.config.sma_trend:
+            cols.append(f"sma_{self.config.sma_trend}")
+        return cols
+
+    def signal_arrays(self, cols) -> tuple[np.ndarray, np.ndarray]:
+        f = require_column(cols, f"sma_{self.config.sma_fast}")
+        s = require_column(cols, f"sma_{self.config.sma_slow}")
+        entries = (f > s) & (shift_array(f) <= shift_array(s))
+        if self.config.sma_trend:
+            t = require_column(cols, f"sma_{self.config.sma_trend}")
+            entries &= cols["close"] > t
+        return entries, f < s
@@ -1,25 +1,41 @@
+import numpy as np
 import pandas as pd
 from .base import BaseStrategy
 from ..config import StochasticConfig, log
+from ..rangeindex import range_index
+from ..utils import shift_array
 
 
 class StochasticStrategy(BaseStrategy):
     """Stochastic oscillator strategy using K/D crosses."""
 
+    indicator_params = {"k_period": "stoch"}
+
     def __init__(self, config: StochasticConfig):
         super().__init__(config)
         self.config = config
 
     def prepare_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
-        low_n = df["low"].rolling(self.config.k_period).min().shift(1)
-        high_n = df["high"].rolling(self.config.k_period).max().shift(1)
-        df["k"] = (df["close"] - low_n) / (high_n - low_n) * 100
+        cols = {
+            name: df[name].to_numpy() for name in self.input_columns() if name in df
+        }
+        df["k"] = self._percent_k(cols)
         df["d"] = df["k"].rolling(self.config.d_period).mean().shift(1)
         log.debug(
             f"Stochastic k_period={self.config.k_period}, d_period={self.config.d_period}"
         )
         return df
 
+    def _percent_k(self, cols) -> np.ndarray:
+        p = self.config.k_period
+        if f"stoch_k_{p}" in cols:
+            return cols[f"stoch_k_{p}"]
+        # Minimi/massimi mobili dagli indici condivisi tra i trial
+        low_n = range_index(cols["low"], "min").rolling(p, shift=1)
+        high_n = range_index(cols["high"], "max").rolling(p, shift=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (cols["close"] - low_n) / (high_n - low_n) * 100
+
     def entry_signal(self, df: pd.DataFrame) -> pd.Series:
         k = df["k"]
         return (k.shift(1) < self.config.oversold) & (k > self.config.oversold)
@@ -27,3 +43,13 @@ class StochasticStrategy(BaseStrategy):
     def exit_signal(self, df: pd.DataFrame) -> pd.Series:
         k = df["k"]
         return (k.shift(1) >= 50) & (k < 50)
+
+    def input_columns(self) -> list[str]:
+        return ["close", "high", "low", f"stoch_k_{self.config.k_period}"]
+
+    def signal_arrays(self, cols) -> tuple[np.ndarray, np.ndarray]:
+        # %D non entra nei segnali: si calcola solo %K
+        k = self._percent_k(cols)
+        prev = shift_array(k)
+        oversold = self.config.oversold
+        return (prev < oversold) & (k > oversold), (prev >= 50) & (k < 50)
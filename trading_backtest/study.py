@@ -0,0 +1,346 @@
+# -*- coding: utf-8 -*-
+"""Ottimizzazione distribuita su uno studio Optuna condiviso.
+
+Il coordinatore (``python -m trading_backtest coordinator``) crea lo studio su
+uno storage condiviso (database come ``sqlite:///studies.db`` o file journal
+su un filesystem condiviso, vedi :func:`~trading_backtest.optimize.open_storage`)
+e vi registra strategia, numero di trial, parametri di caricamento dei prezzi
+e la loro impronta.  Un numero qualsiasi di worker (``... worker``), su
+qualsiasi macchina, carica i prezzi dalla propria copia locale (archivio e
+cache degli indicatori compresi), verifica che l'impronta coincida ed esegue
+trial finché lo studio non raggiunge il totale richiesto.
+
+Gli studi persistenti della riga di comando (``--resume``, ``--warm-start``)
+hanno un nome derivato da strategia, impronta dei prezzi e versione dello
+spazio dei parametri (:func:`study_key`) più l'ora di creazione: ``--resume``
+riprende l'ultimo studio con la stessa chiave, ``--warm-start`` accoda come
+primi trial le configurazioni migliori di uno studio precedente, tipicamente
+sugli stessi parametri ma su dati più vecchi.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import optuna
+import pandas as pd
+
+from .cache import IndicatorCache, fingerprint
+from .config import DATA_FILE, log
+from .data import load_price_data, trim_warmup, with_indicators
+from .optimize import (
+    FINISHED_STATES,
+    PARAM_SPACES,
+    PRUNE_FUNCS,
+    fail_stale_trials,
+    gather_indicator_periods,
+    make_objective,
+    open_storage,
+    run_trials,
+)
+from .results import ResultStore
+from .strategy import get_strategy
+
+_DONE_STATES = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+
+# <strategia>-<impronta prezzi>-<versione spazio>-<creazione>
+_STUDY_NAME = re.compile(
+    r"(?P<strategy>\w+)-(?P<data>[0-9a-f]{12})-(?P<space>[0-9a-f]{8})-(?P<created>\d{20})"
+)
+
+
+def space_version(param_space: Any) -> str:
+    """Short hash of the ranges of ``param_space``.
+
+    It changes whenever a range, a step or a parameter changes, so trials
+    from an older parameter space are never resumed by mistake.
+    """
+
+    if dataclasses.is_dataclass(param_space):
+        param_space = dataclasses.asdict(param_space)
+    text = repr(sorted(param_space.items()))
+    return hashlib.blake2b(text.encode(), digest_size=4).hexdigest()
+
+
+def study_key(strategy_name: str, df: pd.DataFrame, param_space: Any) -> str:
+    """Return ``<strategy>-<data fingerprint>-<space version>``."""
+    return f"{strategy_name}-{fingerprint(df)[:12]}-{space_version(param_space)}"
+
+
+def persistent_study_name(storage: str | Path, key: str, resume: bool = False) -> str:
+    """Return the study to run for ``key``.
+
+    With ``resume`` this is the latest study with that key, if any; otherwise
+    a new name stamped with the current time.
+    """
+
+    names = sorted(
+        name
+        for name in optuna.get_all_study_names(open_storage(storage))
+        if name.startswith(f"{key}-")
+    )
+    if resume and names:
+        return names[-1]
+    return f"{key}-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+
+
+def warm_start(
+    study_name: str,
+    storage: str | Path,
+    param_space: Any,
+    source: str | None = None,
+    top_k: int = 10,
+) -> int:
+    """Enqueue the ``top_k`` best configurations of ``source`` in the study.
+
+    Without ``source`` the latest other study of the same strategy and
+    parameter space version is used (for example the same optimization on
+    last month's data).  Returns the number of configurations enqueued;
+    configurations already in the study are skipped.
+    """
+
+    storage = open_storage(storage)
+    if source is None:
+        target = _STUDY_NAME.fullmatch(study_name)
+        candidates = [
+            m
+            for m in map(_STUDY_NAME.fullmatch, optuna.get_all_study_names(storage))
+            if m
+            and m.group(0) != study_name
+            and m["strategy"] == target["strategy"]
+            and m["space"] == target["space"]
+        ]
+        if not candidates:
+            log.info("Nessuno studio precedente per il warm start di %s", study_name)
+            return 0
+        source = max(candidates, key=lambda m: m["created"]).group(0)
+
+    previous = optuna.load_study(study_name=source, storage=storage)
+    names = set(
+        dataclasses.asdict(param_space)
+        if dataclasses.is_dataclass(param_space)
+        else param_space
+    )
+    trials = [
+        t
+        for t in previous.get_trials(
+            deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,)
+        )
+        if set(t.params) == names
+    ]
+    trials.sort(key=lambda t: t.value, reverse=True)
+    study = optuna.create_study(
+        direction="maximize",
+        storage=storage,
+        study_name=study_name,
+        load_if_exists=True,
+    )
+    for trial in trials[:top_k]:
+        study.enqueue_trial(trial.params, skip_if_exists=True)
+    log.info(
+        "Warm start di %s da %s: %d configurazioni",
+        study_name,
+        source,
+        len(trials[:top_k]),
+    )
+    return len(trials[:top_k])
+
+
+def load_study_prices(
+    data_file: str | Path = DATA_FILE,
+    strategy_name: str = "sma",
+    start: str | None = None,
+    end: str | None = None,
+    timeframe: str | None = None,
+    float32: bool = False,
+) -> pd.DataFrame:
+    """Load the prices of a study, with the warm-up bars for its indicators.
+
+    The warm-up bars (``df.attrs["warmup"]``) are only loaded with ``start``,
+    as in the command line; see :func:`trim_warmup`.
+    """
+
+    periods = gather_indicator_periods(strategy_name)
+    warmup = max((w for ws in periods.values() for w in ws), default=0) + 1
+    return load_price_data(
+        data_file,
+        dtype="float32" if float32 else "float64",
+        start=start,
+        end=end,
+        warmup=warmup if start else 0,
+        timeframe=timeframe,
+    )
+
+
+def create_shared_study(
+    study_name: str,
+    storage: str | Path,
+    strategy_name: str,
+    n_trials: int,
+    data_file: str | Path = DATA_FILE,
+    start: str | None = None,
+    end: str | None = None,
+    timeframe: str | None = None,
+    float32: bool = False,
+) -> optuna.Study:
+    """Create (or reopen) the study that ``worker`` processes run.
+
+    The study records everything a worker needs to rebuild the same data and
+    objective.  Reopening an existing study with another strategy or other
+    prices raises :class:`ValueError`.
+    """
+
+    if strategy_name not in PARAM_SPACES:
+        raise ValueError(f"Strategia sconosciuta: {strategy_name}")
+    full = load_study_prices(data_file, strategy_name, start, end, timeframe, float32)
+    attrs = {
+        "strategy": strategy_name,
+        "n_trials": n_trials,
+        "data_file": str(data_file),
+        "start": start,
+        "end": end,
+        "timeframe": timeframe,
+        "float32": float32,
+        "fingerprint": fingerprint(trim_warmup(full)),
+    }
+    study = optuna.create_study(
+        direction="maximize",
+        storage=open_storage(storage),
+        study_name=study_name,
+        load_if_exists=True,
+    )
+    for key in ("strategy", "fingerprint"):
+        if study.user_attrs.get(key, attrs[key]) != attrs[key]:
+            raise ValueError(
+                f"Lo studio {study_name} esiste con un altro valore di {key}"
+            )
+    for key, value in attrs.items():
+        study.set_user_attr(key, value)
+    log.info(
+        "Studio %s: %s, %d trial su %d barre",
+        study_name,
+        strategy_name,
+        n_trials,
+        len(full),
+    )
+    return study
+
+
+def run_worker(
+    study_name: str,
+    storage: str | Path,
+    data_file: str | Path | None = None,
+    cache: IndicatorCache | None = None,
+    results: ResultStore | None = None,
+) -> optuna.Study:
+    """Run trials of a shared study until it reaches its trial count.
+
+    ``data_file`` overrides the path recorded by the coordinator, for
+    machines where the prices live elsewhere; the data must still match the
+    study fingerprint, otherwise :class:`ValueError` is raised.  The trials
+    run in the same loop as :func:`~trading_backtest.optimize.run_trials`;
+    ``results`` is consulted as in
+    :func:`~trading_backtest.optimize.evaluate_strategy`.
+    """
+
+    study = optuna.load_study(study_name=study_name, storage=open_storage(storage))
+    attrs = study.user_attrs
+    if "fingerprint" not in attrs:
+        raise ValueError(f"Lo studio {study_name} non è stato creato dal coordinatore")
+    strategy_name = attrs["strategy"]
+    full = load_study_prices(
+        data_file or attrs["data_file"],
+        strategy_name,
+        attrs["start"],
+        attrs["end"],
+        attrs["timeframe"],
+        attrs["float32"],
+    )
+    if fingerprint(trim_warmup(full)) != attrs["fingerprint"]:
+        raise ValueError(f"I prezzi locali non coincidono con lo studio {study_name}")
+
+    periods = gather_indicator_periods(strategy_name)
+    df = trim_warmup(with_indicators(full, **periods, cache=cache))
+    del full
+    strategy_cls, config_cls = get_strategy(strategy_name)
+    objective = make_objective(
+        df,
+        strategy_cls,
+        config_cls,
+        PARAM_SPACES[strategy_name],
+        PRUNE_FUNCS[strategy_name],
+        results,
+    )
+    run_trials(study, objective, attrs["n_trials"])
+    return study
+
+
+def wait_for_study(
+    study: optuna.Study, poll: float = 5.0, timeout: float | None = None
+) -> optuna.FrozenTrial:
+    """Block until ``study`` has completed its trials and return the best one.
+
+    Failed trials do not count, the workers run them again.  Stale trials of
+    killed workers are failed while waiting on database storages; on journal
+    files they stay RUNNING, so give a ``timeout`` (seconds) to raise
+    :class:`TimeoutError` instead of waiting for them forever.
+    """
+
+    n_trials = study.user_attrs["n_trials"]
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        fail_stale_trials(study)
+        trials = study.get_trials(deepcopy=False)
+        if sum(t.state in _DONE_STATES for t in trials) >= n_trials:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            running = [
+                t.number for t in trials if t.state == optuna.trial.TrialState.RUNNING
+            ]
+            raise TimeoutError(
+                f"Studio {study.study_name} incompleto dopo {timeout:g}s "
+                f"(trial in corso: {running})"
+            )
+        time.sleep(poll)
+    trial = study.best_trial
+    log.info("🏆 Best params: %s (%.2f%%)", trial.params, trial.value)
+    return trial
+
+
+def study_summary(study: optuna.Study) -> dict[str, Any]:
+    """Return the progress of ``study`` as a plain dict."""
+
+    states = [t.state for t in study.get_trials(deepcopy=False)]
+    summary = {
+        "study": study.study_name,
+        "strategy": study.user_attrs.get("strategy"),
+        "n_trials": study.user_attrs.get("n_trials"),
+        "finished": sum(s in FINISHED_STATES for s in states),
+        "running": states.count(optuna.trial.TrialState.RUNNING),
+    }
+    try:
+        summary["best_value"] = study.best_value
+        summary["best_params"] = study.best_params
+    except ValueError:
+        pass
+    return summary
+
+
+__all__ = [
+    "space_version",
+    "study_key",
+    "persistent_study_name",
+    "warm_start",
+    "load_study_prices",
+    "create_shared_study",
+    "run_worker",
+    "fail_stale_trials",
+    "wait_for_study",
+    "study_summary",
+]
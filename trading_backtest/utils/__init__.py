@@ -1,4 +1,6 @@
 from __future__ import annotations
+from typing import Mapping
+import numpy as np
 import pandas as pd
 
 from ..config import log
@@ -16,4 +18,20 @@ def validate_column(df: pd.DataFrame, col: str) -> pd.Series:
     return series
 
 
-__all__ = ["validate_column"]
+def require_column(cols: Mapping[str, np.ndarray], col: str) -> np.ndarray:
+    """Return ``cols[col]`` as a float array or raise ``KeyError`` if missing."""
+    if col not in cols:
+        raise KeyError(f"Colonna {col} mancante")
+    return np.asarray(cols[col], dtype=np.float64)
+
+
+def shift_array(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    """NumPy equivalent of ``Series.shift(periods)`` for ``periods >= 0``."""
+    periods = min(periods, len(values))
+    out = np.empty(len(values), dtype=np.float64)
+    out[:periods] = np.nan
+    out[periods:] = values[: len(values) - periods]
+    return out
+
+
+__all__ = ["validate_column", "require_column", "shift_array"]
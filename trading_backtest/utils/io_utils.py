@@ -1,5 +1,7 @@
 from __future__ import annotations
+import os
 from pathlib import Path
+from typing import Any, BinaryIO, Callable
 import pandas as pd
 
 
@@ -12,3 +14,94 @@ def save_csv(df: pd.DataFrame, path: str | Path) -> None:
     """Save a DataFrame to CSV without index."""
     Path(path).parent.mkdir(parents=True, exist_ok=True)
     df.to_csv(path, index=False)
+
+
+def _line_start(fh: BinaryIO, pos: int, header_end: int) -> int:
+    # Primo inizio riga a partire da ``pos``
+    if pos <= header_end:
+        return header_end
+    fh.seek(pos - 1)
+    fh.readline()
+    return fh.tell()
+
+
+def _first_key_at(fh, pos, size, header_end, key):
+    """Return ``(line_start, key)`` of the first parseable line at/after ``pos``."""
+    start = _line_start(fh, pos, header_end)
+    fh.seek(start)
+    while start < size:
+        line = fh.readline()
+        value = key(line)
+        if value is not None:
+            return start, value
+        start += len(line)
+    return size, None
+
+
+def _bisect_lines(fh, size, header_end, key, target, probes) -> int:
+    # Offset del primo record con chiave >= target (``size`` se nessuno)
+    lo, hi = header_end, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        start, value = _first_key_at(fh, mid, size, header_end, key)
+        if value is not None:
+            probes.append((start, value))
+        if value is None or value >= target:
+            hi = mid
+        else:
+            lo = mid + 1
+    return _first_key_at(fh, lo, size, header_end, key)[0]
+
+
+def csv_byte_range(
+    path: str | Path,
+    key: Callable[[bytes], Any],
+    start: Any = None,
+    end: Any = None,
+    before: int = 0,
+) -> tuple[bytes, int, int] | None:
+    """Locate the rows of a CSV sorted by ``key`` with ``start <= key < end``.
+
+    ``key`` maps a raw data line to a comparable value (``None`` for lines to
+    skip).  The search bisects byte offsets, so only ``O(log n)`` lines are
+    read.  Returns the header line and the byte range ``[lo, hi)`` of the
+    rows, extended backwards by at least ``before`` lines; ``None`` if the
+    probed lines show that the file is not sorted.
+    """
+
+    with open(path, "rb") as fh:
+        header = fh.readline()
+        header_end = fh.tell()
+        size = os.fstat(fh.fileno()).st_size
+        probes: list[tuple[int, Any]] = []
+        lo = header_end
+        if start is not None:
+            lo = _bisect_lines(fh, size, header_end, key, start, probes)
+        hi = size
+        if end is not None:
+            hi = _bisect_lines(fh, size, header_end, key, end, probes)
+        probes.sort(key=lambda p: p[0])
+        if any(a[1] > b[1] for a, b in zip(probes, probes[1:])):
+            return None
+
+        # Esattamente ``before`` righe precedenti, leggendo a blocchi all'indietro
+        if before and lo > header_end:
+            block = 1 << 12
+            tail = b""
+            while True:
+                step = min(block, lo - header_end)
+                lo -= step
+                fh.seek(lo)
+                tail = fh.read(step) + tail
+                cut = len(tail)
+                for _ in range(before + 1):
+                    cut = tail.rfind(b"\n", 0, cut)
+                    if cut < 0:
+                        break
+                if cut >= 0:
+                    lo += cut + 1
+                    break
+                if lo == header_end:
+                    break
+                block *= 2
+    return header, lo, max(lo, hi)